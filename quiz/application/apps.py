@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ApplicationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'application'
+
+    def ready(self):
+        # Подключение обработчиков сигналов моделей
+        from . import signals  # noqa: F401
+
+        # Журнал медленных запросов для всех новых соединений с базой
+        from django.db.backends.signals import connection_created
+
+        from .slow_queries import get_options, install
+        if get_options()['ENABLED']:
+            connection_created.connect(install, dispatch_uid='slow_queries')
@@ -0,0 +1,136 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from .cache import payload_cache
+from .mixins import list_cache_key, list_cache_quiz_id
+from .models import Questions, Quizzes
+from .pagination import StandardPagination
+from .renderers import FastJSONRenderer
+from .representations import (arepresent_questions, question_rows, quiz_rows,
+                              represent_quizzes)
+from .sampling import question_sampler
+from .views import QuizList, QuizQuestions
+
+# Асинхронные версии эндпоинтов чтения (префикс async/) на async ORM.
+# Фильтры, пагинация, представление строк и кэш ответов общие
+# с синхронными представлениями, ответы совпадают с ними, но без
+# согласования формата (только JSON), условных GET и курсорной
+# пагинации. Кэш читается через асинхронные методы (aget/aset)
+
+_renderer = FastJSONRenderer()
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(_renderer.render(data), status=status,
+                        content_type='application/json', headers=headers)
+
+
+def api_view(view):
+    """
+    Только GET, запрос оборачивается в Request DRF, исключения
+    DRF и Http404 превращаются в ответ с ошибкой, как в APIView
+    """
+
+    # require_GET в Django 4.1 не поддерживает асинхронные представления
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return HttpResponseNotAllowed(['GET'])
+        try:
+            return await view(Request(request), *args, **kwargs)
+        except (APIException, Http404) as exc:
+            response = exception_handler(exc, {})
+            return json_response(response.data, status=response.status_code)
+
+    return wrapper
+
+
+async def filter_queryset(request, queryset, view):
+    """
+    Фильтры синхронного представления view (filterset_fields),
+    как в DjangoFilterBackend. Проверка значений (существование
+    квиза, автора) читает базу синхронно, поэтому идёт в потоке
+    """
+    return await sync_to_async(DjangoFilterBackend().filter_queryset)(
+        request, queryset, view)
+
+
+@api_view
+async def quiz_list(request):
+    """Список квизов с фильтрами category и author (id), как QuizList"""
+    queryset = await filter_queryset(request, Quizzes.objects.all(),
+                                     QuizList)
+    paginator = StandardPagination()
+    rows = await paginator.apaginate_queryset(quiz_rows(queryset), request)
+    return json_response(paginator.get_paginated_data(
+        represent_quizzes(rows)))
+
+
+@api_view
+async def quiz_detail(request, pk):
+    """Квиз по id, через общий с QuizDetail кэш ответов"""
+    data = await payload_cache.aget('quiz', pk)
+    if data is not None:
+        return json_response(data, headers={'X-Cache': 'HIT'})
+    token = await payload_cache.abegin()
+    rows = [row async for row in quiz_rows(Quizzes.objects.filter(pk=pk))]
+    if not rows:
+        raise Http404
+    data = represent_quizzes(rows)[0]
+    await payload_cache.aset('quiz', pk, pk, data, token)
+    return json_response(data, headers={'X-Cache': 'MISS'})
+
+
+@api_view
+async def question_list(request):
+    """
+    Список вопросов с фильтрами quiz, author и is_active,
+    как QuizQuestions
+    """
+    key = list_cache_key(request)
+    data = await payload_cache.aget('questions', key)
+    if data is not None:
+        return json_response(data, headers={'X-Cache': 'HIT'})
+
+    token = await payload_cache.abegin()
+    queryset = await filter_queryset(request, Questions.objects.all(),
+                                     QuizQuestions)
+    paginator = StandardPagination()
+    rows = await paginator.apaginate_queryset(question_rows(queryset),
+                                              request)
+    data = paginator.get_paginated_data(await arepresent_questions(rows))
+    await payload_cache.aset('questions', key, list_cache_quiz_id(request),
+                             data, token)
+    return json_response(data, headers={'X-Cache': 'MISS'})
+
+
+@api_view
+async def random_question(request, quiz_id):
+    """Случайный активный вопрос квиза, как RandomQuestion"""
+    rows = []
+    if quiz_id.isdigit():
+        quiz_id = int(quiz_id)
+        for _ in range(2):
+            question_id = await question_sampler.apick(quiz_id)
+            if question_id is None:
+                break
+            rows = [row async for row in question_rows(
+                Questions.objects.filter(pk=question_id, is_active=True,
+                                         quiz=quiz_id))]
+            if rows:
+                break
+            # индекс устарел (изменения из другого процесса), перечитываем
+            await question_sampler.aload(quiz_id)
+    return json_response({
+        'count': len(rows),
+        'count_exact': True,
+        'next': None,
+        'previous': None,
+        'results': await arepresent_questions(rows),
+    })
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+JWT_AUTH_DEFAULTS = {
+    # пользователь из утверждений токена для GET/HEAD/OPTIONS
+    'STATELESS_READS': True,
+    # секунды, 0 - проверенные токены не кэшируются
+    'TOKEN_CACHE_TTL': 60,
+    'TOKEN_CACHE_SIZE': 10000,
+}
+
+
+def get_options():
+    return {**JWT_AUTH_DEFAULTS, **getattr(settings, 'JWT_AUTH', {})}
+
+
+class TokenCache:
+    """
+    Проверенные токены в памяти процесса: повторный запрос с тем же
+    токеном не проверяет подпись заново. Запись живёт не дольше TTL
+    и не дольше срока действия самого токена, при переполнении
+    вытесняются самые старые записи
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = Counter()
+
+    def get(self, raw_token):
+        with self._lock:
+            entry = self._entries.get(raw_token)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[raw_token]
+                entry = None
+            self._stats['hits' if entry else 'misses'] += 1
+        return entry[0] if entry else None
+
+    def set(self, raw_token, token, ttl, size):
+        ttl = min(ttl, token['exp'] - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[raw_token] = (token, time.monotonic() + ttl)
+            self._entries.move_to_end(raw_token)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+token_cache = TokenCache()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication без запроса пользователя к базе на чтение:
+    для безопасных методов request.user - TokenUser из утверждений
+    токена (id, username, is_staff), пользователь из базы загружается
+    только для изменяющих запросов, где он нужен как автор записи
+    и где проверяется is_active. Чтение и так доступно анонимно,
+    поэтому деактивированный пользователь с действующим токеном
+    не получает ничего лишнего
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        if (request.method in SAFE_METHODS
+                and get_options()['STATELESS_READS']):
+            return self.get_token_user(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_token_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification'))
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+    def get_validated_token(self, raw_token):
+        options = get_options()
+        if not options['TOKEN_CACHE_TTL']:
+            return super().get_validated_token(raw_token)
+        validated_token = token_cache.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            token_cache.set(raw_token, validated_token,
+                            options['TOKEN_CACHE_TTL'],
+                            options['TOKEN_CACHE_SIZE'])
+        return validated_token
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import defaultdict
+
+# Обёртки стандартных бэкендов Django (ENGINE application.backends.<имя>),
+# которые считают открытия соединений и проверки их работоспособности.
+# Переиспользование соединений запросами считает ProfilingMiddleware,
+# метрики отдаются на metrics/
+
+
+class ConnectionStats:
+    """Счётчики и суммарное время по алиасам баз в памяти процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(self._empty)
+
+    @staticmethod
+    def _empty():
+        return {'connects': 0, 'connect_seconds': 0.0,
+                'health_checks': 0, 'health_check_seconds': 0.0,
+                'health_check_failures': 0, 'new': 0, 'reused': 0}
+
+    def record_connect(self, alias, seconds):
+        with self._lock:
+            stats = self._stats[alias]
+            stats['connects'] += 1
+            stats['connect_seconds'] += seconds
+
+    def record_health_check(self, alias, seconds, failed):
+        with self._lock:
+            stats = self._stats[alias]
+            stats['health_checks'] += 1
+            stats['health_check_seconds'] += seconds
+            stats['health_check_failures'] += failed
+
+    def record_use(self, alias, reused):
+        """Запрос к API использовал соединение: открытое ранее или новое"""
+        with self._lock:
+            self._stats[alias]['reused' if reused else 'new'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {alias: dict(stats)
+                    for alias, stats in sorted(self._stats.items())}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+connection_stats = ConnectionStats()
+
+
+class ConnectionMetricsMixin:
+    """Время открытия соединения и проверки CONN_HEALTH_CHECKS"""
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        connection_stats.record_connect(self.alias,
+                                        time.perf_counter() - start)
+
+    def close_if_health_check_failed(self):
+        # проверка выполняется только для соединения, открытого
+        # в одном из предыдущих запросов, и один раз за запрос
+        if (self.connection is None or not self.health_check_enabled
+                or self.health_check_done):
+            return
+        start = time.perf_counter()
+        super().close_if_health_check_failed()
+        connection_stats.record_health_check(
+            self.alias, time.perf_counter() - start, self.connection is None)
@@ -0,0 +1,7 @@
+from django.db.backends.sqlite3 import base
+
+from .. import ConnectionMetricsMixin
+
+
+class DatabaseWrapper(ConnectionMetricsMixin, base.DatabaseWrapper):
+    pass
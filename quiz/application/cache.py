@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+GLOBAL = 'all'
+
+
+class PayloadCache:
+    """
+    Кэш сериализованных ответов для квизов, вопросов и ответов.
+
+    Ключ записи - вид объекта и его id, в записи хранится id квиза
+    и версия квиза на момент сериализации. Версия квиза увеличивается
+    сигналами при любом изменении квиза, его вопросов и ответов,
+    поэтому устаревшие записи просто перестают совпадать по версии
+    и вытесняются бэкендом (LRU/TTL) со временем.
+
+    Бэкенд задаётся через CACHES, алиас - PAYLOAD_CACHE_ALIAS.
+    Для асинхронных представлений есть методы aget, aset и abegin.
+    Счётчики попаданий и промахов ведутся в памяти процесса.
+    """
+
+    def __init__(self, alias=None):
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    @property
+    def cache(self):
+        alias = self.alias or getattr(settings, 'PAYLOAD_CACHE_ALIAS',
+                                      'default')
+        return caches[alias]
+
+    @staticmethod
+    def version_key(quiz_id):
+        return f'quiz-version:{quiz_id}'
+
+    def _initial_version(self, key):
+        # время в наносекундах, а не 1: если ключ версии был вытеснен,
+        # новая версия не совпадёт ни с одной из старых записей
+        version = time.time_ns()
+        if not self.cache.add(key, version, timeout=None):
+            version = self.cache.get(key, version)
+        return version
+
+    def get_versions(self, *quiz_ids):
+        keys = [self.version_key(quiz_id) for quiz_id in quiz_ids]
+        versions = self.cache.get_many(keys)
+        return [versions[key] if key in versions
+                else self._initial_version(key) for key in keys]
+
+    def get_version(self, quiz_id):
+        return self.get_versions(quiz_id)[0]
+
+    async def _ainitial_version(self, key):
+        version = time.time_ns()
+        if not await self.cache.aadd(key, version, timeout=None):
+            version = await self.cache.aget(key, version)
+        return version
+
+    async def aget_versions(self, *quiz_ids):
+        keys = [self.version_key(quiz_id) for quiz_id in quiz_ids]
+        versions = await self.cache.aget_many(keys)
+        return [versions[key] if key in versions
+                else await self._ainitial_version(key) for key in keys]
+
+    async def aget_version(self, quiz_id):
+        return (await self.aget_versions(quiz_id))[0]
+
+    def bump(self, *quiz_ids):
+        """Инвалидирует записи квизов и общие списки"""
+        for quiz_id in {*quiz_ids, GLOBAL}:
+            if quiz_id is None:
+                continue
+            key = self.version_key(quiz_id)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), timeout=None)
+
+    def begin(self):
+        """
+        Возвращает общую версию до чтения данных из базы,
+        её нужно передать в set()
+        """
+        return self.get_version(GLOBAL)
+
+    async def abegin(self):
+        return await self.aget_version(GLOBAL)
+
+    def _count(self, kind, hit):
+        with self._lock:
+            self._stats[f'{kind}_{"hits" if hit else "misses"}'] += 1
+
+    def get(self, kind, key):
+        entry = self.cache.get(f'{kind}:{key}')
+        if entry is not None:
+            quiz_id, version, data = entry
+            if self.get_version(quiz_id) == version:
+                self._count(kind, True)
+                return data
+        self._count(kind, False)
+        return None
+
+    async def aget(self, kind, key):
+        """get для асинхронных представлений"""
+        entry = await self.cache.aget(f'{kind}:{key}')
+        if entry is not None:
+            quiz_id, version, data = entry
+            if await self.aget_version(quiz_id) == version:
+                self._count(kind, True)
+                return data
+        self._count(kind, False)
+        return None
+
+    def set(self, kind, key, quiz_id, data, token):
+        """
+        Сохраняет данные, если с момента begin() ничего не менялось:
+        иначе данные могли быть прочитаны до изменения и уже устарели
+        """
+        current, version = self.get_versions(GLOBAL, quiz_id)
+        if current != token:
+            return
+        self.cache.set(f'{kind}:{key}', (quiz_id, version, data))
+
+    async def aset(self, kind, key, quiz_id, data, token):
+        """set для асинхронных представлений"""
+        current, version = await self.aget_versions(GLOBAL, quiz_id)
+        if current != token:
+            return
+        await self.cache.aset(f'{kind}:{key}', (quiz_id, version, data))
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+payload_cache = PayloadCache()
@@ -0,0 +1,84 @@
+import csv
+import json
+
+from .models import Answers, Questions
+
+QUESTION_FIELDS = ('quiz_id', 'quiz__title', 'id', 'title', 'kind',
+                   'difficulty', 'is_active', 'author__username')
+ANSWER_FIELDS = ('question__quiz_id', 'question_id', 'id', 'text', 'is_right')
+CSV_HEADER = ('quiz', 'quiz_title', 'question', 'title', 'kind', 'difficulty',
+              'is_active', 'author_name', 'answer_id', 'answer', 'is_right')
+
+
+def iter_questions(quizzes, chunk_size=2000):
+    """
+    Итерирует вопросы выбранных квизов вместе с ответами.
+    Вопросы и ответы читаются двумя курсорами (на PostgreSQL -
+    серверными) в одинаковом порядке (квиз, вопрос) и сливаются
+    на лету, поэтому в памяти одновременно находятся только
+    текущие пачки строк, независимо от размера квиза
+    """
+    quiz_ids = quizzes.values('pk')
+    questions = Questions.objects.filter(quiz__in=quiz_ids).order_by(
+        'quiz_id', 'id').values_list(*QUESTION_FIELDS).iterator(chunk_size)
+    answers = Answers.objects.filter(question__quiz__in=quiz_ids).order_by(
+        'question__quiz_id', 'question_id', 'id').values_list(
+        *ANSWER_FIELDS).iterator(chunk_size)
+
+    answer = next(answers, None)
+    for question in questions:
+        key = (question[0], question[2])
+        question_answers = []
+        # ответы, чьи вопросы не попали в выборку (созданы между
+        # запросами), пропускаются
+        while answer is not None and (answer[0], answer[1]) < key:
+            answer = next(answers, None)
+        while answer is not None and (answer[0], answer[1]) == key:
+            question_answers.append(answer[2:])
+            answer = next(answers, None)
+        yield question, question_answers
+
+
+def export_jsonl(quizzes, chunk_size=2000):
+    """Один вопрос с ответами на строку"""
+    for question, answers in iter_questions(quizzes, chunk_size):
+        quiz_id, quiz_title, pk, title, kind, difficulty, \
+            is_active, author_name = question
+        yield json.dumps({
+            'quiz': quiz_id,
+            'quiz_title': quiz_title,
+            'id': pk,
+            'title': title,
+            'kind': kind,
+            'difficulty': difficulty,
+            'is_active': is_active,
+            'author_name': author_name,
+            'answers': [{'id': answer_id, 'text': text, 'is_right': is_right}
+                        for answer_id, text, is_right in answers],
+        }, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу возвращает записанную строку"""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(quizzes, chunk_size=2000):
+    """
+    Одна строка на ответ (вопрос без ответов - одна строка с пустыми
+    колонками ответа). Колонки title, kind, difficulty, is_active,
+    answer, is_right совпадают с форматом CSV-импорта вопросов
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for question, answers in iter_questions(quizzes, chunk_size):
+        for answer in answers or [('', '', '')]:
+            yield writer.writerow(question + answer)
+
+
+EXPORT_FORMATS = {
+    'jsonl': (export_jsonl, 'application/jsonl'),
+    'csv': (export_csv, 'text/csv'),
+}
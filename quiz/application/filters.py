@@ -5,25 +5,42 @@ from .models import Categories, Quizzes
 
 class CategoryFilter(filters.FilterSet):
     """Фильтр для категорий по имени"""
+    # лимит для автодополнения, чтобы возвращать только первые совпадения
+    MAX_LIMIT = 100
+
     name = filters.CharFilter(method='find_by_name')
+    limit = filters.NumberFilter(method='skip_filter', min_value=1,
+                                 max_value=MAX_LIMIT)
 
     def find_by_name(self, queryset, name, value):
-        # Сначала проверяются совпадения по началу слова, аннотируются значением
-        # qs_order=0
+        # Одним запросом: совпадения по началу имени получают
+        # qs_order=0 и идут первыми, остальные вхождения - qs_order=1
         if not value:
             return queryset
-        starts_with = queryset.filter(name__istartswith=value).annotate(
-            qs_order=models.Value(0, models.IntegerField())
-        )
-        contains = queryset.filter(name__icontains=value).exclude(
-            name__in=starts_with.values('name')).annotate(
-            qs_order=models.Value(1, models.IntegerField()))
-
-        return starts_with.union(contains).order_by('qs_order')
+        return queryset.filter(name__icontains=value).annotate(
+            qs_order=models.Case(
+                models.When(name__istartswith=value, then=models.Value(0)),
+                default=models.Value(1),
+                output_field=models.IntegerField(),
+            )
+        ).order_by('qs_order', 'id')
+
+    def skip_filter(self, queryset, name, value):
+        # limit применяется к уже отфильтрованной выборке в filter_queryset
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        limit = self.form.cleaned_data.get('limit')
+        if limit:
+            if not queryset.ordered:
+                queryset = queryset.order_by('id')
+            queryset = queryset[:int(limit)]
+        return queryset
 
     class Meta:
         model = Categories
-        fields = ('name',)
+        fields = ('name', 'limit')
 
 
 class QuizFilter(filters.FilterSet):
@@ -0,0 +1,132 @@
+import asyncio
+import base64
+import functools
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import (Argon2PasswordHasher,
+                                         ScryptPasswordHasher)
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+
+PASSWORD_HASHING_DEFAULTS = {
+    'ALGORITHM': 'scrypt',
+    # scrypt: память 128 * WORK_FACTOR * BLOCK_SIZE байт (16 МБ)
+    'SCRYPT_WORK_FACTOR': 2 ** 14,
+    'SCRYPT_BLOCK_SIZE': 8,
+    'SCRYPT_PARALLELISM': 1,
+    # argon2id: MEMORY_COST в КБ
+    'ARGON2_TIME_COST': 2,
+    'ARGON2_MEMORY_COST': 65536,
+    'ARGON2_PARALLELISM': 1,
+    # под ASGI вход и регистрация выполняются в пуле из THREADS потоков
+    # (по умолчанию - число доступных процессу ядер)
+    'OFFLOAD': True,
+    'THREADS': None,
+}
+
+
+def get_options():
+    return {**PASSWORD_HASHING_DEFAULTS,
+            **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt с параметрами из PASSWORD_HASHING. Хеши с другими
+    параметрами (и хеши других алгоритмов из PASSWORD_HASHERS)
+    пересчитываются при следующем успешном входе
+    """
+
+    @property
+    def work_factor(self):
+        return get_options()['SCRYPT_WORK_FACTOR']
+
+    @property
+    def block_size(self):
+        return get_options()['SCRYPT_BLOCK_SIZE']
+
+    @property
+    def parallelism(self):
+        return get_options()['SCRYPT_PARALLELISM']
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        # предел памяти по параметрам хеша, а не текущих настроек:
+        # по умолчанию OpenSSL ограничивает scrypt 32 МБ
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(password.encode(), salt=salt.encode(),
+                               n=n, r=r, p=p, maxmem=2 * 128 * n * r,
+                               dklen=64)
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """argon2id с параметрами из PASSWORD_HASHING, нужен argon2-cffi"""
+
+    @property
+    def time_cost(self):
+        return get_options()['ARGON2_TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return get_options()['ARGON2_MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return get_options()['ARGON2_PARALLELISM']
+
+
+@functools.lru_cache(maxsize=None)
+def hashing_executor():
+    # ядра, доступные процессу (cpuset контейнера, taskset),
+    # а не все ядра машины
+    threads = get_options()['THREADS'] or len(os.sched_getaffinity(0))
+    return ThreadPoolExecutor(max_workers=threads,
+                              thread_name_prefix='password-hashing')
+
+
+def _call(view, request, *args, **kwargs):
+    # соединения с базой в потоках пула живут по CONN_MAX_AGE,
+    # как и в обычном обработчике запроса
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def offload_hashing(view):
+    """
+    Асинхронная обёртка для представлений, которые хешируют
+    пароли. Под ASGI Django 4.1 выполняет синхронный код каждого
+    запроса в собственном потоке (ThreadSensitiveContext на запрос),
+    поэтому число одновременных хеширований ничем не ограничено:
+    всплеск входов занимает все ядра и по 16 МБ памяти на каждый
+    хеш scrypt, задерживая остальные запросы. Обёрнутое представление
+    выполняется в пуле hashing_executor(), и одновременно считается
+    не больше PASSWORD_HASHING['THREADS'] хешей, остальные входы ждут
+    в очереди. Под WSGI и при PASSWORD_HASHING['OFFLOAD'] = False
+    выполняется как обычно
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if (not isinstance(request, ASGIRequest)
+                or not get_options()['OFFLOAD']):
+            return await sync_to_async(view)(request, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            hashing_executor(),
+            functools.partial(_call, view, request, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,47 @@
+from django.db import transaction
+
+from .models import Answers, Questions
+from .serializers import ImportQuestionSerializer
+from .signals import questions_imported
+
+
+def validate_questions(rows):
+    """
+    Проверяет строки импорта, возвращает проверенные данные
+    и ошибки с номером строки (для CSV - номер строки файла)
+    """
+    valid, errors = [], []
+    for number, row in enumerate(rows, 1):
+        serializer = ImportQuestionSerializer(data=row)
+        if serializer.is_valid():
+            valid.append(serializer.validated_data)
+        else:
+            errors.append({'row': row.get('line', number),
+                           'errors': serializer.errors})
+    return valid, errors
+
+
+def import_questions(quiz_id, author_id, rows, batch_size):
+    """
+    Создаёт вопросы и ответы пачками в одной транзакции.
+    bulk_create не отправляет post_save, поэтому после коммита
+    отправляется сигнал questions_imported
+    """
+    with transaction.atomic():
+        questions = Questions.objects.bulk_create(
+            [Questions(quiz_id=quiz_id, author_id=author_id,
+                       **{field: value for field, value in row.items()
+                          if field != 'answers'})
+             for row in rows],
+            batch_size=batch_size,
+        )
+        answers = Answers.objects.bulk_create(
+            [Answers(question=question, author_id=author_id, **answer)
+             for question, row in zip(questions, rows)
+             for answer in row.get('answers', ())],
+            batch_size=batch_size,
+        )
+        transaction.on_commit(lambda: questions_imported.send(
+            sender=Questions, quiz_id=quiz_id,
+            questions=questions, answers=answers))
+    return questions, answers
@@ -0,0 +1,312 @@
+import contextlib
+import contextvars
+import cProfile
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from .backends import connection_stats
+from .cache import payload_cache
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+INSTRUMENTATION_DEFAULTS = {
+    'ENABLED': False,
+    # доля запросов, которые профилируются (0 - профилирование выключено);
+    # дамп сохраняется, только если запрос медленнее порога
+    'PROFILE_SAMPLE_RATE': 0.0,
+    'PROFILE_THRESHOLD_MS': 500,
+    # cprofile или pyinstrument (если установлен)
+    'PROFILER': 'cprofile',
+    'PROFILE_DIR': 'profiles',
+    # если задан, metrics/ требует заголовок Authorization: Bearer <токен>
+    'METRICS_TOKEN': '',
+}
+
+# границы корзин гистограммы времени запроса, секунды
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+def get_options():
+    return {**INSTRUMENTATION_DEFAULTS,
+            **getattr(settings, 'INSTRUMENTATION', {})}
+
+
+class RequestTimings:
+    """Времена одного запроса, накапливаются через timed()"""
+
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.serializer = 0.0
+        self.render = 0.0
+        self.active = set()
+        # алиасы баз, к которым были запросы
+        self.aliases = set()
+
+
+@contextlib.contextmanager
+def timed(kind):
+    """
+    Добавляет время блока к полю kind (serializer, render) текущего
+    запроса. Вне ProfilingMiddleware и во вложенных блоках того же
+    вида ничего не измеряет
+    """
+    timings = _current.get()
+    if timings is None or kind in timings.active:
+        yield
+        return
+    timings.active.add(kind)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, kind,
+                getattr(timings, kind) + time.perf_counter() - start)
+        timings.active.discard(kind)
+
+
+class TimedSerializerMixin:
+    """Время to_representation сериализатора попадает в метрики запроса"""
+
+    def to_representation(self, instance):
+        # вызывается для каждого вложенного объекта, без middleware
+        # обходится без контекстного менеджера
+        if _current.get() is None:
+            return super().to_representation(instance)
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+
+class MetricsRegistry:
+    """
+    Накопленные метрики по представлениям (view, метод) в памяти
+    процесса, отдаются в текстовом формате Prometheus
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(self._empty)
+
+    @staticmethod
+    def _empty():
+        return {'count': 0, 'errors': 0, 'wall': 0.0, 'db': 0.0,
+                'queries': 0, 'serializer': 0.0, 'render': 0.0,
+                'buckets': [0] * len(BUCKETS)}
+
+    def record(self, view, method, status, wall, timings):
+        with self._lock:
+            stats = self._views[(view, method)]
+            stats['count'] += 1
+            stats['errors'] += status >= 500
+            stats['wall'] += wall
+            stats['db'] += timings.db
+            stats['queries'] += timings.queries
+            stats['serializer'] += timings.serializer
+            stats['render'] += timings.render
+            for index, edge in enumerate(BUCKETS):
+                if wall <= edge:
+                    stats['buckets'][index] += 1
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        with self._lock:
+            views = {key: {**stats, 'buckets': list(stats['buckets'])}
+                     for key, stats in sorted(self._views.items())}
+        lines = [
+            '# HELP quiz_request_duration_seconds Время обработки запроса',
+            '# TYPE quiz_request_duration_seconds histogram',
+        ]
+        for (view, method), stats in views.items():
+            labels = f'view="{view}",method="{method}"'
+            for edge, count in zip(BUCKETS, stats['buckets']):
+                lines.append(f'quiz_request_duration_seconds_bucket'
+                             f'{{{labels},le="{edge}"}} {count}')
+            lines += [
+                f'quiz_request_duration_seconds_bucket{{{labels},le="+Inf"}} '
+                f'{stats["count"]}',
+                f'quiz_request_duration_seconds_sum{{{labels}}} '
+                f'{stats["wall"]:.6f}',
+                f'quiz_request_duration_seconds_count{{{labels}}} '
+                f'{stats["count"]}',
+            ]
+        counters = (
+            ('quiz_request_errors_total', 'errors', 'Ответы 5xx', '{}'),
+            ('quiz_request_db_seconds_total', 'db',
+             'Время запросов к базе', '{:.6f}'),
+            ('quiz_request_queries_total', 'queries',
+             'Число запросов к базе', '{}'),
+            ('quiz_request_serializer_seconds_total', 'serializer',
+             'Время сериализации', '{:.6f}'),
+            ('quiz_request_render_seconds_total', 'render',
+             'Время рендеринга ответа', '{:.6f}'),
+        )
+        for name, field, help_text, template in counters:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (view, method), stats in views.items():
+                lines.append(f'{name}{{view="{view}",method="{method}"}} '
+                             + template.format(stats[field]))
+
+        lines += ['# HELP quiz_payload_cache_requests_total '
+                  'Обращения к кэшу ответов',
+                  '# TYPE quiz_payload_cache_requests_total counter']
+        for key, count in sorted(payload_cache.stats().items()):
+            kind, _, result = key.rpartition('_')
+            lines.append(f'quiz_payload_cache_requests_total'
+                         f'{{kind="{kind}",result="{result}"}} {count}')
+
+        databases = connection_stats.stats()
+        lines += ['# HELP quiz_db_connections_total Запросы к API '
+                  'по соединению с базой: новое или переиспользованное',
+                  '# TYPE quiz_db_connections_total counter']
+        for alias, stats in databases.items():
+            for result in ('new', 'reused'):
+                lines.append(f'quiz_db_connections_total'
+                             f'{{alias="{alias}",result="{result}"}} '
+                             f'{stats[result]}')
+        summaries = (
+            ('quiz_db_connect_seconds', 'connect',
+             'Время открытия соединения с базой', 'connects'),
+            ('quiz_db_health_check_seconds', 'health_check',
+             'Время проверки соединения (CONN_HEALTH_CHECKS)',
+             'health_checks'),
+        )
+        for name, field, help_text, count in summaries:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} summary']
+            for alias, stats in databases.items():
+                lines += [
+                    f'{name}_sum{{alias="{alias}"}} '
+                    f'{stats[field + "_seconds"]:.6f}',
+                    f'{name}_count{{alias="{alias}"}} {stats[count]}',
+                ]
+        lines += ['# HELP quiz_db_health_check_failures_total Соединения, '
+                  'закрытые после неудачной проверки',
+                  '# TYPE quiz_db_health_check_failures_total counter']
+        for alias, stats in databases.items():
+            lines.append(f'quiz_db_health_check_failures_total'
+                         f'{{alias="{alias}"}} '
+                         f'{stats["health_check_failures"]}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+class ProfilingMiddleware:
+    """
+    Включается INSTRUMENTATION['ENABLED']. Для каждого запроса
+    записывает общее время, время и число запросов к базе, время
+    сериализации и рендеринга в metrics (отдаются на metrics/),
+    а также новое или переиспользованное соединение с базой.
+    Часть запросов (PROFILE_SAMPLE_RATE) профилируется, профиль
+    сохраняется в PROFILE_DIR, если запрос медленнее порога.
+    Запросы к базе при потоковой отдаче (export/) не учитываются
+    """
+
+    def __init__(self, get_response):
+        self.options = get_options()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timings.db += time.perf_counter() - start
+                timings.queries += 1
+                timings.aliases.add(context['connection'].alias)
+
+        # соединения, открытые до запроса (CONN_MAX_AGE)
+        opened = {connection.alias: connection.connection
+                  for connection in connections.all()}
+        profiler = self.start_profiler()
+        start = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            wall = time.perf_counter() - start
+            _current.reset(token)
+        if profiler is not None:
+            self.stop_profiler(profiler, request, wall)
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.record(view, request.method, response.status_code,
+                       wall, timings)
+        for alias in timings.aliases:
+            # то же соединение, а не новое после закрытия проверкой
+            current = connections[alias].connection
+            connection_stats.record_use(
+                alias, current is not None and current is opened.get(alias))
+        return response
+
+    def start_profiler(self):
+        rate = self.options['PROFILE_SAMPLE_RATE']
+        if not rate or random.random() >= rate:
+            return None
+        if self.options['PROFILER'] == 'pyinstrument' and pyinstrument:
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def stop_profiler(self, profiler, request, wall):
+        is_pyinstrument = not isinstance(profiler, cProfile.Profile)
+        if is_pyinstrument:
+            profiler.stop()
+        else:
+            profiler.disable()
+        wall_ms = wall * 1000
+        if wall_ms < self.options['PROFILE_THRESHOLD_MS']:
+            return
+        directory = self.options['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        match = request.resolver_match
+        name = (match.url_name if match else None) or 'unresolved'
+        path = os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}-'
+                                       f'{request.method}-{name}-'
+                                       f'{wall_ms:.0f}ms')
+        if is_pyinstrument:
+            with open(f'{path}.html', 'w', encoding='utf-8') as file:
+                file.write(profiler.output_html())
+        else:
+            profiler.dump_stats(f'{path}.prof')
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus"""
+    options = get_options()
+    if not options['ENABLED']:
+        raise Http404
+    token = options['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(),
+                        content_type='text/plain; version=0.0.4')
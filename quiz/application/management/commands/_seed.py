@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+
+from application.models import Answers, Categories, Questions, Quizzes
+
+User = get_user_model()
+
+
+def seed_quiz(questions, answers=0, username='bench', batch_size=2000,
+              using='default'):
+    """
+    Создаёт пользователя, категорию и квиз с заданным числом
+    вопросов (и ответов на каждый вопрос) для бенчмарков
+    в базе using
+    """
+    author, _ = User.objects.using(using).get_or_create(username=username)
+    category = Categories.objects.using(using).create(
+        name=f'{username}-category')
+    quiz = Quizzes.objects.using(using).create(
+        title=f'{username}-quiz', category=category, author=author)
+    Questions.objects.using(using).bulk_create(
+        (Questions(quiz=quiz, author=author,
+                   title=f'Question {i}',
+                   kind=i % 2, difficulty=i % 5,
+                   is_active=bool(i % 10))
+         for i in range(questions)),
+        batch_size=batch_size,
+    )
+    if answers:
+        question_ids = Questions.objects.using(using).filter(
+            quiz=quiz).values_list('id', flat=True)
+        Answers.objects.using(using).bulk_create(
+            (Answers(question_id=question_id, author=author,
+                     text=f'Answer {j} to question {question_id}',
+                     is_right=j == 0)
+             for question_id in question_ids.iterator()
+             for j in range(answers)),
+            batch_size=batch_size,
+        )
+    return quiz
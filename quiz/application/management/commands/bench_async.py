@@ -0,0 +1,84 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+
+from ._seed import seed_quiz
+
+
+class Command(BaseCommand):
+    help = ('Пропускная способность при параллельных запросах на чтение '
+            '(список и детальный квиз, список и случайный вопрос): '
+            'синхронные представления через WSGI (пул потоков), через '
+            'ASGI и асинхронные представления async/ через ASGI. '
+            'Данные создаются в базе и удаляются после замера. '
+            'Для запущенных серверов используйте loadtest --url')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, questions, requests, concurrency, **options):
+        quiz = seed_quiz(questions, answers=4, username='bench-async')
+        paths = [path.format(quiz=quiz.pk) for path in (
+            '/quizzes/', '/quiz/{quiz}/', '/questions/?quiz={quiz}',
+            '/random/{quiz}/')]
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                self.report('WSGI, синхронные',
+                            self.run_wsgi(paths, requests, concurrency))
+                self.report('ASGI, синхронные', asyncio.run(
+                    self.run_asgi(paths, requests, concurrency)))
+                self.report('ASGI, async/', asyncio.run(self.run_asgi(
+                    [f'/async{path}' for path in paths],
+                    requests, concurrency)))
+        finally:
+            quiz.author.delete()
+            quiz.category.delete()
+
+    def report(self, name, result):
+        elapsed, latencies = result
+        latencies.sort()
+        self.stdout.write(
+            f'{name}: {len(latencies) / elapsed:.0f} запросов/с, '
+            f'p50 {statistics.median(latencies) * 1000:.1f} ms, '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms')
+
+    def run_wsgi(self, paths, requests, concurrency):
+        local = threading.local()
+
+        def get(index):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+            start = time.perf_counter()
+            response = client.get(paths[index % len(paths)])
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            start = time.perf_counter()
+            latencies = list(executor.map(get, range(requests)))
+            elapsed = time.perf_counter() - start
+        return elapsed, latencies
+
+    async def run_asgi(self, paths, requests, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get(index):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(paths[index % len(paths)])
+                assert response.status_code == 200, response.content
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(get(index)
+                                           for index in range(requests)))
+        return time.perf_counter() - start, list(latencies)
@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from application.authentication import (StatelessJWTAuthentication,
+                                        token_cache)
+from application.serializers import ClaimsTokenObtainPairSerializer
+
+from ._seed import seed_quiz
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает JWTAuthentication и StatelessJWTAuthentication '
+            '(без кэша и с кэшем токенов) на аутентифицированном GET: '
+            'время аутентификации и число запросов к базе. Данные '
+            'создаются внутри транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, func, requests, repeat):
+        """Лучшее из repeat среднее время вызова, мкс"""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(requests):
+                func()
+            elapsed = (time.perf_counter() - start) / requests
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1e6
+
+    def run(self, requests, repeat, **options):
+        quiz = seed_quiz(1, username='bench-auth')
+        token = ClaimsTokenObtainPairSerializer.get_token(quiz.author)
+        header = f'Bearer {token.access_token}'
+        request = Request(APIRequestFactory().get(
+            f'/quiz/{quiz.pk}/', HTTP_AUTHORIZATION=header))
+
+        variants = (
+            ('JWTAuthentication', JWTAuthentication(), {}),
+            ('Stateless, без кэша', StatelessJWTAuthentication(),
+             {'TOKEN_CACHE_TTL': 0}),
+            ('Stateless + кэш токенов', StatelessJWTAuthentication(),
+             {'TOKEN_CACHE_TTL': 60}),
+        )
+        baseline = None
+        for name, authenticator, jwt_auth in variants:
+            token_cache.clear()
+            with override_settings(JWT_AUTH=jwt_auth):
+                with CaptureQueriesContext(connection) as queries:
+                    authenticator.authenticate(request)
+                micros = self.measure(
+                    lambda: authenticator.authenticate(request),
+                    requests, repeat)
+            baseline = baseline or micros
+            self.stdout.write(f'{name}: {micros:.1f} мкс на запрос, '
+                              f'{len(queries)} запросов к базе, '
+                              f'x{baseline / micros:.1f}')
+
+        # доля аутентификации во времени всего запроса
+        client = APIClient(HTTP_HOST='localhost', HTTP_AUTHORIZATION=header)
+        token_cache.clear()
+        micros = self.measure(lambda: client.get(f'/quiz/{quiz.pk}/'),
+                              max(requests // 10, 1), repeat)
+        self.stdout.write(f'GET /quiz/{quiz.pk}/ с текущими настройками: '
+                          f'{micros:.1f} мкс')
@@ -0,0 +1,87 @@
+import gzip
+import io
+import time
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from application.models import Questions
+from application.parsers import MessagePackParser
+from application.renderers import (FastJSONRenderer, MessagePackRenderer,
+                                   msgpack)
+from application.representations import question_rows, represent_questions
+
+from ._seed import seed_quiz
+
+
+class Rollback(Exception):
+    pass
+
+
+class RowMessagePackRenderer(MessagePackRenderer):
+    columnar_fields = ()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает размер и время кодирования страниц вопросов в JSON '
+            'и MessagePack (с ответами по строкам и по столбцам). '
+            'Данные создаются внутри транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=1000)
+        parser.add_argument('--answers', type=int, default=4)
+        parser.add_argument('--page-sizes', type=int, nargs='+',
+                            default=[30, 1000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if msgpack is None:
+            raise CommandError('msgpack не установлен')
+        try:
+            with transaction.atomic():
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best * 1000
+
+    def run(self, questions, answers, page_sizes, repeat, **options):
+        quiz = seed_quiz(questions, answers=answers)
+        rows = list(question_rows(Questions.objects.filter(quiz=quiz)))
+        renderers = [
+            ('json', FastJSONRenderer()),
+            ('msgpack', RowMessagePackRenderer()),
+            ('msgpack columnar', MessagePackRenderer()),
+        ]
+
+        for size in page_sizes:
+            # та же структура, что у ответа StandardPagination
+            page = OrderedDict([
+                ('count', len(rows)),
+                ('count_exact', True),
+                ('next', 'http://localhost/questions/?page=2'),
+                ('previous', None),
+                ('results', represent_questions(rows[:size])),
+            ])
+            self.stdout.write(f'{size} вопросов, {answers} ответа на вопрос:')
+            for name, renderer in renderers:
+                raw, encode_ms = self.measure(
+                    lambda: renderer.render(page), repeat)
+                self.stdout.write(
+                    f'  {name:<17} {len(raw):>8} Б, gzip '
+                    f'{len(gzip.compress(raw)):>7} Б, кодирование '
+                    f'{encode_ms:.2f} ms')
+
+            decoded = MessagePackParser().parse(io.BytesIO(raw))
+            if decoded != page:
+                raise CommandError('MessagePack после разбора не совпадает '
+                                   'с исходными данными')
@@ -0,0 +1,119 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from application.models import Categories, Questions, Quizzes
+
+from ._seed import seed_quiz
+
+TRIGRAM_INDEX = 'category_name_trgm_idx'
+# индекс внешнего ключа quiz_id, который Django создаёт по умолчанию
+# (удалён миграцией 0008), - исходная схема для замера без индексов
+BASELINE_INDEX = 'bench_question_quiz_id_idx'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Показывает планы запросов фильтров и проверок с индексами '
+            'и без них. Данные создаются внутри транзакции, индексы '
+            'удаляются в ней же, всё откатывается после замера. '
+            'DROP INDEX держит блокировку таблиц (в PostgreSQL - ACCESS '
+            'EXCLUSIVE) до конца замера, поэтому команда выполняется '
+            'на отдельной базе: --database scratch (DB_SCRATCH_NAME, '
+            'миграции - migrate --database scratch). На основной базе '
+            'только с --force')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='алиас базы для замера')
+        parser.add_argument('--force', action='store_true',
+                            help='разрешить замер на основной базе')
+        parser.add_argument('--questions', type=int, default=20000)
+        parser.add_argument('--quizzes', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, database, force, **options):
+        if database == DEFAULT_DB_ALIAS and not force:
+            raise CommandError(
+                'Замер удаляет индексы и блокирует таблицы до конца '
+                'транзакции. Укажите отдельную базу (--database) '
+                'или --force')
+        if database not in connections:
+            raise CommandError(f'Нет базы {database} в DATABASES')
+        self.using = database
+        self.connection = connections[database]
+        try:
+            with transaction.atomic(using=database):
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def get_queries(self, quiz):
+        return {
+            'random question ids': Questions.objects.using(
+                self.using).filter(quiz=quiz.id, is_active=True
+                                   ).values_list('id', flat=True),
+            'quiz exists': Quizzes.objects.using(self.using).filter(
+                title=quiz.title, category=quiz.category_id,
+                author=quiz.author_id).values('id')[:1],
+            'category istartswith': Categories.objects.using(
+                self.using).filter(name__istartswith='categ'),
+            'category icontains': Categories.objects.using(
+                self.using).filter(name__icontains='ory 12'),
+        }
+
+    def report(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        prefix = self.connection.ops.explain_query_prefix()
+        with self.connection.cursor() as cursor:
+            for name, queryset in queries.items():
+                sql, params = queryset.query.sql_with_params()
+                # комментарий делает текст запроса уникальным, иначе
+                # SQLite берёт подготовленный до удаления индексов план
+                sql = f'/* {title} */ {sql}'
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                elapsed = (time.perf_counter() - start) / repeat * 1000
+                self.stdout.write(f'{name}: {elapsed:.3f} ms')
+                cursor.execute(f'{prefix} {sql}', params)
+                for row in cursor.fetchall():
+                    self.stdout.write(f'    {row[-1]}')
+
+    def drop_indexes(self):
+        editor = self.connection.schema_editor()
+        with self.connection.cursor() as cursor:
+            for model in (Categories, Quizzes, Questions):
+                for index in model._meta.indexes:
+                    cursor.execute(str(index.remove_sql(model, editor)))
+            if self.connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+            quote_name = self.connection.ops.quote_name
+            cursor.execute(
+                f'CREATE INDEX {BASELINE_INDEX} ON '
+                f'{quote_name(Questions._meta.db_table)} '
+                f'({quote_name(Questions._meta.get_field("quiz").column)})')
+
+    def run(self, questions, quizzes, categories, repeat, **options):
+        # вопросы распределяются по нескольким квизам,
+        # планы строятся для последнего из них
+        for i in range(quizzes):
+            quiz = seed_quiz(questions // quizzes, username=f'bench-{i}',
+                             using=self.using)
+        Categories.objects.using(self.using).bulk_create(
+            Categories(name=f'Category {i}') for i in range(categories))
+        with self.connection.cursor() as cursor:
+            # актуальная статистика для планировщика
+            cursor.execute('ANALYZE')
+        queries = self.get_queries(quiz)
+        self.report('С индексами', queries, repeat)
+        self.drop_indexes()
+        self.report('Без индексов (только внешний ключ quiz_id)', queries,
+                    repeat)
@@ -0,0 +1,167 @@
+import asyncio
+import contextlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import base_user, get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils.module_loading import import_string
+
+from application.hashers import get_options
+
+User = get_user_model()
+
+PASSWORD = 'Bench-pass-42'
+
+
+class Command(BaseCommand):
+    help = ('Пропускная способность входа: стоимость хешей PASSWORD_HASHERS '
+            'в одном и нескольких потоках и вход через ASGI с выносом '
+            'хеширования в пул потоков и без него. Пользователи '
+            'создаются в базе и удаляются после замера')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=40)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, logins, concurrency, repeat, **options):
+        self.stdout.write(f'Алгоритм по умолчанию: '
+                          f'{get_options()["ALGORITHM"]}')
+        for hasher in settings.PASSWORD_HASHERS:
+            self.bench_hasher(hasher, logins, concurrency, repeat)
+        self.bench_asgi(logins, concurrency)
+
+    def bench_hasher(self, hasher, logins, concurrency, repeat):
+        name = hasher.rpartition('.')[2]
+        encoded = make_password(PASSWORD,
+                                hasher=import_string(hasher).algorithm)
+        if not check_password(PASSWORD, encoded):
+            self.stdout.write(f'{name}: недоступен')
+            return
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            check_password(PASSWORD, encoded)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            start = time.perf_counter()
+            list(executor.map(lambda _: check_password(PASSWORD, encoded),
+                              range(logins)))
+            elapsed = time.perf_counter() - start
+        self.stdout.write(f'{name}: проверка {best * 1000:.1f} ms, '
+                          f'{1 / best:.0f}/с в одном потоке, '
+                          f'{logins / elapsed:.0f}/с в {concurrency} '
+                          f'потоках')
+
+    def bench_asgi(self, logins, concurrency):
+        users = [f'bench-login-{i}' for i in range(concurrency)]
+        User.objects.bulk_create(
+            User(username=username, password=make_password(PASSWORD))
+            for username in users)
+        try:
+            for offload in (False, True):
+                with override_settings(
+                        ALLOWED_HOSTS=['testserver'],
+                        PASSWORD_HASHING={**get_options(),
+                                          'OFFLOAD': offload}), \
+                        count_hashes() as hashes:
+                    rate, latency = asyncio.run(
+                        self.run_logins(users, logins))
+                self.stdout.write(
+                    f'ASGI, хеширование '
+                    f'{"в пуле потоков" if offload else "в потоке запроса"}:'
+                    f' {rate:.0f} входов/с, одновременно до '
+                    f'{hashes["peak"]} хешей, GET /categories/ во время '
+                    f'входов {latency * 1000:.1f} ms')
+        finally:
+            User.objects.filter(username__in=users).delete()
+
+    async def run_logins(self, users, logins):
+        """
+        logins входов параллельно по len(users) одновременно и один
+        лёгкий запрос на чтение, пока входы выполняются. Запросы
+        проходят через ASGIHandler, как под uvicorn: у каждого запроса
+        свой ThreadSensitiveContext (в отличие от AsyncClient)
+        """
+        handler = ASGIHandler()
+        semaphore = asyncio.Semaphore(len(users))
+
+        async def login(index):
+            async with semaphore:
+                status, body = await asgi_request(
+                    handler, 'POST', '/login/', json.dumps({
+                        'username': users[index % len(users)],
+                        'password': PASSWORD}).encode())
+                assert status == 200, body
+
+        async def read():
+            await asyncio.sleep(0.01)
+            start = time.perf_counter()
+            await asgi_request(handler, 'GET', '/categories/')
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        *_, latency = await asyncio.gather(
+            *(login(index) for index in range(logins)), read())
+        return logins / (time.perf_counter() - start), latency
+
+
+async def asgi_request(handler, method, path, body=b''):
+    """Один HTTP-запрос к ASGI-приложению, возвращает (статус, тело)"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path,
+        'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver'),
+                    (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # клиент не отключается, пока ответ не получен
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+
+    await handler(scope, receive, send)
+    return response['status'], b''.join(response['body'])
+
+
+@contextlib.contextmanager
+def count_hashes():
+    """Наибольшее число одновременных проверок пароля при входе"""
+    lock = threading.Lock()
+    hashes = {'current': 0, 'peak': 0}
+
+    def counted(*args, **kwargs):
+        with lock:
+            hashes['current'] += 1
+            hashes['peak'] = max(hashes['peak'], hashes['current'])
+        try:
+            return check_password(*args, **kwargs)
+        finally:
+            with lock:
+                hashes['current'] -= 1
+
+    # AbstractBaseUser.check_password вызывает функцию этого модуля
+    with mock.patch.object(base_user, 'check_password', counted):
+        yield hashes
@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from application.models import Questions
+from application.sampling import QuestionSampler
+
+from ._seed import seed_quiz
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает выбор случайного вопроса через ORDER BY RANDOM() '
+            'и через индекс QuestionSampler. Данные создаются внутри '
+            'транзакции и откатываются после замера')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), max(timings)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['questions'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, questions, repeat):
+        quiz = seed_quiz(questions)
+        queryset = Questions.objects.filter(is_active=True, quiz=quiz.id)
+
+        def order_by_random():
+            list(queryset.order_by('?')[:1])
+
+        sampler = QuestionSampler()
+        start = time.perf_counter()
+        sampler.load(quiz.id)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        def sampled():
+            list(queryset.filter(pk=sampler.pick(quiz.id)))
+
+        self.stdout.write(f'questions: {questions}, repeat: {repeat}')
+        self.stdout.write(f'index load: {load_ms:.2f} ms (один раз на квиз)')
+        for name, func in (('order_by_random', order_by_random),
+                           ('sampler', sampled)):
+            median, worst = self.measure(func, repeat)
+            self.stdout.write(f'{name:>16}: median {median:.3f} ms, '
+                              f'max {worst:.3f} ms')
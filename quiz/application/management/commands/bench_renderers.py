@@ -0,0 +1,84 @@
+import io
+import time
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from application.models import Questions
+from application.parsers import FastJSONParser
+from application.renderers import FastJSONRenderer, orjson
+from application.representations import question_rows, represent_questions
+
+from ._seed import seed_quiz
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает JSONRenderer/JSONParser и FastJSONRenderer/'
+            'FastJSONParser на страницах вопросов, проверяет побайтовое '
+            'совпадение. Данные создаются внутри транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=1000)
+        parser.add_argument('--answers', type=int, default=4)
+        parser.add_argument('--page-sizes', type=int, nargs='+',
+                            default=[30, 1000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write('orjson не установлен, FastJSONRenderer '
+                              'использует стандартный json')
+        try:
+            with transaction.atomic():
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best * 1000
+
+    def run(self, questions, answers, page_sizes, repeat, **options):
+        quiz = seed_quiz(questions, answers=answers)
+        rows = list(question_rows(Questions.objects.filter(quiz=quiz)))
+        renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        parser, fast_parser = JSONParser(), FastJSONParser()
+
+        for size in page_sizes:
+            # та же структура, что у ответа StandardPagination
+            page = OrderedDict([
+                ('count', len(rows)),
+                ('count_exact', True),
+                ('next', 'http://localhost/api/quiz/1/questions/?page=2'),
+                ('previous', None),
+                ('results', represent_questions(rows[:size])),
+            ])
+            raw, json_ms = self.measure(lambda: renderer.render(page), repeat)
+            fast_raw, fast_ms = self.measure(
+                lambda: fast_renderer.render(page), repeat)
+            if raw != fast_raw:
+                raise CommandError('JSON FastJSONRenderer отличается '
+                                   'от JSONRenderer')
+            _, parse_ms = self.measure(
+                lambda: parser.parse(io.BytesIO(raw)), repeat)
+            _, fast_parse_ms = self.measure(
+                lambda: fast_parser.parse(io.BytesIO(raw)), repeat)
+
+            self.stdout.write(
+                f'{size} вопросов ({len(raw) // 1024} КБ): рендеринг '
+                f'{json_ms:.2f} -> {fast_ms:.2f} ms, разбор '
+                f'{parse_ms:.2f} -> {fast_parse_ms:.2f} ms')
+
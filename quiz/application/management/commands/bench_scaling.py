@@ -0,0 +1,122 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ._seed import seed_quiz
+from .loadtest import HTTPTarget
+
+
+class Command(BaseCommand):
+    help = ('Смоук-бенчмарк масштабирования: запускает gunicorn '
+            '(gunicorn.conf.py) с разным числом воркеров и замеряет '
+            'пропускную способность на смеси запросов на чтение. '
+            'Данные создаются в базе и удаляются после замера')
+
+    def add_arguments(self, parser):
+        cores = len(os.sched_getaffinity(0))
+        parser.add_argument('--workers', type=int, nargs='+',
+                            default=sorted({1, max(1, cores // 2), cores}))
+        parser.add_argument('--app', default='quiz.asgi:application')
+        parser.add_argument('--worker-class',
+                            help='по умолчанию из gunicorn.conf.py')
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--questions', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        quiz = seed_quiz(options['questions'], answers=4,
+                         username='bench-scaling')
+        paths = [path.format(quiz=quiz.pk) for path in (
+            '/quizzes/', '/quiz/{quiz}/', '/questions/?quiz={quiz}',
+            '/random/{quiz}/', '/async/random/{quiz}/')]
+        self.stdout.write(f'Доступно ядер: {len(os.sched_getaffinity(0))}')
+        baseline = None
+        try:
+            for count in options['workers']:
+                rate, errors = self.run(count, paths, **options)
+                baseline = baseline or rate
+                self.stdout.write(
+                    f'{count} воркеров: {rate:.0f} запросов/с, '
+                    f'x{rate / baseline:.2f}, ошибок {errors}')
+        finally:
+            quiz.author.delete()
+            quiz.category.delete()
+
+    def start_server(self, count, app, worker_class, **options):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        env = {
+            **os.environ,
+            'GUNICORN_BIND': f'127.0.0.1:{port}',
+            'GUNICORN_WORKERS': str(count),
+            'GUNICORN_ACCESSLOG': '',
+            'ALLOWED_HOSTS': ','.join([*settings.ALLOWED_HOSTS,
+                                       '127.0.0.1']),
+        }
+        if worker_class:
+            env['GUNICORN_WORKER_CLASS'] = worker_class
+        # лог в файл, а не в канал: заполненный канал остановил бы сервер
+        log = tempfile.TemporaryFile()
+        try:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                 app], cwd=settings.BASE_DIR, env=env,
+                stdout=subprocess.DEVNULL, stderr=log)
+        except OSError as exc:
+            raise CommandError(f'Не удалось запустить gunicorn: {exc}')
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                log.seek(0)
+                raise CommandError('gunicorn завершился: ' +
+                                   log.read().decode()[-2000:])
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+                return process, f'http://127.0.0.1:{port}'
+            except OSError:
+                time.sleep(0.2)
+        process.kill()
+        raise CommandError('gunicorn не запустился за 30 секунд')
+
+    def run(self, count, paths, concurrency, duration, **options):
+        process, url = self.start_server(count, **options)
+        try:
+            target = HTTPTarget(url)
+            # прогрев: импорт модулей и индексы в памяти каждого воркера
+            for path in paths * count:
+                target.request('GET', path, None, None)
+
+            counter = iter(range(sys.maxsize))
+            lock = threading.Lock()
+            done, errors = 0, 0
+            deadline = time.monotonic() + duration
+
+            def worker():
+                nonlocal done, errors
+                while time.monotonic() < deadline:
+                    with lock:
+                        path = paths[next(counter) % len(paths)]
+                    status, _ = target.request('GET', path, None, None)
+                    with lock:
+                        done += 1
+                        errors += status >= 400
+
+            start = time.monotonic()
+            with ThreadPoolExecutor(concurrency) as executor:
+                for future in [executor.submit(worker)
+                               for _ in range(concurrency)]:
+                    future.result()
+            return done / (time.monotonic() - start), errors
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
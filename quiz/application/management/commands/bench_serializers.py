@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from application.models import Questions
+from application.representations import question_rows, represent_questions
+from application.serializers import QuestionSerializer
+
+from ._seed import seed_quiz
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает чтение вопросов через QuestionSerializer и быстрый '
+            'путь represent_questions, проверяет побайтовое совпадение JSON. '
+            'Данные создаются внутри транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=10000)
+        parser.add_argument('--answers', type=int, default=4)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best * 1000
+
+    def run(self, questions, answers, repeat, **options):
+        quiz = seed_quiz(questions, answers=answers)
+        queryset = Questions.objects.filter(quiz=quiz).prefetch_related(
+            'answers').select_related('quiz', 'author')
+        renderer = JSONRenderer()
+
+        instances = list(queryset)
+        rows = list(question_rows(queryset))
+        serializer_data, serializer_ms = self.measure(
+            lambda: QuestionSerializer(instances, many=True).data, repeat)
+        fast_data, fast_ms = self.measure(
+            lambda: represent_questions(rows), repeat)
+        if renderer.render(serializer_data) != renderer.render(fast_data):
+            raise CommandError('JSON быстрого пути отличается от '
+                               'QuestionSerializer')
+
+        _, serializer_total_ms = self.measure(lambda: renderer.render(
+            QuestionSerializer(queryset.all(), many=True).data), repeat)
+        _, fast_total_ms = self.measure(lambda: renderer.render(
+            represent_questions(question_rows(queryset))), repeat)
+
+        self.stdout.write(f'{questions} вопросов, {answers} ответа на вопрос, '
+                          'JSON совпадает побайтово')
+        self.stdout.write(f'сериализация: QuestionSerializer '
+                          f'{serializer_ms:.1f} ms, быстрый путь '
+                          f'{fast_ms:.1f} ms')
+        self.stdout.write(f'с запросами и рендерингом: QuestionSerializer '
+                          f'{serializer_total_ms:.1f} ms, быстрый путь '
+                          f'{fast_total_ms:.1f} ms')
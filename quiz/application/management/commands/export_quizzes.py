@@ -0,0 +1,43 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from application.exporters import EXPORT_FORMATS
+from application.filters import QuizFilter
+from application.models import Quizzes
+
+
+class Command(BaseCommand):
+    help = ('Выгружает квизы с вопросами и ответами в JSON Lines или CSV, '
+            'данные читаются из базы пачками')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS),
+                            default='jsonl')
+        parser.add_argument('--output', help='Файл, по умолчанию stdout')
+        parser.add_argument('--quiz', type=int, action='append',
+                            help='id квиза, можно указать несколько раз')
+        parser.add_argument('--category', help='Имя категории')
+        parser.add_argument('--author', help='Имя пользователя автора')
+        parser.add_argument('--chunk-size', type=int,
+                            default=settings.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        filters = {name: options[name] for name in ('category', 'author')
+                   if options[name]}
+        quizzes = QuizFilter(filters, queryset=Quizzes.objects.all()).qs
+        if options['quiz']:
+            quizzes = quizzes.filter(pk__in=options['quiz'])
+        export, _ = EXPORT_FORMATS[options['format']]
+
+        output = sys.stdout
+        if options['output']:
+            output = open(options['output'], 'w', encoding='utf-8',
+                          newline='')
+        try:
+            for chunk in export(quizzes, chunk_size=options['chunk_size']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
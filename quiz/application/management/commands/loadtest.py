@@ -0,0 +1,385 @@
+import bisect
+import http.client
+import itertools
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.urls import Resolver404, resolve
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from application.models import Answers, Categories, Questions, Quizzes
+
+User = get_user_model()
+
+USERNAME = 'loadtest'
+PASSWORD = 'loadtest-password'
+
+# Синтетическая смесь запросов. В path и body подставляются {quiz},
+# {question}, {answer} (случайные id из данных loadtest) и {n}
+# (порядковый номер запроса). Записанный трафик (--replay) задаётся
+# в том же формате, по одному JSON-объекту на строку
+SYNTHETIC_MIX = [
+    {'method': 'GET', 'path': '/random/{quiz}/', 'weight': 35},
+    {'method': 'GET', 'path': '/quizzes/', 'weight': 10},
+    {'method': 'GET', 'path': '/quizzes/?category={category}', 'weight': 5},
+    {'method': 'GET', 'path': '/questions/?quiz={quiz}', 'weight': 15},
+    {'method': 'GET', 'path': '/questions/?quiz={quiz}&is_active=true',
+     'weight': 5},
+    {'method': 'GET', 'path': '/questions/?quiz={quiz}&pagination=cursor',
+     'weight': 5},
+    {'method': 'GET', 'path': '/question/{question}/', 'weight': 10},
+    {'method': 'POST', 'path': '/answer/', 'auth': True, 'weight': 5,
+     'body': {'question': '{question}', 'text': 'Ответ {n}',
+              'is_right': False}},
+    {'method': 'PATCH', 'path': '/answer/{answer}/', 'auth': True,
+     'weight': 5, 'body': {'text': 'Ответ {n}'}},
+    {'method': 'POST', 'path': '/login/', 'weight': 5,
+     'body': {'username': USERNAME, 'password': PASSWORD}},
+]
+
+# границы корзин гистограммы задержек, мс
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class InProcessTarget:
+    """
+    Запросы через django.test.Client в процессе, у каждого потока
+    свой клиент и соединение с базой; считаются запросы к базе
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        self.host = next((host for host in settings.ALLOWED_HOSTS
+                          if host not in ('*', '') and
+                          not host.startswith('.')), 'localhost')
+
+    def request(self, method, path, body, token):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client(HTTP_HOST=self.host)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        data = json.dumps(body) if body is not None else ''
+        with connection.execute_wrapper(count):
+            response = client.generic(method, path, data,
+                                      content_type='application/json',
+                                      **headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, queries
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPTarget:
+    """
+    Запросы к запущенному серверу, у каждого потока своё
+    keep-alive соединение; запросы к базе не считаются
+    """
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise CommandError(f'Неподдерживаемый адрес: {url}')
+        self.scheme, self.netloc = parts.scheme, parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.local = threading.local()
+
+    def connect(self):
+        cls = (http.client.HTTPSConnection if self.scheme == 'https'
+               else http.client.HTTPConnection)
+        self.local.connection = cls(self.netloc, timeout=30)
+        return self.local.connection
+
+    def request(self, method, path, body, token):
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = json.dumps(body).encode() if body is not None else None
+        for attempt in range(2):
+            conn = getattr(self.local, 'connection', None) or self.connect()
+            try:
+                conn.request(method, self.prefix + path, data, headers)
+                response = conn.getresponse()
+                response.read()
+                return response.status, None
+            except (ConnectionError, http.client.HTTPException):
+                # сервер закрыл keep-alive соединение, переподключаемся
+                conn.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+
+    def close(self):
+        pass
+
+
+class RouteStats:
+
+    def __init__(self):
+        self.timings = []
+        self.errors = 0
+        self.queries = 0
+        self.statuses = defaultdict(int)
+
+    def add(self, status, elapsed_ms, queries):
+        self.timings.append(elapsed_ms)
+        self.statuses[status] += 1
+        if status >= 400:
+            self.errors += 1
+        if queries is not None:
+            self.queries += queries
+
+    def histogram(self):
+        counts = [0] * (len(BUCKETS) + 1)
+        for value in self.timings:
+            counts[bisect.bisect_left(BUCKETS, value)] += 1
+        labels = [f'<={edge}' for edge in BUCKETS] + [f'>{BUCKETS[-1]}']
+        return {label: count for label, count in zip(labels, counts)
+                if count}
+
+    def summary(self, elapsed, count_queries):
+        timings = sorted(self.timings)
+        count = len(timings)
+
+        def percentile(percent):
+            return timings[max(0, int(round(percent / 100 * count)) - 1)]
+
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'statuses': dict(self.statuses),
+            'rps': round(count / elapsed, 2),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'p50_ms': round(percentile(50), 3),
+            'p95_ms': round(percentile(95), 3),
+            'p99_ms': round(percentile(99), 3),
+            'max_ms': round(timings[-1], 3),
+            'queries': self.queries if count_queries else None,
+            'queries_per_request': (round(self.queries / count, 2)
+                                    if count_queries else None),
+            'histogram': self.histogram(),
+        }
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный прогон API: синтетическая смесь запросов или '
+            'записанный трафик (--replay), в процессе или по HTTP (--url), '
+            'в несколько потоков. Выводит пропускную способность, '
+            'гистограммы задержек и число запросов к базе по маршрутам. '
+            'Данные пользователя loadtest создаются при первом запуске '
+            'и остаются в базе')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='адрес запущенного сервера, '
+                                          'без него запросы идут в процессе')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--duration', type=float,
+                            help='секунды, вместо --requests')
+        parser.add_argument('--replay', help='JSONL-файл с запросами, '
+                                             'воспроизводятся по порядку')
+        parser.add_argument('--quizzes', type=int, default=20)
+        parser.add_argument('--questions', type=int, default=10000)
+        parser.add_argument('--answers', type=int, default=4)
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument('--json', help='путь для отчёта в JSON')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['random_seed'])
+        self.ids = self.seed(options['quizzes'], options['questions'],
+                             options['answers'])
+        target = (HTTPTarget(options['url']) if options['url']
+                  else InProcessTarget())
+        count_queries = not options['url']
+        plan = self.get_plan(options['replay'])
+        token = self.get_token(target)
+        connections.close_all()
+
+        stats = defaultdict(RouteStats)
+        lock = threading.Lock()
+        counter = itertools.count()
+        deadline = (time.monotonic() + options['duration']
+                    if options['duration'] else None)
+        limit = None if deadline else options['requests']
+
+        def worker():
+            try:
+                while True:
+                    n = next(counter)
+                    if (limit is not None and n >= limit or
+                            deadline is not None and
+                            time.monotonic() >= deadline):
+                        return
+                    with lock:
+                        spec = plan()
+                    method, path, body = self.render(spec, n)
+                    start = time.perf_counter()
+                    status, queries = target.request(
+                        method, path, body,
+                        token if spec.get('auth') else None)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    route = f'{method} {self.route_name(path)}'
+                    with lock:
+                        stats[route].add(status, elapsed_ms, queries)
+            finally:
+                target.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['workers']) as executor:
+            futures = [executor.submit(worker)
+                       for _ in range(options['workers'])]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        report = self.report(stats, elapsed, options, count_queries)
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def seed(self, quizzes, questions, answers):
+        """
+        Создаёт пользователя loadtest с квизами, вопросами и ответами,
+        если их ещё нет, и возвращает id для подстановки в запросы
+        """
+        user, created = User.objects.get_or_create(username=USERNAME)
+        if created or not user.check_password(PASSWORD):
+            user.set_password(PASSWORD)
+            user.save(update_fields=['password'])
+        if not Quizzes.objects.filter(author=user).exists():
+            self.stdout.write(f'создание {quizzes} квизов, {questions} '
+                              f'вопросов, по {answers} ответа на вопрос')
+            with transaction.atomic():
+                category, _ = Categories.objects.get_or_create(
+                    name=USERNAME)
+                quiz_objects = Quizzes.objects.bulk_create(
+                    Quizzes(title=f'{USERNAME} {i}', category=category,
+                            author=user) for i in range(quizzes))
+                question_objects = Questions.objects.bulk_create(
+                    (Questions(quiz=quiz_objects[i % quizzes], author=user,
+                               title=f'Вопрос {i}', kind=i % 2,
+                               difficulty=i % 5, is_active=bool(i % 10))
+                     for i in range(questions)),
+                    batch_size=2000)
+                Answers.objects.bulk_create(
+                    (Answers(question_id=question.pk, author=user,
+                             text=f'Ответ {j}', is_right=j == 0)
+                     for question in question_objects
+                     for j in range(answers)),
+                    batch_size=2000)
+        return {
+            'user': user,
+            'category': list(Categories.objects.filter(
+                name=USERNAME).values_list('id', flat=True)),
+            'quiz': list(Quizzes.objects.filter(
+                author=user).values_list('id', flat=True)),
+            'question': list(Questions.objects.filter(
+                author=user).values_list('id', flat=True)[:10000]),
+            'answer': list(Answers.objects.filter(
+                author=user).values_list('id', flat=True)[:10000]),
+        }
+
+    def get_plan(self, replay):
+        if replay:
+            with open(replay, encoding='utf-8') as file:
+                specs = [json.loads(line) for line in file if line.strip()]
+            if not specs:
+                raise CommandError(f'{replay}: нет запросов')
+            return itertools.cycle(specs).__next__
+        weights = [spec.get('weight', 1) for spec in SYNTHETIC_MIX]
+        return lambda: self.random.choices(SYNTHETIC_MIX, weights)[0]
+
+    def get_token(self, target):
+        # в процессе токен выдаётся напрямую, по HTTP - через /login/
+        if isinstance(target, InProcessTarget):
+            return str(RefreshToken.for_user(self.ids['user']).access_token)
+        conn = target.connect()
+        conn.request('POST', target.prefix + '/login/',
+                     json.dumps({'username': USERNAME,
+                                 'password': PASSWORD}),
+                     {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise CommandError(f'Не удалось войти: {response.status} '
+                               f'{body[:200]!r}')
+        return json.loads(body)['access']
+
+    def render(self, spec, n):
+        values = {key: self.random.choice(ids) if ids else 0
+                  for key, ids in self.ids.items() if key != 'user'}
+        values['n'] = n
+
+        def substitute(value):
+            if isinstance(value, str):
+                return value.format(**values)
+            if isinstance(value, dict):
+                return {key: substitute(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [substitute(item) for item in value]
+            return value
+
+        return (spec.get('method', 'GET').upper(), substitute(spec['path']),
+                substitute(spec.get('body')))
+
+    @staticmethod
+    def route_name(path):
+        try:
+            return resolve(path.split('?')[0]).url_name or path
+        except Resolver404:
+            return path.split('?')[0]
+
+    def report(self, stats, elapsed, options, count_queries):
+        total = sum(len(route.timings) for route in stats.values())
+        errors = sum(route.errors for route in stats.values())
+        routes = {name: route.summary(elapsed, count_queries)
+                  for name, route in sorted(stats.items())}
+        self.stdout.write(
+            f'{total} запросов за {elapsed:.2f} с, {options["workers"]} '
+            f'потоков: {total / elapsed:.1f} запросов/с, ошибок {errors}')
+        self.stdout.write(
+            f'{"маршрут":<28}{"n":>7}{"ошибки":>8}{"rps":>9}{"p50":>9}'
+            f'{"p95":>9}{"p99":>9}{"max":>9}{"запросы":>9}')
+        for name, route in routes.items():
+            per_request = route['queries_per_request']
+            self.stdout.write(
+                f'{name:<28}{route["requests"]:>7}{route["errors"]:>8}'
+                f'{route["rps"]:>9}{route["p50_ms"]:>9.1f}'
+                f'{route["p95_ms"]:>9.1f}{route["p99_ms"]:>9.1f}'
+                f'{route["max_ms"]:>9.1f}'
+                f'{"-" if per_request is None else per_request:>9}')
+        self.stdout.write('гистограммы задержек, мс:')
+        for name, route in routes.items():
+            buckets = ' '.join(f'{bucket}:{count}' for bucket, count
+                               in route['histogram'].items())
+            self.stdout.write(f'  {name}: {buckets}')
+        return {
+            'target': options['url'] or 'in-process',
+            'database': connection.vendor,
+            'workers': options['workers'],
+            'elapsed_s': round(elapsed, 3),
+            'requests': total,
+            'errors': errors,
+            'rps': round(total / elapsed, 2),
+            'routes': routes,
+        }
@@ -0,0 +1,87 @@
+import json
+from collections import defaultdict
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from application.slow_queries import get_options
+
+
+class Command(BaseCommand):
+    help = ('Сводка журнала медленных запросов (SLOW_QUERY_LOG): '
+            'первые N отпечатков SQL по суммарному времени, '
+            'числу вызовов или максимальной длительности')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='по умолчанию '
+                                           'SLOW_QUERY_LOG["PATH"]')
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--sort', choices=['total', 'count', 'max',
+                                               'mean'], default='total')
+        parser.add_argument('--since', type=datetime.fromisoformat,
+                            help='только записи после даты (ISO 8601)')
+        parser.add_argument('--explain', action='store_true',
+                            help='выводить последний план EXPLAIN')
+        parser.add_argument('--json', action='store_true',
+                            help='вывести сводку в JSON')
+        parser.add_argument('--clear', action='store_true',
+                            help='очистить журнал после вывода')
+
+    def handle(self, *args, **options):
+        path = options['path'] or get_options()['PATH']
+        groups = defaultdict(lambda: {'count': 0, 'total_ms': 0.0,
+                                      'max_ms': 0.0, 'views': set()})
+        try:
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    since = options['since']
+                    if since and datetime.fromisoformat(
+                            entry['time']).replace(tzinfo=None) < \
+                            since.replace(tzinfo=None):
+                        continue
+                    group = groups[entry['fingerprint']]
+                    group['count'] += 1
+                    group['total_ms'] += entry['duration_ms']
+                    group['max_ms'] = max(group['max_ms'],
+                                          entry['duration_ms'])
+                    group['views'].add(entry['view'] or '-')
+                    group['normalized'] = entry['normalized']
+                    group['last_seen'] = entry['time']
+                    if entry.get('explain'):
+                        group['explain'] = entry['explain']
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {path} не найден')
+
+        for fingerprint, group in groups.items():
+            group['fingerprint'] = fingerprint
+            group['mean_ms'] = group['total_ms'] / group['count']
+            group['views'] = sorted(group['views'])
+        key = {'total': 'total_ms', 'count': 'count', 'max': 'max_ms',
+               'mean': 'mean_ms'}[options['sort']]
+        top = sorted(groups.values(), key=lambda group: group[key],
+                     reverse=True)[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(top, ensure_ascii=False, indent=2))
+        else:
+            self.write_table(top, options['explain'])
+        if options['clear']:
+            open(path, 'w').close()
+
+    def write_table(self, top, explain):
+        if not top:
+            self.stdout.write('Медленных запросов нет')
+        for number, group in enumerate(top, 1):
+            self.stdout.write(
+                f'{number}. {group["fingerprint"]}: {group["count"]} раз, '
+                f'всего {group["total_ms"]:.1f} ms, среднее '
+                f'{group["mean_ms"]:.1f} ms, максимум '
+                f'{group["max_ms"]:.1f} ms')
+            self.stdout.write(f'   представления: {", ".join(group["views"])}')
+            self.stdout.write(f'   {group["normalized"][:500]}')
+            if explain and group.get('explain'):
+                for row in group['explain']:
+                    self.stdout.write(f'     {row}')
@@ -0,0 +1,55 @@
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+TRIGRAM_INDEX = 'category_name_trgm_idx'
+
+
+def create_trigram_index(apps, schema_editor):
+    # Триграммный индекс есть только в PostgreSQL, lookups icontains и
+    # istartswith там строятся как UPPER(name::text) LIKE UPPER(...)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} '
+        'ON application_categories '
+        'USING gin ((UPPER(name::text)) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0005_alter_answers_options_alter_categories_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='categories',
+            index=models.Index(fields=['name'], name='category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='categories',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='category_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizzes',
+            index=models.Index(fields=['author', 'category', 'title'], name='quiz_author_category_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questions',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['quiz', 'id'], name='question_active_quiz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questions',
+            index=models.Index(fields=['quiz', 'is_active'], name='question_quiz_is_active_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Выражения индексов совпадают с тем, что генерирует
+# SearchVector(field, config='simple'), иначе планировщик их не использует
+INDEXES = {
+    'question_title_search_idx': ('application_questions', 'title'),
+    'answer_text_search_idx': ('application_answers', 'text'),
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, (table, column) in INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin '
+            f"(to_tsvector('simple'::regconfig, COALESCE({column}, '')))"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0006_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
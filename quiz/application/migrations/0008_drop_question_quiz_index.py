@@ -0,0 +1,19 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # индекс внешнего ключа quiz_id дублирует начало составного
+    # индекса question_quiz_is_active_idx (quiz, is_active)
+
+    dependencies = [
+        ('application', '0007_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='questions',
+            name='quiz',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='application.quizzes', verbose_name='Квиз'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # btree по UPPER(name) не используется для LIKE 'x%' при
+    # локали не C, istartswith и icontains покрывает триграммный
+    # индекс category_name_trgm_idx
+
+    dependencies = [
+        ('application', '0008_drop_question_quiz_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='categories',
+            name='category_name_upper_idx',
+        ),
+    ]
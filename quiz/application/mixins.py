@@ -0,0 +1,154 @@
+import hashlib
+import operator
+
+from django.http import Http404
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                quote_etag)
+from rest_framework.response import Response
+
+from .cache import GLOBAL, payload_cache
+from .representations import (question_rows, quiz_rows,
+                              represent_questions, represent_quizzes)
+
+
+def list_cache_key(request):
+    """Ключ страницы списка в кэше ответов: полный URL запроса"""
+    uri = request.build_absolute_uri().encode()
+    return hashlib.md5(uri).hexdigest()
+
+
+def list_cache_quiz_id(request, param='quiz'):
+    """Квиз, к версии которого привязана страница списка"""
+    quiz_id = request.query_params.get(param)
+    return int(quiz_id) if quiz_id and quiz_id.isdigit() else GLOBAL
+
+
+class CachedRetrieveMixin:
+    """
+    Отдаёт объект из кэша сериализованных ответов,
+    при промахе сериализует объект и кладёт результат в кэш
+    """
+    cache_kind = None
+    # атрибут объекта с id квиза, к версии которого привязана запись
+    cache_quiz_field = 'quiz_id'
+
+    def get_cache_quiz_id(self, instance):
+        return operator.attrgetter(self.cache_quiz_field)(instance)
+
+    def retrieve(self, request, *args, **kwargs):
+        key = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        data = payload_cache.get(self.cache_kind, key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        token = payload_cache.begin()
+        data, quiz_id = self.get_retrieve_payload()
+        payload_cache.set(self.cache_kind, key, quiz_id, data, token)
+        return Response(data, headers={'X-Cache': 'MISS'})
+
+    def get_retrieve_payload(self):
+        """Возвращает сериализованный объект и id его квиза"""
+        instance = self.get_object()
+        return (self.get_serializer(instance).data,
+                self.get_cache_quiz_id(instance))
+
+
+class CachedListMixin:
+    """
+    Кэширует страницы списка целиком. Если список отфильтрован
+    по квизу, запись привязывается к версии квиза, иначе к общей версии
+    """
+    cache_kind = None
+    cache_quiz_param = 'quiz'
+
+    def get_cache_key(self, request):
+        return list_cache_key(request)
+
+    def get_cache_quiz_id(self, request):
+        return list_cache_quiz_id(request, self.cache_quiz_param)
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = payload_cache.get(self.cache_kind, key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        token = payload_cache.begin()
+        response = super().list(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        payload_cache.set(self.cache_kind, key,
+                          self.get_cache_quiz_id(request),
+                          response.data, token)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class FastReadMixin:
+    """
+    Быстрое чтение для list/retrieve: строки читаются через .values()
+    и собираются в словари без сериализатора, по умолчанию вопросы
+    (как QuestionSerializer). Запись идёт через сериализатор
+    """
+    # строки queryset и словари ответа из них
+    read_rows = staticmethod(question_rows)
+    represent_rows = staticmethod(represent_questions)
+    # поле строки с id квиза для кэша ответов
+    rows_quiz_field = 'quiz_id'
+
+    def list(self, request, *args, **kwargs):
+        rows = self.read_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.represent_rows(page))
+        return Response(self.represent_rows(rows))
+
+    def get_retrieve_payload(self):
+        # для чтения права на объект не проверяются
+        # (IsAuthorOrReadOnly разрешает безопасные методы всем),
+        # поэтому модель не загружается
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        rows = list(self.read_rows(self.get_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]})))
+        if not rows:
+            raise Http404
+        return self.represent_rows(rows)[0], rows[0][self.rows_quiz_field]
+
+
+class FastQuizReadMixin(FastReadMixin):
+    """Быстрое чтение квизов, совпадает с QuizSerializer"""
+    read_rows = staticmethod(quiz_rows)
+    represent_rows = staticmethod(represent_quizzes)
+    rows_quiz_field = 'id'
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы (ETag, 304) без запросов к базе: ETag
+    строится из версии квиза в кэше ответов (её меняет любая запись)
+    и URL, поэтому 304 отдаётся ещё до чтения кэша и базы
+    """
+
+    def get_etag_quiz_id(self):
+        # у объекта квиз без запроса неизвестен, берётся общая версия
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            return GLOBAL
+        return list_cache_quiz_id(self.request)
+
+    def get_etag(self):
+        parts = (payload_cache.get_version(self.get_etag_quiz_id()),
+                 self.request.get_full_path(),
+                 # у JSON и MessagePack разные ETag
+                 self.request.accepted_media_type)
+        return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_vary_headers(response, ('Accept',))
+        return response
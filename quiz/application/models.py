@@ -14,6 +14,12 @@ class Categories(models.Model):
     class Meta:
         verbose_name = _("Категория")
         verbose_name_plural = _("Категории")
+        indexes = [
+            # проверка уникальности имени при создании
+            models.Index(fields=['name'], name='category_name_idx'),
+            # поиск без учёта регистра (istartswith, icontains) в
+            # PostgreSQL - триграммный индекс по UPPER(name), миграция 0006
+        ]
 
     def __str__(self):
         return self.name
@@ -37,6 +43,11 @@ class Quizzes(models.Model):
         verbose_name = _("Квиз")
         verbose_name_plural = _("Квизы")
         ordering = ['id']
+        indexes = [
+            # проверка повтора квиза автора в категории
+            models.Index(fields=['author', 'category', 'title'],
+                         name='quiz_author_category_title_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -72,9 +83,11 @@ class Questions(Updated):
         (1, _('Single Choice')),
     )
 
-    # 1 вопрос может относиться к 1 квизу
+    # 1 вопрос может относиться к 1 квизу. Отдельный индекс по quiz_id
+    # не нужен: его заменяет question_quiz_is_active_idx (quiz, is_active)
     quiz = models.ForeignKey(Quizzes, related_name='questions',
                              on_delete=models.CASCADE,
+                             db_index=False,
                              verbose_name="Квиз")
     title = models.CharField(max_length=500,
                              verbose_name="Текс")
@@ -94,6 +107,15 @@ class Questions(Updated):
         verbose_name = _("Вопрос")
         verbose_name_plural = _("Вопросы")
         ordering = ['id']
+        indexes = [
+            # частичный индекс по активным вопросам квиза,
+            # id в индексе покрывает выборку id и сортировку
+            models.Index(fields=['quiz', 'id'],
+                         condition=models.Q(is_active=True),
+                         name='question_active_quiz_idx'),
+            models.Index(fields=['quiz', 'is_active'],
+                         name='question_quiz_is_active_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -1,6 +1,303 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import (EmptyPage, InvalidPage, Page,
+                                   PageNotAnInteger, Paginator)
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+COUNT_DEFAULTS = {
+    # exact - всегда COUNT(*), estimate - оценка планировщика (PostgreSQL,
+    # на других базах как cached), cached - точный COUNT(*), сохранённый
+    # в кэше на TTL секунд для каждого сочетания фильтров
+    'STRATEGY': 'estimate',
+    # до этого числа строк количество всегда считается точно
+    'THRESHOLD': 10000,
+    'TTL': 30,
+}
+
+
+class EstimatedPage(Page):
+    """
+    Страница списка с приблизительным количеством: наличие следующей
+    страницы определяется по лишней строке, а не по количеству
+    """
+
+    def __init__(self, object_list, number, paginator):
+        self.has_more = len(object_list) > paginator.per_page
+        super().__init__(object_list[:paginator.per_page], number, paginator)
+
+    def has_next(self):
+        return self.has_more
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    Paginator, который считает точное количество строк только для
+    небольших выборок, а для больших берёт оценку планировщика
+    или закэшированное значение (см. PAGINATION_COUNT в настройках)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.options = {**COUNT_DEFAULTS,
+                        **getattr(settings, 'PAGINATION_COUNT', {})}
+        self.count_exact = True
+
+    def get_sql(self):
+        queryset = self.object_list
+        return queryset.query.get_compiler(queryset.db).as_sql()
+
+    def estimate_count(self):
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = self.get_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def count_key(self):
+        sql, params = self.get_sql()
+        return 'count:' + hashlib.md5(
+            f'{self.object_list.db}:{sql}:{params}'.encode()).hexdigest()
+
+    def cached_count(self):
+        key = self.count_key()
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, self.options['TTL'])
+            return count, True
+        return count, False
+
+    async def acached_count(self):
+        key = self.count_key()
+        count = await cache.aget(key)
+        if count is None:
+            count = await self.object_list.acount()
+            await cache.aset(key, count, self.options['TTL'])
+            return count, True
+        return count, False
+
+    def counts_exactly(self):
+        queryset = self.object_list
+        return (not isinstance(queryset, QuerySet)
+                or self.options['STRATEGY'] == 'exact'
+                or queryset.query.is_sliced)
+
+    @cached_property
+    def count(self):
+        if self.counts_exactly():
+            return super().count
+        queryset = self.object_list
+        threshold = self.options['THRESHOLD']
+        # COUNT(*) по подзапросу с LIMIT читает не больше threshold + 1 строк
+        bounded = queryset.order_by()[:threshold + 1].count()
+        if bounded <= threshold:
+            return bounded
+        if self.options['STRATEGY'] == 'estimate':
+            estimate = self.estimate_count()
+            if estimate is not None:
+                self.count_exact = False
+                return max(estimate, bounded)
+        count, self.count_exact = self.cached_count()
+        return count
+
+    async def acount(self):
+        """
+        count для асинхронных представлений: те же стратегии через
+        async ORM, результат сохраняется в count
+        """
+        if 'count' not in self.__dict__:
+            self.__dict__['count'] = await self._acount()
+        return self.count
+
+    async def _acount(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return len(queryset)
+        if self.counts_exactly():
+            return await queryset.acount()
+        threshold = self.options['THRESHOLD']
+        bounded = await queryset.order_by()[:threshold + 1].acount()
+        if bounded <= threshold:
+            return bounded
+        if self.options['STRATEGY'] == 'estimate':
+            estimate = await sync_to_async(self.estimate_count)()
+            if estimate is not None:
+                self.count_exact = False
+                return max(estimate, bounded)
+        count, self.count_exact = await self.acached_count()
+        return count
+
+    def validate_number(self, number):
+        # count вычисляется первым, он же определяет count_exact
+        if self.count is not None and self.count_exact:
+            return super().validate_number(number)
+        # при приблизительном количестве последняя страница неизвестна,
+        # проверяется только корректность номера
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def get_bounds(self, number):
+        bottom = (number - 1) * self.per_page
+        if not self.count_exact:
+            # лишняя строка показывает, есть ли следующая страница
+            return bottom, bottom + self.per_page + 1
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        return bottom, top
+
+    def make_page(self, object_list, number):
+        if self.count_exact:
+            return self._get_page(object_list, number, self)
+        return EstimatedPage(object_list, number, self)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom, top = self.get_bounds(number)
+        return self.make_page(self.object_list[bottom:top], number)
+
+    async def apage(self, number):
+        """page для асинхронных представлений, строки читаются сразу"""
+        await self.acount()
+        number = self.validate_number(number)
+        bottom, top = self.get_bounds(number)
+        return self.make_page(
+            [row async for row in self.object_list[bottom:top]], number)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Пагинация по курсору: страница выбирается условием id > / < курсора,
+    без COUNT(*) и OFFSET, поэтому скорость не зависит от глубины страницы
+    """
+    page_size = 30
+    ordering = 'id'
+    cursor_query_param = 'cursor'
 
 
 class StandardPagination(PageNumberPagination):
+    """
+    Постраничная пагинация по номеру страницы. Режим курсора включается
+    в запросе параметром pagination=cursor (или наличием cursor),
+    номер страницы остаётся режимом по умолчанию для совместимости
+    и для списков с другим порядком, чем по id
+    """
     page_size = 30
     page_query_param = 'page'
+    mode_query_param = 'pagination'
+    django_paginator_class = CountStrategyPaginator
+    cursor_class = KeysetPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, queryset, request):
+        if not (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.cursor_class.cursor_query_param in request.query_params):
+            return False
+        # курсор работает только со списками, которые можно
+        # дофильтровать по id (не UNION и не срезы) и которые
+        # упорядочены по id: иначе порядок ранжирования (поиск
+        # категорий по имени) был бы потерян, такие списки
+        # отдаются постранично
+        query = getattr(queryset, 'query', None)
+        return (query is not None and not query.combinator
+                and not query.is_sliced
+                and tuple(query.order_by) in ((), ('id',), ('pk',)))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(queryset, request):
+            self.cursor_paginator = self.cursor_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        paginate_queryset для асинхронных представлений: количество
+        и строки страницы читаются через async ORM. Поддерживается
+        только режим номера страницы
+        """
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        # номер 'last' требует количества страниц
+        await paginator.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = await paginator.apage(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_data(self, data):
+        paginator = self.page.paginator
+        return OrderedDict([
+            ('count', paginator.count),
+            ('count_exact', getattr(paginator, 'count_exact', True)),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        properties = response_schema['properties']
+        properties['count']['description'] = (
+            'Отсутствует в режиме pagination=cursor')
+        properties['count_exact'] = {
+            'type': 'boolean',
+            'description': 'false, если count - оценка или значение из кэша',
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Режим пагинации: page (по умолчанию) '
+                               'или cursor',
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            },
+            *self.cursor_class().get_schema_operation_parameters(view),
+        ]
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
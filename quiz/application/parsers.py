@@ -0,0 +1,118 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import (FastJSONRenderer, MessagePackRenderer, from_columns,
+                        msgpack, orjson)
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser на orjson, если он установлен (только для UTF-8 и
+    строгого JSON, иначе используется стандартный json)
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if (orjson is None or not self.strict
+                or codecs.lookup(encoding).name != 'utf-8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackParser(BaseParser):
+    """
+    MessagePack; списки answers принимаются как в виде объектов,
+    так и по столбцам (см. MessagePackRenderer)
+    """
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if msgpack is None:
+            raise ParseError('MessagePack не поддерживается')
+        try:
+            data = msgpack.unpackb(stream.read(), raw=False)
+        except ValueError as exc:
+            raise ParseError('MessagePack parse error - %s'
+                             % (str(exc) or type(exc).__name__))
+        return from_columns(data, self.renderer_class.columnar_fields)
+
+
+class JSONLinesParser(BaseParser):
+    """
+    JSON Lines: по одному JSON-объекту на строку,
+    возвращается список объектов
+    """
+    media_type = 'application/jsonl'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        rows = []
+        for number, line in enumerate(codecs.getreader(encoding)(stream), 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f'JSON parse error in line {number} - {exc}')
+        return rows
+
+
+class NDJSONParser(JSONLinesParser):
+    media_type = 'application/x-ndjson'
+
+
+class QuestionsCSVParser(BaseParser):
+    """
+    CSV с вопросами и ответами, по одной строке на ответ:
+    title,kind,difficulty,is_active,answer,is_right
+    Идущие подряд строки одного вопроса объединяются: по колонке
+    question (id вопроса в выгрузке export/csv/), если она есть,
+    иначе по совпадению полей вопроса. Пустой answer означает
+    вопрос без ответов
+    """
+    media_type = 'text/csv'
+    question_fields = ('title', 'kind', 'difficulty', 'is_active')
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        reader = csv.DictReader(codecs.getreader(encoding)(stream))
+        if not reader.fieldnames or 'title' not in reader.fieldnames:
+            raise ParseError('CSV parse error - header with title column '
+                             'is required')
+        questions = []
+        previous = None
+        try:
+            for row in reader:
+                # без id одинаковые вопросы подряд неотличимы
+                key = row.get('question') or tuple(
+                    row.get(field) for field in self.question_fields)
+                if key != previous:
+                    question = {field: row[field]
+                                for field in self.question_fields
+                                if row.get(field) not in (None, '')}
+                    question['answers'] = []
+                    question['line'] = reader.line_num
+                    questions.append(question)
+                    previous = key
+                if row.get('answer'):
+                    questions[-1]['answers'].append({
+                        'text': row['answer'],
+                        'is_right': row.get('is_right') or False,
+                    })
+        except csv.Error as exc:
+            raise ParseError(f'CSV parse error in line {reader.line_num} '
+                             f'- {exc}')
+        return questions
@@ -9,4 +9,5 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.author == request.user
+        # сравниваются id, чтобы не загружать автора отдельным запросом
+        return obj.author_id == request.user.id
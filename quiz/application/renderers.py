@@ -0,0 +1,134 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+from .instrumentation import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# типы, которые orjson не знает (Decimal, ленивые строки, datetime
+# в формате DRF), кодируются так же, как в стандартном JSONRenderer
+_encoder = encoders.JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson, если он установлен. Результат совпадает
+    с JSONRenderer в компактном режиме; для отступов, ensure_ascii
+    и данных, которые orjson не кодирует, используется стандартный json
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if (orjson is None or data is None or self.ensure_ascii
+                or not self.compact
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {})):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encoder.default,
+                               option=orjson.OPT_NON_STR_KEYS
+                               | orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        # как и JSONRenderer, экранируем разделители строк для JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
+
+
+def _is_rows(value):
+    if not isinstance(value, (list, tuple)) or not value:
+        return False
+    first = value[0]
+    if not isinstance(first, dict):
+        return False
+    keys = first.keys()
+    return all(isinstance(row, dict) and row.keys() == keys for row in value)
+
+
+def to_columns(data, fields):
+    """
+    Заменяет списки однотипных объектов в полях fields на словарь
+    столбцов: [{"id": 1}, {"id": 2}] -> {"id": [1, 2]}. Копируются
+    только изменённые контейнеры
+    """
+    if isinstance(data, dict):
+        result = None
+        for key, value in data.items():
+            if key in fields and _is_rows(value):
+                new = {column: [row[column] for row in value]
+                       for column in value[0]}
+            elif isinstance(value, (dict, list, tuple)):
+                new = to_columns(value, fields)
+                if new is value:
+                    continue
+            else:
+                continue
+            if result is None:
+                result = dict(data)
+            result[key] = new
+        return data if result is None else result
+    if isinstance(data, (list, tuple)):
+        items = [to_columns(item, fields) for item in data]
+        if any(new is not old for new, old in zip(items, data)):
+            return items
+    return data
+
+
+def from_columns(data, fields):
+    """
+    Обратное преобразование to_columns
+    """
+    if isinstance(data, dict):
+        result = {}
+        for key, value in data.items():
+            if (key in fields and isinstance(value, dict) and value
+                    and all(isinstance(column, list)
+                            for column in value.values())
+                    and len({len(column) for column in value.values()}) == 1):
+                result[key] = [dict(zip(value, row))
+                               for row in zip(*value.values())]
+            else:
+                result[key] = from_columns(value, fields)
+        return result
+    if isinstance(data, list):
+        return [from_columns(item, fields) for item in data]
+    return data
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack для мобильных клиентов (Accept: application/msgpack
+    или ?format=msgpack). Вложенные списки answers передаются
+    по столбцам, чтобы ключи не повторялись в каждом ответе
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    columnar_fields = ('answers',)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if msgpack is None:
+            raise ImproperlyConfigured(
+                'Для MessagePackRenderer нужен пакет msgpack')
+        if data is None:
+            return b''
+        with timed('render'):
+            if self.columnar_fields:
+                data = to_columns(data, self.columnar_fields)
+            return msgpack.packb(data, default=_encoder.default,
+                                 use_bin_type=True)
@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+from .instrumentation import timed
+from .models import Answers
+
+QUESTION_VALUES = ('id', 'title', 'kind', 'difficulty', 'is_active',
+                   'quiz_id', 'quiz__title', 'author__username')
+QUIZ_VALUES = ('id', 'title', 'category__name', 'author__username')
+
+
+def quiz_rows(queryset):
+    """Строки квизов для represent_quizzes"""
+    return queryset.values(*QUIZ_VALUES)
+
+
+def represent_quizzes(rows):
+    """
+    Быстрое чтение квизов, результат совпадает
+    с QuizSerializer(many=True).data
+    """
+    with timed('serializer'):
+        return [{
+            'id': row['id'],
+            'title': row['title'],
+            'category_name': row['category__name'],
+            'author_name': row['author__username'],
+        } for row in rows]
+
+
+def question_rows(queryset):
+    """Строки вопросов для represent_questions, без загрузки моделей"""
+    return queryset.prefetch_related(None).values(*QUESTION_VALUES)
+
+
+def _answer_rows(rows):
+    return Answers.objects.filter(
+        question_id__in=[row['id'] for row in rows]).order_by(
+        'id').values_list('question_id', 'id', 'text', 'is_right')
+
+
+def _represent(rows, answer_rows):
+    answers = defaultdict(list)
+    for question_id, pk, text, is_right in answer_rows:
+        answers[question_id].append(
+            {'id': pk, 'text': text, 'is_right': is_right})
+    with timed('serializer'):
+        return [{
+            'quiz_title': row['quiz__title'],
+            'id': row['id'],
+            'title': row['title'],
+            'kind': row['kind'],
+            'difficulty': row['difficulty'],
+            'is_active': row['is_active'],
+            'author_name': row['author__username'],
+            'answers': answers[row['id']],
+        } for row in rows]
+
+
+def represent_questions(rows):
+    """
+    Быстрое чтение вопросов: словари строятся напрямую из строк
+    .values() и ответов, сгруппированных по вопросу, без полей DRF.
+    Результат совпадает с QuestionSerializer(many=True).data,
+    включая порядок ключей
+    """
+    rows = list(rows)
+    return _represent(rows, _answer_rows(rows))
+
+
+async def arepresent_questions(rows):
+    """represent_questions для асинхронных представлений"""
+    return _represent(rows, [row async for row in _answer_rows(rows)])
@@ -0,0 +1,187 @@
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Questions
+
+
+class QuestionSampler:
+    """
+    Индекс id активных вопросов по квизам для выбора
+    случайного вопроса за O(1) без ORDER BY RANDOM().
+
+    Индекс живёт в памяти процесса, заполняется лениво при
+    первом обращении к квизу и поддерживается сигналами модели
+    Questions. Изменения из других процессов подхватываются
+    перезагрузкой индекса квиза по истечении ttl.
+    """
+
+    max_permutations = 256
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        # quiz_id -> список id вопросов
+        self._ids = {}
+        # quiz_id -> {id вопроса: позиция в списке}
+        self._positions = {}
+        # id вопроса -> quiz_id, нужен при переносе вопроса в другой квиз
+        self._owners = {}
+        # quiz_id -> время загрузки
+        self._loaded_at = {}
+        # quiz_id -> счётчик изменений набора вопросов
+        self._versions = {}
+        # (quiz_id, seed, версия) -> ключи и id вопросов в порядке сессии
+        self._permutations = OrderedDict()
+
+    def get_ttl(self):
+        if self.ttl is not None:
+            return self.ttl
+        return getattr(settings, 'QUESTION_SAMPLER_TTL', 300)
+
+    def _is_fresh(self, quiz_id):
+        loaded_at = self._loaded_at.get(quiz_id)
+        if loaded_at is None:
+            return False
+        ttl = self.get_ttl()
+        return not ttl or time.monotonic() - loaded_at < ttl
+
+    def _store(self, quiz_id, ids):
+        for pk in self._ids.get(quiz_id, ()):
+            self._owners.pop(pk, None)
+        self._ids[quiz_id] = ids
+        self._positions[quiz_id] = {pk: i for i, pk in enumerate(ids)}
+        for pk in ids:
+            self._owners[pk] = quiz_id
+        self._loaded_at[quiz_id] = time.monotonic()
+        self._versions[quiz_id] = self._versions.get(quiz_id, 0) + 1
+
+    def load(self, quiz_id):
+        """Загружает id активных вопросов квиза из базы"""
+        ids = list(Questions.objects.filter(
+            quiz=quiz_id, is_active=True).values_list('id', flat=True))
+        with self._lock:
+            self._store(quiz_id, ids)
+
+    async def aload(self, quiz_id):
+        ids = [pk async for pk in Questions.objects.filter(
+            quiz=quiz_id, is_active=True).values_list('id', flat=True)]
+        with self._lock:
+            self._store(quiz_id, ids)
+
+    def invalidate(self, quiz_id=None):
+        """Сбрасывает индекс квиза (или всех квизов)"""
+        with self._lock:
+            quiz_ids = list(self._ids) if quiz_id is None else [quiz_id]
+            for qid in quiz_ids:
+                for pk in self._ids.pop(qid, ()):
+                    self._owners.pop(pk, None)
+                self._positions.pop(qid, None)
+                self._loaded_at.pop(qid, None)
+                self._versions[qid] = self._versions.get(qid, 0) + 1
+
+    def _add(self, quiz_id, pk):
+        if quiz_id not in self._ids:
+            # индекс квиза ещё не загружен, загрузится целиком при обращении
+            return
+        positions = self._positions[quiz_id]
+        if pk in positions:
+            return
+        positions[pk] = len(self._ids[quiz_id])
+        self._ids[quiz_id].append(pk)
+        self._owners[pk] = quiz_id
+        self._versions[quiz_id] += 1
+
+    def _remove(self, pk):
+        quiz_id = self._owners.pop(pk, None)
+        if quiz_id is None:
+            return
+        ids = self._ids[quiz_id]
+        positions = self._positions[quiz_id]
+        # удаление за O(1): на место удаляемого встаёт последний элемент
+        index = positions.pop(pk)
+        last = ids.pop()
+        if last != pk:
+            ids[index] = last
+            positions[last] = index
+        self._versions[quiz_id] += 1
+
+    def update(self, question):
+        """Приводит индекс в соответствие с сохранённым вопросом"""
+        with self._lock:
+            if self._owners.get(question.pk) != question.quiz_id:
+                self._remove(question.pk)
+            if question.is_active:
+                self._add(question.quiz_id, question.pk)
+            else:
+                self._remove(question.pk)
+
+    def discard(self, pk):
+        with self._lock:
+            self._remove(pk)
+
+    def ids(self, quiz_id):
+        """Копия id активных вопросов квиза, без гарантий порядка"""
+        if not self._is_fresh(quiz_id):
+            self.load(quiz_id)
+        with self._lock:
+            return list(self._ids.get(quiz_id, ()))
+
+    def version(self, quiz_id):
+        with self._lock:
+            return self._versions.get(quiz_id, 0)
+
+    @staticmethod
+    def session_key(seed, pk):
+        """
+        Место вопроса в порядке сессии seed: 48-битный хеш (seed, id),
+        целое без потери точности в JSON-клиентах
+        """
+        return int.from_bytes(hashlib.blake2b(
+            f'{seed}:{pk}'.encode(), digest_size=6).digest(), 'big')
+
+    def permutation(self, quiz_id, seed):
+        """
+        Активные вопросы квиза в порядке сессии seed: пары
+        (ключи, id), упорядоченные по session_key. Порядок вопросов
+        зависит только от seed и id, поэтому не меняется при
+        добавлении и удалении других вопросов и совпадает во всех
+        процессах. Строится в памяти, без сортировки в базе
+        """
+        ids = self.ids(quiz_id)
+        key = (quiz_id, seed, self.version(quiz_id))
+        with self._lock:
+            cached = self._permutations.get(key)
+            if cached is not None:
+                self._permutations.move_to_end(key)
+                return cached
+        order = sorted((self.session_key(seed, pk), pk) for pk in ids)
+        cached = (tuple(key for key, _ in order),
+                  tuple(pk for _, pk in order))
+        with self._lock:
+            self._permutations[key] = cached
+            while len(self._permutations) > self.max_permutations:
+                self._permutations.popitem(last=False)
+        return cached
+
+    def pick(self, quiz_id):
+        """Возвращает id случайного активного вопроса квиза или None"""
+        if not self._is_fresh(quiz_id):
+            self.load(quiz_id)
+        with self._lock:
+            ids = self._ids.get(quiz_id)
+            return random.choice(ids) if ids else None
+
+    async def apick(self, quiz_id):
+        if not self._is_fresh(quiz_id):
+            await self.aload(quiz_id)
+        with self._lock:
+            ids = self._ids.get(quiz_id)
+            return random.choice(ids) if ids else None
+
+
+question_sampler = QuestionSampler()
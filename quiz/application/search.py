@@ -0,0 +1,263 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+
+from .models import Answers, Questions
+
+TOKEN_RE = re.compile(r'\w+')
+SEARCH_CONFIG = 'simple'
+# поля вопроса, по которым фильтруется поиск в индексе
+FILTER_FIELDS = ('quiz_id', 'author_id', 'is_active')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Обратный индекс в памяти процесса: слово -> {id вопроса: вес}.
+    Текст вопроса весит больше текста ответа. Как и plainto_tsquery
+    в PostgreSQL, вопрос находится, если все слова запроса есть
+    в его тексте или в тексте одного из его ответов. Индекс строится
+    при первом поиске, обновляется сигналами моделей и перечитывается
+    из базы по истечении ttl (изменения из других процессов).
+    Используется там, где нет полнотекстового поиска PostgreSQL
+    """
+    TITLE_WEIGHT = 2
+    ANSWER_WEIGHT = 1
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._postings = defaultdict(Counter)
+        # ('q', id) / ('a', id) -> (id вопроса, вес, слова документа)
+        self._documents = {}
+        # id вопроса -> поля для фильтров (quiz_id, author_id, is_active)
+        self._questions = {}
+        # id вопроса -> ключи документов его ответов
+        self._answers = defaultdict(set)
+
+    def get_ttl(self):
+        if self.ttl is not None:
+            return self.ttl
+        return getattr(settings, 'SEARCH_INDEX_TTL', 300)
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def is_fresh(self):
+        if self._loaded_at is None:
+            return False
+        ttl = self.get_ttl()
+        return not ttl or time.monotonic() - self._loaded_at < ttl
+
+    def load(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._questions.clear()
+            self._answers.clear()
+            for pk, title, *fields in Questions.objects.values_list(
+                    'id', 'title', *FILTER_FIELDS).iterator(chunk_size=2000):
+                self._questions[pk] = dict(zip(FILTER_FIELDS, fields))
+                self._add(('q', pk), pk, title, self.TITLE_WEIGHT)
+            for pk, question_id, text in Answers.objects.values_list(
+                    'id', 'question_id', 'text').iterator(chunk_size=2000):
+                self._add(('a', pk), question_id, text, self.ANSWER_WEIGHT)
+            self._loaded_at = time.monotonic()
+
+    def _add(self, key, question_id, text, weight):
+        tokens = Counter(tokenize(text))
+        self._documents[key] = (question_id, weight, tokens)
+        if key[0] == 'a':
+            self._answers[question_id].add(key)
+        for token, count in tokens.items():
+            self._postings[token][question_id] += count * weight
+
+    def _remove(self, key):
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        question_id, weight, tokens = document
+        if key[0] == 'a':
+            self._answers[question_id].discard(key)
+            if not self._answers[question_id]:
+                del self._answers[question_id]
+        for token, count in tokens.items():
+            postings = self._postings[token]
+            postings[question_id] -= count * weight
+            if postings[question_id] <= 0:
+                del postings[question_id]
+            if not postings:
+                del self._postings[token]
+
+    def update_question(self, question):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(('q', question.pk))
+            self._questions[question.pk] = {
+                field: getattr(question, field) for field in FILTER_FIELDS}
+            self._add(('q', question.pk), question.pk, question.title,
+                      self.TITLE_WEIGHT)
+
+    def remove_question(self, pk):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(('q', pk))
+            self._questions.pop(pk, None)
+
+    def update_answer(self, answer):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(('a', answer.pk))
+            self._add(('a', answer.pk), answer.question_id, answer.text,
+                      self.ANSWER_WEIGHT)
+
+    def remove_answer(self, pk):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(('a', pk))
+
+    def search(self, query, filters=None, limit=None):
+        """
+        Возвращает id вопросов по убыванию релевантности (tf-idf).
+        filters - значения полей FILTER_FIELDS, применяются до limit
+        """
+        if not self.is_fresh():
+            self.load()
+        tokens = set(tokenize(query))
+        filters = {field: value for field, value in (filters or {}).items()
+                   if value is not None}
+        with self._lock:
+            scores = self._score(tokens, filters) if tokens else {}
+
+        def key(pk):
+            return -scores[pk], pk
+
+        if limit:
+            # первые limit без сортировки всех найденных
+            return heapq.nsmallest(limit, scores, key=key)
+        return sorted(scores, key=key)
+
+    def _contains_all(self, question_id, tokens):
+        keys = (('q', question_id), *self._answers.get(question_id, ()))
+        return any(key in self._documents
+                   and tokens <= self._documents[key][2].keys()
+                   for key in keys)
+
+    def _score(self, tokens, filters):
+        postings = [self._postings.get(token) for token in tokens]
+        if not all(postings):
+            return {}
+        total = len(self._questions) or 1
+        weights = [(items, math.log(1 + total / len(items)))
+                   for items in postings]
+        scores = {}
+        # кандидаты - вопросы из самого короткого списка
+        for question_id in min(postings, key=len):
+            fields = self._questions.get(question_id, {})
+            if any(fields.get(field) != value
+                   for field, value in filters.items()):
+                continue
+            if len(tokens) > 1 and not (
+                    all(question_id in items for items in postings)
+                    and self._contains_all(question_id, tokens)):
+                continue
+            scores[question_id] = sum(items.get(question_id, 0) * idf
+                                      for items, idf in weights)
+        return scores
+
+
+class SearchResults:
+    """
+    Найденные вопросы в порядке релевантности. Объекты загружаются
+    только для запрошенного среза (страницы пагинации), а не для всех
+    найденных id
+    """
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1 or None][0]
+        ids = self.ids[index]
+        found = self.queryset.filter(pk__in=ids).in_bulk()
+        return [found[pk] for pk in ids if pk in found]
+
+
+class PythonSearchBackend:
+    """Поиск по обратному индексу в памяти процесса"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def search(self, queryset, query, filters=None, limit=None):
+        # фильтры применяются в индексе до limit, иначе первые limit
+        # найденных могли бы целиком отсеяться фильтрами
+        ranked = self.index.search(query, filters=filters, limit=limit)
+        # индекс мог устареть: строки проверяются запросом к базе
+        allowed = set(queryset.filter(pk__in=ranked).values_list(
+            'pk', flat=True))
+        return SearchResults(queryset,
+                             [pk for pk in ranked if pk in allowed])
+
+
+class PostgresSearchBackend:
+    """
+    Полнотекстовый поиск PostgreSQL по функциональным GIN-индексам
+    to_tsvector(title) и to_tsvector(text) (миграция 0007).
+    Фильтры уже применены к queryset
+    """
+
+    def search(self, queryset, query, filters=None, limit=None):
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVector,
+        )
+
+        search_query = SearchQuery(query, config=SEARCH_CONFIG)
+        answers = Answers.objects.annotate(
+            search=SearchVector('text', config=SEARCH_CONFIG),
+        ).filter(search=search_query).values('question_id')
+        vector = SearchVector('title', config=SEARCH_CONFIG)
+        queryset = queryset.alias(search=vector).annotate(
+            rank=SearchRank(vector, search_query),
+        ).filter(Q(search=search_query) | Q(pk__in=answers)).order_by(
+            '-rank', 'id')
+        return queryset[:limit] if limit else queryset
+
+
+question_index = InvertedIndex()
+
+
+def get_search_backend(using='default'):
+    backend = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = ('postgres' if connections[using].vendor == 'postgresql'
+                   else 'python')
+    if backend == 'postgres':
+        return PostgresSearchBackend()
+    return PythonSearchBackend(question_index)
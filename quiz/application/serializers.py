@@ -1,15 +1,18 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from .instrumentation import TimedSerializerMixin
 from .models import Quizzes, Questions, Answers, Categories
 
 User = get_user_model()
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Сериализатор для обработки
     операций с категориями
@@ -27,7 +30,7 @@ class CategorySerializer(serializers.ModelSerializer):
         return attrs
 
 
-class QuizSerializer(serializers.ModelSerializer):
+class QuizSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Обрабатывает создание, обновление
     удаление, получение квиза, а также
@@ -71,14 +74,14 @@ class QuizSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Answers
         fields = ('id', 'text', 'is_right')
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Обрабатывает создание, получение списка,
     обновление и удаление вопросов
@@ -106,15 +109,71 @@ class QuestionSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         if attrs.get('quiz', None):
             quiz = attrs['quiz']
-            author = quiz.author
-            if author != self.context['request'].user:
+            if quiz.author_id != self.context['request'].user.id:
                 raise serializers.ValidationError({"quiz":
                                                    "Вы не можете добавить вопрос в квиз, "
                                                    "автором которого не являетесь!"})
         return attrs
 
 
-class SingleAnswerSerializer(serializers.ModelSerializer):
+class QuestionSessionSerializer(serializers.Serializer):
+    """
+    Параметры выдачи вопросов квиза по сессии:
+    seed задаёт порядок вопросов, cursor - следующий вопрос
+    (из ответа на предыдущий запрос, 0 - с начала),
+    size - количество вопросов за один запрос
+    """
+    seed = serializers.IntegerField(required=False, min_value=0)
+    cursor = serializers.IntegerField(default=0, min_value=0)
+    size = serializers.IntegerField(default=10, min_value=1, max_value=100)
+
+
+class QuestionSearchSerializer(serializers.Serializer):
+    """Параметры полнотекстового поиска вопросов"""
+    q = serializers.CharField(max_length=200)
+
+
+class ImportAnswerSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Answers
+        fields = ('text', 'is_right')
+
+
+class ImportQuestionSerializer(serializers.ModelSerializer):
+    """
+    Проверка одного вопроса при массовом импорте. Связанных полей
+    нет, квиз и автор проверяются один раз на весь импорт,
+    поэтому проверка строки не обращается к базе
+    """
+    answers = ImportAnswerSerializer(many=True, required=False)
+
+    class Meta:
+        model = Questions
+        fields = ('title', 'kind', 'difficulty', 'is_active', 'answers')
+
+
+class QuestionImportSerializer(serializers.Serializer):
+    """Параметры массового импорта вопросов"""
+    quiz = serializers.IntegerField()
+    questions = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False,
+        max_length=settings.BULK_IMPORT_MAX_QUESTIONS)
+
+    def validate_quiz(self, value):
+        author_id = Quizzes.objects.filter(pk=value).values_list(
+            'author_id', flat=True).first()
+        if author_id is None:
+            raise serializers.ValidationError("Квиз не найден!")
+        if author_id != self.context['request'].user.id:
+            raise serializers.ValidationError(
+                "Вы не можете добавить вопрос в квиз, "
+                "автором которого не являетесь!")
+        return value
+
+
+class SingleAnswerSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     question = serializers.PrimaryKeyRelatedField(queryset=Questions.objects.all(),
                                                   write_only=True)
     question_title = serializers.StringRelatedField(source='question.title',
@@ -134,15 +193,14 @@ class SingleAnswerSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         if attrs.get('question', None):
             question = attrs['question']
-            author = question.author
-            if author != self.context['request'].user:
+            if question.author_id != self.context['request'].user.id:
                 raise serializers.ValidationError({"question":
                                                    "Вы не можете добавить ответ на вопрос, "
                                                    "автором которого не являетесь!"})
         return attrs
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Сериализатор для обработки создания пользователей
     """
@@ -181,3 +239,17 @@ class UserSerializer(serializers.ModelSerializer):
         # пароль хешируется и устанавливается
         user.save()
         return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Токены с username и is_staff: StatelessJWTAuthentication
+    строит по ним пользователя без запроса к базе
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.username
+        token['is_staff'] = user.is_staff
+        return token
@@ -0,0 +1,144 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+
+from .cache import payload_cache
+from .models import Answers, Categories, Questions, Quizzes
+from .sampling import question_sampler
+from .search import question_index
+from .snapshots import snapshot_store
+
+User = get_user_model()
+
+# Отправляется после массового импорта вопросов, bulk_create
+# не отправляет post_save для созданных объектов
+questions_imported = Signal()
+
+# id вопросов, удаляемых в текущем потоке: их ответы удаляются
+# каскадно, и квиз инвалидирует сам вопрос
+_deleting = threading.local()
+
+
+def quiz_content_changed(*quiz_ids):
+    """Инвалидирует кэш квизов и пересобирает их снимки"""
+    # версия меняется после коммита: иначе GET между изменением
+    # и коммитом закэшировал бы старые строки под новой версией
+    transaction.on_commit(lambda: payload_cache.bump(*quiz_ids))
+    snapshot_store.schedule(*quiz_ids)
+
+
+def _question_quiz_id(question_id):
+    return Questions.objects.filter(pk=question_id).values_list(
+        'quiz_id', flat=True).first()
+
+
+def _answer_quiz_id(answer):
+    # вопрос обычно уже загружен валидацией сериализатора
+    # или select_related, тогда запрос не нужен
+    if Answers.question.is_cached(answer):
+        return answer.question.quiz_id
+    return _question_quiz_id(answer.question_id)
+
+
+@receiver(post_save, sender=Categories)
+def category_saved(sender, instance, created, **kwargs):
+    # имя категории входит в сериализованные квизы
+    if not created:
+        quiz_content_changed(*Quizzes.objects.filter(
+            category=instance.pk).values_list('id', flat=True))
+
+
+@receiver(post_init, sender=User)
+def user_loaded(sender, instance, **kwargs):
+    instance._previous_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    # имя автора входит в квизы, вопросы и ответы
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    previous = instance._previous_username
+    instance._previous_username = instance.username
+    if created or previous == instance.username:
+        return
+    quiz_content_changed(*Quizzes.objects.filter(
+        Q(author=instance.pk) | Q(questions__author=instance.pk)
+        | Q(questions__answers__author=instance.pk)
+    ).values_list('id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Quizzes)
+@receiver(post_delete, sender=Quizzes)
+def quiz_changed(sender, instance, **kwargs):
+    quiz_content_changed(instance.pk)
+
+
+@receiver(post_init, sender=Questions)
+def question_loaded(sender, instance, **kwargs):
+    # прежний квиз на случай переноса вопроса, без запроса при сохранении
+    instance._previous_quiz_id = instance.__dict__.get('quiz_id')
+
+
+@receiver(post_save, sender=Questions)
+def question_saved(sender, instance, **kwargs):
+    question_sampler.update(instance)
+    question_index.update_question(instance)
+    quiz_content_changed(instance.quiz_id, instance._previous_quiz_id)
+    instance._previous_quiz_id = instance.quiz_id
+
+
+@receiver(pre_delete, sender=Questions)
+def question_pre_delete(sender, instance, **kwargs):
+    if not hasattr(_deleting, 'questions'):
+        _deleting.questions = set()
+    _deleting.questions.add(instance.pk)
+
+
+@receiver(post_delete, sender=Questions)
+def question_deleted(sender, instance, **kwargs):
+    getattr(_deleting, 'questions', set()).discard(instance.pk)
+    question_sampler.discard(instance.pk)
+    question_index.remove_question(instance.pk)
+    quiz_content_changed(instance.quiz_id)
+
+
+@receiver(post_init, sender=Answers)
+def answer_loaded(sender, instance, **kwargs):
+    instance._previous_question_id = instance.__dict__.get('question_id')
+
+
+@receiver(post_save, sender=Answers)
+def answer_saved(sender, instance, **kwargs):
+    question_index.update_answer(instance)
+    quiz_ids = [_answer_quiz_id(instance)]
+    # квиз прежнего вопроса запрашивается, только если ответ перенесён
+    previous = instance._previous_question_id
+    if previous is not None and previous != instance.question_id:
+        quiz_ids.append(_question_quiz_id(previous))
+    quiz_content_changed(*quiz_ids)
+    instance._previous_question_id = instance.question_id
+
+
+@receiver(post_delete, sender=Answers)
+def answer_deleted(sender, instance, **kwargs):
+    question_index.remove_answer(instance.pk)
+    # при каскадном удалении вопроса квиз инвалидирует сам вопрос
+    if instance.question_id in getattr(_deleting, 'questions', ()):
+        return
+    quiz_content_changed(_answer_quiz_id(instance))
+
+
+@receiver(questions_imported)
+def questions_bulk_created(sender, quiz_id, questions, answers, **kwargs):
+    question_sampler.invalidate(quiz_id)
+    quiz_content_changed(quiz_id)
+    for question in questions:
+        question_index.update_question(question)
+    for answer in answers:
+        question_index.update_answer(answer)
@@ -0,0 +1,176 @@
+import contextvars
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_DEFAULTS = {
+    'ENABLED': False,
+    'THRESHOLD_MS': 100,
+    # EXPLAIN для медленных SELECT; ANALYZE выполняет запрос повторно
+    'EXPLAIN': True,
+    'ANALYZE': False,
+    'PATH': 'slow_queries.jsonl',
+    'MAX_SQL_LENGTH': 4000,
+}
+
+_view = contextvars.ContextVar('slow_query_view', default=None)
+# EXPLAIN и точки сохранения вокруг него сами не логируются
+_guard = threading.local()
+_write_lock = threading.Lock()
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+# изменяющие подзапросы в WITH (PostgreSQL: WITH ... DELETE ...)
+WRITE_RE = re.compile(r'\b(?:INSERT|UPDATE|DELETE|MERGE)\b', re.IGNORECASE)
+
+
+def get_options():
+    return {**SLOW_QUERY_DEFAULTS,
+            **getattr(settings, 'SLOW_QUERY_LOG', {})}
+
+
+def fingerprint(sql):
+    """
+    Нормализованный SQL: литералы и параметры заменены на ?,
+    списки IN (...) схлопнуты, чтобы запросы, отличающиеся только
+    значениями, попадали в одну группу
+    """
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def is_read_only(sql):
+    """SELECT или WITH без изменяющих подзапросов"""
+    words = sql.split(None, 1)
+    first = words[0].upper() if words else ''
+    if first == 'SELECT':
+        return True
+    return first == 'WITH' and not WRITE_RE.search(STRING_RE.sub('?', sql))
+
+
+def explain_prefix(vendor, analyze):
+    if vendor == 'postgresql':
+        return ('EXPLAIN (ANALYZE, BUFFERS)' if analyze
+                else 'EXPLAIN')
+    if vendor == 'sqlite':
+        return 'EXPLAIN QUERY PLAN'
+    if vendor == 'mysql':
+        return 'EXPLAIN ANALYZE' if analyze else 'EXPLAIN'
+    return None
+
+
+class SlowQueryLogger:
+    """
+    execute_wrapper, который записывает запросы дольше THRESHOLD_MS
+    в JSONL-файл PATH (по строке на запрос) и в лог: отпечаток SQL,
+    представление, из которого выполнен запрос, и план EXPLAIN
+    """
+
+    def __init__(self, options=None):
+        self.options = options or get_options()
+        self.threshold = self.options['THRESHOLD_MS'] / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_guard, 'active', False):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.threshold:
+                self.log(sql, params, many, context, elapsed)
+
+    def explain(self, connection, sql, params):
+        prefix = explain_prefix(connection.vendor, self.options['ANALYZE'])
+        if prefix is None:
+            return None
+        _guard.active = True
+        try:
+            # точка сохранения: ошибка EXPLAIN не должна прерывать
+            # транзакцию, в которой выполнялся исходный запрос
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(f'{prefix} {sql}', params)
+                    return [' '.join(str(column) for column in row)
+                            for row in cursor.fetchall()]
+        except DatabaseError as exc:
+            return [f'EXPLAIN failed: {exc}']
+        finally:
+            _guard.active = False
+
+    def log(self, sql, params, many, context, elapsed):
+        connection = context['connection']
+        normalized = fingerprint(sql)
+        entry = {
+            'time': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(elapsed * 1000, 3),
+            'database': connection.alias,
+            'vendor': connection.vendor,
+            'view': _view.get(),
+            'fingerprint': hashlib.md5(normalized.encode()).hexdigest()[:16],
+            'normalized': normalized,
+            'sql': sql[:self.options['MAX_SQL_LENGTH']],
+            'explain': None,
+        }
+        # EXPLAIN только для чтения: для изменяющих запросов
+        # ANALYZE выполнил бы изменение повторно
+        if self.options['EXPLAIN'] and not many and is_read_only(sql):
+            entry['explain'] = self.explain(connection, sql, params)
+        logger.warning('Медленный запрос %.1f ms (%s): %s',
+                       entry['duration_ms'], entry['view'] or '-',
+                       normalized[:200])
+        path = self.options['PATH']
+        if path:
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+            with _write_lock, open(path, 'a', encoding='utf-8') as file:
+                file.write(line + '\n')
+
+
+def install(sender, connection, **kwargs):
+    """
+    Обработчик connection_created: добавляет SlowQueryLogger первым
+    в execute_wrappers соединения (один раз на соединение)
+    """
+    if not any(isinstance(wrapper, SlowQueryLogger)
+               for wrapper in connection.execute_wrappers):
+        # первым в списке: execute_wrapper() снимает последний элемент
+        connection.execute_wrappers.insert(0, SlowQueryLogger())
+
+
+class SlowQueryMiddleware:
+    """
+    Запоминает представление текущего запроса для журнала
+    медленных запросов, включается SLOW_QUERY_LOG['ENABLED']
+    """
+
+    def __init__(self, get_response):
+        if not get_options()['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _view.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            _view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        _view.set(match.view_name if match else view_func.__name__)
@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+
+from .cache import payload_cache
+from .models import Questions, Quizzes
+from .renderers import FastJSONRenderer
+from .representations import question_rows, represent_questions
+from .serializers import QuizSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPTS_BR = re.compile(r'\bbr\b')
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+class SnapshotStore:
+    """
+    Готовые сжатые (gzip и, если установлен brotli, br) снимки квиза
+    со всеми вопросами и ответами. Снимок хранится в кэше под текущей
+    версией квиза, поэтому любое изменение квиза, его вопросов или
+    ответов делает старый снимок недоступным. После изменения снимок
+    пересобирается в фоновом потоке, если его уже запрашивали
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._executor = None
+        # распакованные снимки для клиентов без сжатия, по ETag снимка
+        self._identity = OrderedDict()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'PAYLOAD_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def get_ttl():
+        # снимок хранится под версией квиза и не устаревает,
+        # поэтому живёт дольше записей кэша с TIMEOUT по умолчанию
+        return getattr(settings, 'SNAPSHOT_TTL', 86400)
+
+    @staticmethod
+    def get_identity_size():
+        return getattr(settings, 'SNAPSHOT_IDENTITY_CACHE_SIZE', 32)
+
+    @staticmethod
+    def key(quiz_id, version):
+        return f'snapshot:{quiz_id}:{version}'
+
+    @staticmethod
+    def active_key(quiz_id):
+        return f'snapshot-active:{quiz_id}'
+
+    def serialize(self, quiz_id):
+        quiz = Quizzes.objects.select_related('category', 'author').filter(
+            pk=quiz_id).first()
+        if quiz is None:
+            return None
+        data = dict(QuizSerializer(quiz).data)
+        data['questions'] = represent_questions(
+            question_rows(Questions.objects.filter(quiz=quiz_id)))
+        return data
+
+    def build(self, quiz_id):
+        # версия читается до чтения из базы: если квиз изменится во время
+        # сборки, снимок сохранится под уже устаревшей версией
+        version = payload_cache.get_version(quiz_id)
+        data = self.serialize(quiz_id)
+        if data is None:
+            return None
+        raw = FastJSONRenderer().render(data)
+        snapshot = {
+            'etag': hashlib.md5(raw).hexdigest(),
+            'gzip': gzip.compress(raw, compresslevel=6),
+            'br': brotli.compress(raw) if brotli is not None else None,
+            'size': len(raw),
+        }
+        self.cache.set(self.key(quiz_id, version), snapshot,
+                       self.get_ttl())
+        return snapshot
+
+    def get(self, quiz_id):
+        version = payload_cache.get_version(quiz_id)
+        snapshot = self.cache.get(self.key(quiz_id, version))
+        if snapshot is None:
+            snapshot = self.build(quiz_id)
+            # отметка о том, что снимок читают, пишется только при
+            # сборке по запросу, а не при каждом чтении
+            if snapshot is not None:
+                self.cache.set(self.active_key(quiz_id), True,
+                               self.get_ttl())
+        return snapshot
+
+    @staticmethod
+    def choose_encoding(snapshot, accept_encoding):
+        """Сжатие по Accept-Encoding: br, gzip или None (без сжатия)"""
+        if snapshot['br'] is not None and ACCEPTS_BR.search(accept_encoding):
+            return 'br'
+        if ACCEPTS_GZIP.search(accept_encoding):
+            return 'gzip'
+        return None
+
+    @staticmethod
+    def etag(snapshot, encoding):
+        """У каждого представления (сжатия) свой ETag"""
+        return f'{snapshot["etag"]}-{encoding or "identity"}'
+
+    def body(self, snapshot, encoding):
+        if encoding is not None:
+            return snapshot[encoding]
+        etag = snapshot['etag']
+        with self._lock:
+            raw = self._identity.get(etag)
+            if raw is not None:
+                self._identity.move_to_end(etag)
+                return raw
+        raw = gzip.decompress(snapshot['gzip'])
+        with self._lock:
+            self._identity[etag] = raw
+            while len(self._identity) > self.get_identity_size():
+                self._identity.popitem(last=False)
+        return raw
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='quiz-snapshot')
+            return self._executor
+
+    def schedule(self, *quiz_ids):
+        """Ставит пересборку снимков в очередь после коммита транзакции"""
+        quiz_ids = [quiz_id for quiz_id in quiz_ids if quiz_id is not None]
+        active = self.cache.get_many(
+            [self.active_key(quiz_id) for quiz_id in quiz_ids])
+        for quiz_id in quiz_ids:
+            if self.active_key(quiz_id) in active:
+                transaction.on_commit(lambda pk=quiz_id: self._submit(pk))
+
+    def _submit(self, quiz_id):
+        if not getattr(settings, 'SNAPSHOT_BACKGROUND', True):
+            return
+        with self._lock:
+            if quiz_id in self._pending:
+                return
+            self._pending.add(quiz_id)
+        self.executor.submit(self._rebuild, quiz_id)
+
+    def _rebuild(self, quiz_id):
+        with self._lock:
+            # изменения после начала сборки снова поставят квиз в очередь
+            self._pending.discard(quiz_id)
+        try:
+            self.build(quiz_id)
+        finally:
+            connections.close_all()
+
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from rest_framework.test import APITestCase
+
+from ..models import Categories, Quizzes
+from ..sampling import question_sampler
+
+
+class QuizTestCase(APITestCase):
+    """
+    Автор, категория и квиз для тестов API, кэши и выборка
+    вопросов очищаются перед каждым тестом
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='author')
+        cls.category = Categories.objects.create(name='Категория')
+        cls.quiz = Quizzes.objects.create(title='Квиз', author=cls.author,
+                                          category=cls.category)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        question_sampler.invalidate()
@@ -0,0 +1,90 @@
+from django.test import override_settings
+
+from ..models import Answers, Questions, Quizzes
+from .base import QuizTestCase
+
+
+class AsyncViewsTests(QuizTestCase):
+    """Асинхронные эндпоинты чтения отдают то же, что синхронные"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Quizzes.objects.bulk_create(
+            Quizzes(title=f'Квиз {i}', author=cls.author,
+                    category=cls.category) for i in range(40))
+        questions = Questions.objects.bulk_create(
+            Questions(quiz=cls.quiz, title=f'Вопрос {i}', author=cls.author,
+                      is_active=i == 5)
+            for i in range(35))
+        Answers.objects.bulk_create(
+            Answers(question=question, text=f'Ответ {i}', is_right=i == 0,
+                    author=cls.author)
+            for question in questions for i in range(2))
+
+    def assertSameResponse(self, path):
+        expected = self.client.get(path)
+        response = self.client.get(f'/async{path}')
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertJSONEqual(
+            response.content.decode().replace('/async/', '/'),
+            expected.content.decode())
+
+    def test_quizzes(self):
+        for path in ('/quizzes/', '/quizzes/?page=2',
+                     f'/quizzes/?category={self.category.pk}',
+                     f'/quizzes/?author={self.author.pk}&page=2',
+                     '/quizzes/?category=999', '/quizzes/?author=abc',
+                     '/quizzes/?page=9'):
+            with self.subTest(path):
+                self.assertSameResponse(path)
+
+    def test_quiz(self):
+        for path in (f'/quiz/{self.quiz.pk}/', '/quiz/999/'):
+            with self.subTest(path):
+                self.assertSameResponse(path)
+                # второй запрос отдаётся из кэша
+                self.assertSameResponse(path)
+
+    def test_questions(self):
+        for path in ('/questions/', f'/questions/?quiz={self.quiz.pk}',
+                     f'/questions/?quiz={self.quiz.pk}&page=2',
+                     '/questions/?is_active=true',
+                     '/questions/?is_active=maybe', '/questions/?page=last',
+                     '/questions/?quiz=abc', '/questions/?page=0'):
+            with self.subTest(path):
+                self.assertSameResponse(path)
+
+    def test_shared_payload_cache(self):
+        path = f'/quiz/{self.quiz.pk}/'
+        self.assertEqual(self.client.get(path)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(f'/async{path}')['X-Cache'], 'HIT')
+        self.quiz.title = 'Новое имя'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiz.save()
+        response = self.client.get(f'/async{path}')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['title'], 'Новое имя')
+
+    @override_settings(PAGINATION_COUNT={'STRATEGY': 'cached',
+                                         'THRESHOLD': 10, 'TTL': 30})
+    def test_cached_count(self):
+        path = f'/async/questions/?quiz={self.quiz.pk}'
+        first = self.client.get(path).json()
+        self.assertEqual((first['count'], first['count_exact']), (35, True))
+        # вторая страница - другой URL, количество из кэша
+        second = self.client.get(f'{path}&page=2').json()
+        self.assertEqual((second['count'], second['count_exact']),
+                         (35, False))
+        self.assertEqual(len(second['results']), 5)
+
+    def test_random(self):
+        # в квизе один активный вопрос, выбор детерминирован
+        for path in (f'/random/{self.quiz.pk}/', '/random/999/',
+                     '/random/abc/'):
+            with self.subTest(path):
+                self.assertSameResponse(path)
+
+    def test_only_get(self):
+        response = self.client.post('/async/quizzes/')
+        self.assertEqual(response.status_code, 405)
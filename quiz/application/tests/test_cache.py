@@ -0,0 +1,117 @@
+from ..cache import payload_cache
+from ..models import Answers, Questions, Quizzes
+from .base import QuizTestCase
+
+
+class PayloadCacheTests(QuizTestCase):
+    """Записи кэша ответов инвалидируются версией квиза"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_quiz = Quizzes.objects.create(
+            title='Другой квиз', author=cls.author, category=cls.category)
+        cls.question = Questions.objects.create(
+            quiz=cls.quiz, title='Вопрос', author=cls.author)
+        cls.answer = Answers.objects.create(
+            question=cls.question, text='Ответ', author=cls.author)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.author)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def assertCached(self, url, hit):
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT' if hit else 'MISS')
+
+    def test_quiz_detail(self):
+        url = f'/quiz/{self.quiz.pk}/'
+        self.assertCached(url, False)
+        self.assertCached(url, True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'title': 'Новое имя',
+                                    'category': self.category.pk})
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Новое имя')
+
+    def test_category_rename(self):
+        url = f'/quiz/{self.quiz.pk}/'
+        self.get(url)
+        self.category.name = 'Переименована'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        self.assertEqual(self.get(url).data['category_name'], 'Переименована')
+
+    def test_answer_change_invalidates_question(self):
+        url = f'/question/{self.question.pk}/'
+        self.get(url)
+        self.assertCached(url, True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/answer/{self.answer.pk}/',
+                              {'text': 'Изменён'})
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['answers'][0]['text'], 'Изменён')
+
+    def test_question_list_per_quiz(self):
+        url = f'/questions/?quiz={self.quiz.pk}'
+        self.get(url)
+        self.get('/questions/')
+        # изменения в другом квизе не затрагивают список квиза,
+        # но сбрасывают общий список
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/questions/', {'quiz': self.other_quiz.pk,
+                                             'title': 'Новый вопрос'})
+        self.assertCached(url, True)
+        self.assertCached('/questions/', False)
+        with self.captureOnCommitCallbacks(execute=True):
+            Questions.objects.create(quiz=self.quiz, title='Ещё вопрос',
+                                     author=self.author)
+        self.assertEqual(self.get(url).data['count'], 2)
+
+    def test_set_after_concurrent_change(self):
+        # данные прочитаны до изменения квиза и не сохраняются
+        token = payload_cache.begin()
+        payload_cache.bump(self.quiz.pk)
+        payload_cache.set('quiz', self.quiz.pk, self.quiz.pk, {}, token)
+        self.assertIsNone(payload_cache.get('quiz', self.quiz.pk))
+
+    def test_bump_after_commit(self):
+        url = f'/question/{self.question.pk}/'
+        self.get(url)
+        # до коммита версия прежняя: чтение в это время видит старые
+        # строки, и они не должны попасть в кэш под новой версией
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'title': 'Изменён'})
+            self.assertCached(url, True)
+        self.assertCached(url, False)
+
+    def test_move_question(self):
+        urls = [f'/questions/?quiz={quiz.pk}'
+                for quiz in (self.quiz, self.other_quiz)]
+        for url in urls:
+            self.get(url)
+        question = Questions.objects.get(pk=self.question.pk)
+        question.quiz = self.other_quiz
+        with self.captureOnCommitCallbacks(execute=True), \
+                self.assertNumQueries(1):
+            question.save(update_fields=['quiz'])
+        self.assertEqual([self.get(url).data['count'] for url in urls],
+                         [0, 1])
+
+    def test_author_rename(self):
+        url = f'/answer/{self.answer.pk}/'
+        self.get(url)
+        self.author.username = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+        self.assertEqual(self.get(url).data['author_name'], 'renamed')
+        # вход обновляет только last_login, кэш не сбрасывается
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save(update_fields=['last_login'])
+        self.assertCached(url, True)
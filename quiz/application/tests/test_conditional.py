@@ -0,0 +1,71 @@
+from ..models import Answers, Questions
+from .base import QuizTestCase
+
+
+class ConditionalGetTests(QuizTestCase):
+    """ETag меняется при любом изменении данных ответа"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.questions = [Questions.objects.create(
+            quiz=cls.quiz, title=f'Вопрос {i}', author=cls.author)
+            for i in range(3)]
+        cls.answer = Answers.objects.create(
+            question=cls.questions[0], text='Ответ', author=cls.author)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.author)
+
+    def assertNotModified(self, url, etag, expected=True):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304 if expected else 200)
+        return response
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        return response['ETag']
+
+    def test_not_modified(self):
+        for url in (f'/questions/?quiz={self.quiz.pk}',
+                    f'/question/{self.questions[0].pk}/',
+                    f'/answer/{self.answer.pk}/'):
+            with self.subTest(url=url):
+                etag = self.etag(url)
+                # 304 отдаётся без запросов к базе
+                with self.assertNumQueries(0):
+                    response = self.assertNotModified(url, etag)
+                self.assertEqual(response['ETag'], etag)
+                self.assertNotModified(url, '"другой"', False)
+
+    def test_list_after_delete(self):
+        url = f'/questions/?quiz={self.quiz.pk}'
+        etag = self.etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/question/{self.questions[-1].pk}/')
+        response = self.assertNotModified(url, etag, False)
+        self.assertEqual(response.data['count'], 2)
+        # Last-Modified не отдаётся, If-Modified-Since не даёт 304
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        ).status_code, 200)
+
+    def test_question_after_quiz_rename(self):
+        url = f'/question/{self.questions[0].pk}/'
+        etag = self.etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/quiz/{self.quiz.pk}/', {
+                'title': 'Новое имя', 'category': self.category.pk})
+        response = self.assertNotModified(url, etag, False)
+        self.assertEqual(response.data['quiz_title'], 'Новое имя')
+
+    def test_question_after_answer_change(self):
+        url = f'/question/{self.questions[0].pk}/'
+        etag = self.etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/answer/{self.answer.pk}/',
+                              {'text': 'Изменён'})
+        self.assertNotModified(url, etag, False)
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+
+from ..exporters import CSV_HEADER
+from ..models import Answers, Questions, Quizzes
+from .base import QuizTestCase
+
+
+class QuizExportTests(QuizTestCase):
+    """Потоковая выгрузка квизов и обратный импорт CSV"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_quiz, cls.target = [
+            Quizzes.objects.create(title=title, author=cls.author,
+                                   category=cls.category)
+            for title in ('Другой квиз', 'Копия')]
+        # два одинаковых вопроса подряд и вопрос без ответов
+        for title in ('Повтор', 'Повтор', 'Без ответов'):
+            question = Questions.objects.create(
+                quiz=cls.quiz, title=title, kind=1, author=cls.author)
+            if title == 'Повтор':
+                Answers.objects.create(question=question, text='Да',
+                                       is_right=True, author=cls.author)
+                Answers.objects.create(question=question, text='Нет',
+                                       author=cls.author)
+        Questions.objects.create(quiz=cls.other_quiz, title='Чужой',
+                                 author=cls.author)
+
+    def export(self, fmt, params):
+        response = self.client.get(f'/export/{fmt}/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def structure(self, quiz):
+        return [(question.title, question.kind, list(
+            question.answers.values_list('text', 'is_right')))
+            for question in quiz.questions.order_by('id')]
+
+    def test_jsonl(self):
+        rows = [json.loads(line) for line in self.export(
+            'jsonl', {'quiz': self.quiz.pk}).splitlines()]
+        self.assertEqual([(row['title'], len(row['answers']))
+                          for row in rows],
+                         [('Повтор', 2), ('Повтор', 2), ('Без ответов', 0)])
+        self.assertEqual(rows[0]['answers'][0]['text'], 'Да')
+        self.assertEqual(rows[0]['quiz_title'], 'Квиз')
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export(
+            'csv', {'quiz': [self.quiz.pk, self.other_quiz.pk]}))))
+        self.assertEqual(tuple(rows[0]), CSV_HEADER)
+        # строка на ответ, вопрос без ответов - одна строка
+        self.assertEqual(len(rows), 1 + 4 + 1 + 1)
+        self.assertEqual(
+            {row[0] for row in rows[1:]},
+            {str(self.quiz.pk), str(self.other_quiz.pk)})
+
+    def test_filters(self):
+        self.assertEqual(len(self.export(
+            'jsonl', {'quiz': self.other_quiz.pk}).splitlines()), 1)
+        self.assertEqual(self.export('jsonl', {'category': 'Нет такой'}), '')
+        self.assertEqual(self.client.get('/export/xml/').status_code, 404)
+
+    def test_csv_round_trip(self):
+        body = self.export('csv', {'quiz': self.quiz.pk})
+        self.client.force_authenticate(self.author)
+        response = self.client.post(
+            f'/questions/import/?quiz={self.target.pk}', body.encode(),
+            content_type='text/csv')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.structure(self.target),
+                         self.structure(self.quiz))
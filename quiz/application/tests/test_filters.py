@@ -0,0 +1,36 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from ..filters import CategoryFilter
+from ..models import Categories
+
+
+class CategoryFilterTests(APITestCase):
+    """Поиск категорий по имени: сначала совпадения по началу имени"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('Zalpha', 'Alpha', 'Gamma', 'Beta alpha', 'alpine'):
+            Categories.objects.create(name=name)
+
+    def names(self, params, status=200):
+        response = self.client.get('/categories/', params)
+        self.assertEqual(response.status_code, status, response.data)
+        if status != 200:
+            return response.data
+        return [category['name'] for category in response.data['results']]
+
+    def test_rank(self):
+        with CaptureQueriesContext(connection) as queries:
+            names = self.names({'name': 'ALP'})
+        self.assertEqual(names, ['Alpha', 'alpine', 'Zalpha', 'Beta alpha'])
+        # количество и страница, без UNION и подзапросов
+        self.assertEqual(len(queries), 2)
+
+    def test_limit(self):
+        self.assertEqual(self.names({'name': 'alp', 'limit': 2}),
+                         ['Alpha', 'alpine'])
+        self.assertEqual(self.names({'limit': 2}), ['Zalpha', 'Alpha'])
+        for limit in (0, CategoryFilter.MAX_LIMIT + 1):
+            self.assertIn('limit', self.names({'limit': limit}, status=400))
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from ..hashers import get_options, hashing_executor
+
+PASSWORD = 'Secr3t-pass!'
+
+
+class RehashOnLoginTests(APITestCase):
+    """Хеш пароля пересчитывается текущим хешером при успешном входе"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('student')
+
+    def login(self, password=PASSWORD):
+        return self.client.post('/login/', {'username': 'student',
+                                            'password': password})
+
+    def test_pbkdf2_upgraded(self):
+        self.user.password = make_password(PASSWORD,
+                                           hasher='pbkdf2_sha256')
+        self.user.save()
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$16384$'))
+
+    def test_work_factor_change(self):
+        self.user.set_password(PASSWORD)
+        self.user.save()
+        with override_settings(PASSWORD_HASHING={
+                **get_options(), 'SCRYPT_WORK_FACTOR': 2 ** 12}):
+            self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$4096$'))
+
+    def test_wrong_password_keeps_hash(self):
+        encoded = make_password(PASSWORD, hasher='pbkdf2_sha256')
+        self.user.password = encoded
+        self.user.save()
+        self.assertEqual(self.login('wrong').status_code, 401)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, encoded)
+
+
+class HashingExecutorTests(SimpleTestCase):
+    """Размер пула для хеширования под ASGI"""
+
+    def setUp(self):
+        hashing_executor.cache_clear()
+        self.addCleanup(hashing_executor.cache_clear)
+
+    def test_available_cpus(self):
+        # ядра, доступные процессу, а не os.cpu_count()
+        with override_settings(PASSWORD_HASHING={'THREADS': 0}), \
+                mock.patch('os.sched_getaffinity', return_value={0, 3}), \
+                mock.patch('os.cpu_count', return_value=64):
+            self.assertEqual(hashing_executor()._max_workers, 2)
+
+    def test_threads(self):
+        with override_settings(PASSWORD_HASHING={'THREADS': 3}):
+            self.assertEqual(hashing_executor()._max_workers, 3)
@@ -0,0 +1,71 @@
+import json
+
+from django.contrib.auth.models import User
+
+from ..models import Answers, Questions
+from ..sampling import question_sampler
+from .base import QuizTestCase
+
+
+class QuestionImportTests(QuizTestCase):
+    """Массовый импорт: всё в одной транзакции, ошибки по строкам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create_user('other', password='other')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.author)
+
+    def post(self, questions, status=201):
+        response = self.client.post(
+            '/questions/import/', {'quiz': self.quiz.pk,
+                                   'questions': questions}, format='json')
+        self.assertEqual(response.status_code, status, response.data)
+        return response.data
+
+    def test_import(self):
+        question_sampler.ids(self.quiz.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.post([
+                {'title': 'Первый', 'kind': 1, 'answers': [
+                    {'text': 'Да', 'is_right': True}, {'text': 'Нет'}]},
+                {'title': 'Второй', 'is_active': False},
+            ])
+        self.assertEqual((data['questions'], data['answers']), (2, 2))
+        first = Questions.objects.get(title='Первый')
+        self.assertEqual((first.kind, first.author_id), (1, self.author.pk))
+        self.assertEqual(list(first.answers.values_list('text', 'is_right')),
+                         [('Да', True), ('Нет', False)])
+        # bulk_create без post_save: индекс обновляет questions_imported
+        self.assertEqual(question_sampler.ids(self.quiz.pk), [first.pk])
+
+    def test_row_errors(self):
+        data = self.post([
+            {'title': 'Верный'},
+            {'kind': 5},
+            {'title': 'Ответ без текста', 'answers': [{'is_right': True}]},
+        ], status=400)
+        self.assertEqual([error['row'] for error in data['errors']], [2, 3])
+        self.assertIn('title', data['errors'][0]['errors'])
+        self.assertIn('kind', data['errors'][0]['errors'])
+        self.assertIn('answers', data['errors'][1]['errors'])
+        self.assertFalse(Questions.objects.exists())
+
+    def test_other_authors_quiz(self):
+        self.client.force_authenticate(self.other)
+        data = self.post([{'title': 'Чужой'}], status=400)
+        self.assertIn('quiz', data)
+        self.assertFalse(Questions.objects.exists())
+
+    def test_json_lines(self):
+        body = '\n'.join(json.dumps({'title': f'Вопрос {i}', 'answers': [
+            {'text': 'Ответ'}]}) for i in range(3))
+        response = self.client.post(
+            f'/questions/import/?quiz={self.quiz.pk}', body,
+            content_type='application/jsonl')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Questions.objects.count(), 3)
+        self.assertEqual(Answers.objects.count(), 3)
@@ -0,0 +1,118 @@
+import os
+import re
+import tempfile
+
+from django.test import override_settings
+
+from ..instrumentation import (MetricsRegistry, RequestTimings, _current,
+                               metrics, timed)
+from ..models import Answers, Questions
+from .base import QuizTestCase
+
+ENABLED = {'ENABLED': True}
+
+
+@override_settings(INSTRUMENTATION=ENABLED)
+class MetricsTests(QuizTestCase):
+    """ProfilingMiddleware и metrics/ в формате Prometheus"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        question = Questions.objects.create(quiz=cls.quiz, title='Вопрос',
+                                            author=cls.author)
+        Answers.objects.create(question=question, text='Ответ',
+                               author=cls.author)
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+
+    def scrape(self, **headers):
+        response = self.client.get('/metrics/', **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return response.content.decode()
+
+    def value(self, body, name, labels):
+        match = re.search(rf'^{name}{{{re.escape(labels)}}} (\S+)$', body,
+                          re.MULTILINE)
+        self.assertIsNotNone(match, f'{name}{{{labels}}}')
+        return float(match.group(1))
+
+    def test_request_recorded(self):
+        for _ in range(2):
+            self.client.get('/questions/', {'format': 'json'})
+        body = self.scrape()
+        labels = 'view="application:questions",method="GET"'
+        self.assertEqual(self.value(
+            body, 'quiz_request_duration_seconds_count', labels), 2)
+        self.assertEqual(self.value(
+            body, 'quiz_request_duration_seconds_bucket',
+            labels + ',le="+Inf"'), 2)
+        self.assertGreater(self.value(
+            body, 'quiz_request_queries_total', labels), 0)
+        self.assertGreater(self.value(
+            body, 'quiz_request_db_seconds_total', labels), 0)
+        self.assertGreater(self.value(
+            body, 'quiz_request_render_seconds_total', labels), 0)
+        self.assertEqual(self.value(
+            body, 'quiz_request_errors_total', labels), 0)
+
+    @override_settings(INSTRUMENTATION={**ENABLED, 'METRICS_TOKEN': 'secret'})
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(self.client.get(
+            '/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.scrape(HTTP_AUTHORIZATION='Bearer secret')
+
+    @override_settings(INSTRUMENTATION={'ENABLED': False})
+    def test_disabled(self):
+        self.client.get('/questions/')
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+        self.assertNotIn('quiz_request_duration_seconds_count',
+                         metrics.render())
+
+    def test_profile_dump(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(INSTRUMENTATION={
+                    **ENABLED, 'PROFILE_SAMPLE_RATE': 1.0,
+                    'PROFILE_THRESHOLD_MS': 0, 'PROFILE_DIR': directory}):
+                self.client.get('/questions/')
+            names = os.listdir(directory)
+        self.assertEqual(len(names), 1)
+        self.assertRegex(names[0], r'-GET-questions-\d+ms\.prof$')
+
+    def test_errors_and_buckets(self):
+        registry = MetricsRegistry()
+        timings = RequestTimings()
+        registry.record('view', 'GET', 500, 0.2, timings)
+        registry.record('view', 'GET', 200, 20, timings)
+        body = registry.render()
+        labels = 'view="view",method="GET"'
+        self.assertEqual(self.value(
+            body, 'quiz_request_errors_total', labels), 1)
+        self.assertEqual(self.value(
+            body, 'quiz_request_duration_seconds_bucket',
+            labels + ',le="0.25"'), 1)
+        self.assertEqual(self.value(
+            body, 'quiz_request_duration_seconds_bucket',
+            labels + ',le="10"'), 1)
+        self.assertEqual(self.value(
+            body, 'quiz_request_duration_seconds_count', labels), 2)
+
+    def test_timed(self):
+        # вне запроса ничего не измеряется
+        with timed('render'):
+            pass
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with timed('serializer'):
+                # вложенный блок того же вида не считается дважды
+                with timed('serializer'):
+                    pass
+        finally:
+            _current.reset(token)
+        self.assertGreater(timings.serializer, 0)
+        self.assertEqual(timings.active, set())
@@ -0,0 +1,94 @@
+from django.test import override_settings
+
+from ..models import Categories, Questions, Quizzes
+from ..pagination import StandardPagination
+from .base import QuizTestCase
+
+
+class PaginationTestCase(QuizTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.page_size = StandardPagination.page_size
+        Questions.objects.bulk_create(
+            Questions(quiz=cls.quiz, title=f'Вопрос {i}', author=cls.author)
+            for i in range(cls.page_size * 2 + 5))
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+
+class CursorPaginationTests(PaginationTestCase):
+    """Режим pagination=cursor"""
+
+    def test_pages(self):
+        data = self.get('/questions/', {'pagination': 'cursor'})
+        self.assertNotIn('count', data)
+        ids = [question['id'] for question in data['results']]
+        while data['next']:
+            data = self.get(data['next'])
+            ids += [question['id'] for question in data['results']]
+        self.assertEqual(ids, sorted(Questions.objects.values_list(
+            'id', flat=True)))
+        # по ссылке назад возвращается предыдущая страница
+        previous = self.get(data['previous'])
+        self.assertEqual(
+            [question['id'] for question in previous['results']],
+            ids[self.page_size:self.page_size * 2])
+
+    def test_ranked_list_falls_back_to_pages(self):
+        for name in ('Zalpha', 'Alpha', 'Beta alpha', 'Alpine'):
+            Categories.objects.create(name=name)
+        data = self.get('/categories/', {'name': 'alp',
+                                         'pagination': 'cursor'})
+        self.assertEqual(data['count'], 4)
+        self.assertEqual([category['name'] for category in data['results']],
+                         ['Alpha', 'Alpine', 'Zalpha', 'Beta alpha'])
+
+
+@override_settings(PAGINATION_COUNT={'STRATEGY': 'cached',
+                                     'THRESHOLD': 10, 'TTL': 30})
+class CountStrategyTests(PaginationTestCase):
+    """Количество точно до THRESHOLD, для больших выборок - из кэша"""
+
+    def create_quizzes(self, count):
+        Quizzes.objects.bulk_create(
+            Quizzes(title=f'Квиз {i}', author=self.author,
+                    category=self.category) for i in range(count))
+
+    def test_small_list_exact(self):
+        self.create_quizzes(5)
+        data = self.get('/quizzes/')
+        self.assertEqual((data['count'], data['count_exact']), (6, True))
+        self.create_quizzes(1)
+        self.assertEqual(self.get('/quizzes/')['count'], 7)
+
+    def test_large_list_cached(self):
+        self.create_quizzes(40)
+        data = self.get('/quizzes/')
+        self.assertEqual((data['count'], data['count_exact']), (41, True))
+        self.create_quizzes(30)
+        data = self.get('/quizzes/')
+        self.assertEqual((data['count'], data['count_exact']), (41, False))
+        # последняя страница при неточном количестве определяется
+        # по лишней строке, а не по count
+        data = self.get('/quizzes/', {'page': 2})
+        self.assertEqual(len(data['results']), self.page_size)
+        self.assertIsNotNone(data['next'])
+        data = self.get(data['next'])
+        self.assertEqual(len(data['results']), 71 - self.page_size * 2)
+        self.assertIsNone(data['next'])
+        # номер за последней страницей не проверяется
+        data = self.get('/quizzes/', {'page': 9})
+        self.assertEqual((data['results'], data['next']), ([], None))
+
+    @override_settings(PAGINATION_COUNT={'STRATEGY': 'exact'})
+    def test_exact(self):
+        self.create_quizzes(40)
+        self.get('/quizzes/')
+        self.create_quizzes(30)
+        data = self.get('/quizzes/')
+        self.assertEqual((data['count'], data['count_exact']), (71, True))
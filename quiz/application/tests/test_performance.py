@@ -0,0 +1,337 @@
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timezone
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models import Answers, Categories, Questions, Quizzes
+from ..sampling import question_sampler
+from ..search import question_index
+from ..urls import urlpatterns
+
+PERF_TESTS = bool(os.getenv('PERF_TESTS'))
+
+VOLUMES = {
+    'categories': int(os.getenv('PERF_CATEGORIES', 10)),
+    'quizzes': int(os.getenv('PERF_QUIZZES', 100)),
+    'questions': int(os.getenv('PERF_QUESTIONS', 100000)),
+    'answers': int(os.getenv('PERF_ANSWERS', 4)),
+}
+ITERATIONS = int(os.getenv('PERF_ITERATIONS', 20))
+# множитель бюджетов времени для более медленных машин
+LATENCY_FACTOR = float(os.getenv('PERF_LATENCY_FACTOR', 1))
+REPORT = os.getenv('PERF_REPORT', 'perf-report.json')
+
+PASSWORD = 'perf-password'
+TOPICS = ('история', 'география', 'физика', 'химия', 'биология',
+          'литература', 'музыка', 'спорт')
+
+# (имя маршрута, метод) -> (запросов к базе, p50 мс, p95 мс).
+# Кэши очищаются перед каждым запросом, поэтому бюджеты
+# рассчитаны на самый медленный путь
+BUDGETS = {
+    ('root', 'GET'): (0, 5, 10),
+    ('register', 'POST'): (4, 600, 1000),
+    ('token_obtain_pair', 'POST'): (2, 600, 1000),
+    ('token_refresh', 'POST'): (0, 10, 20),
+    ('categories', 'GET'): (2, 20, 40),
+    ('quizzes', 'GET'): (2, 20, 40),
+    ('quiz', 'GET'): (1, 10, 20),
+    ('quiz', 'PATCH'): (5, 20, 40),
+    ('quiz', 'DELETE'): (8, 50, 100),
+    ('quiz-snapshot', 'GET'): (4, 150, 300),
+    ('export', 'GET'): (4, 300, 600),
+    ('questions', 'GET'): (4, 30, 60),
+    ('questions', 'POST'): (4, 20, 40),
+    ('questions-import', 'POST'): (8, 200, 400),
+    ('question', 'GET'): (2, 10, 20),
+    ('question', 'PATCH'): (4, 20, 40),
+    ('question', 'DELETE'): (6, 20, 40),
+    ('random', 'GET'): (3, 15, 30),
+    ('random-session', 'GET'): (3, 30, 60),
+    ('search', 'GET'): (4, 100, 200),
+    ('add-answer', 'POST'): (3, 20, 40),
+    ('answer', 'GET'): (1, 10, 20),
+    ('answer', 'PATCH'): (3, 20, 40),
+    ('answer', 'DELETE'): (4, 20, 40),
+    ('metrics', 'GET'): (0, 10, 20),
+    ('async-quizzes', 'GET'): (2, 20, 40),
+    ('async-quiz', 'GET'): (1, 10, 20),
+    ('async-questions', 'GET'): (4, 30, 60),
+    ('async-random', 'GET'): (3, 15, 30),
+}
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+@skipUnless(PERF_TESTS, 'нагрузочные тесты включаются PERF_TESTS=1')
+class PerformanceTests(APITestCase):
+    """
+    Бюджеты запросов к базе и задержки (p50/p95) для всех маршрутов
+    application на реалистичном объёме данных (PERF_QUESTIONS вопросов).
+    Результаты сохраняются в JSON (PERF_REPORT) для сравнения запусков
+    """
+    results = []
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # индексы в памяти процесса прогреваются заранее,
+        # как в работающем сервере
+        question_index.load()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.write_report()
+        # данные откатились, индексы перечитываются из пустой базы
+        question_index.load()
+        question_sampler.invalidate()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('perf', password=PASSWORD)
+        cls.other = User.objects.create_user('perf-other', password=PASSWORD)
+        categories = Categories.objects.bulk_create(
+            Categories(name=f'Категория {i}')
+            for i in range(VOLUMES['categories']))
+        quizzes = Quizzes.objects.bulk_create(
+            Quizzes(title=f'Квиз {i}', author=cls.author,
+                    category=categories[i % len(categories)])
+            for i in range(VOLUMES['quizzes']))
+        per_quiz = max(1, VOLUMES['questions'] // len(quizzes))
+        questions = Questions.objects.bulk_create(
+            (Questions(quiz=quizzes[min(i // per_quiz, len(quizzes) - 1)],
+                       author=cls.author,
+                       title=f'Вопрос {i}: {TOPICS[i % len(TOPICS)]}',
+                       kind=i % 2, difficulty=i % 5, is_active=bool(i % 10))
+             for i in range(VOLUMES['questions'])),
+            batch_size=2000)
+        Answers.objects.bulk_create(
+            (Answers(question_id=question.pk, author=cls.author,
+                     text=f'Ответ {j}: {TOPICS[(question.pk + j) % 8]}',
+                     is_right=j == 0)
+             for question in questions for j in range(VOLUMES['answers'])),
+            batch_size=2000)
+        cls.quiz = quizzes[0]
+        # средняя страница списка вопросов квиза
+        cls.page = max(1, per_quiz // 30 // 2)
+        cls.question = questions[1]
+        cls.answer = Answers.objects.filter(question=cls.question).first()
+
+    def setUp(self):
+        self.token = RefreshToken.for_user(self.author)
+
+    def clear_caches(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def authorize(self, user):
+        if user is None:
+            self.client.credentials()
+        else:
+            token = RefreshToken.for_user(user).access_token
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def measure(self, name, method, request, prepare=None, user=None,
+                status=200):
+        """
+        Выполняет request(fixture) ITERATIONS раз с пустыми кэшами
+        (prepare() готовит данные для запроса вне замера),
+        сравнивает число запросов к базе и задержку с BUDGETS.
+        Первый, прогревочный запрос в замер не входит
+        """
+        queries_budget, p50_budget, p95_budget = BUDGETS[(name, method)]
+        self.authorize(user)
+        timings, queries = [], 0
+        for iteration in range(ITERATIONS + 1):
+            fixture = prepare() if prepare else None
+            self.clear_caches()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = request(fixture)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - start) * 1000)
+            self.assertEqual(response.status_code, status,
+                             getattr(response, 'content', b'')[:500])
+            if iteration == 0:
+                timings.clear()
+                continue
+            queries = max(queries, len(captured))
+
+        result = {
+            'route': name,
+            'method': method,
+            'queries': queries,
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'max_ms': round(max(timings), 3),
+            'budget_queries': queries_budget,
+            'budget_p50_ms': p50_budget * LATENCY_FACTOR,
+            'budget_p95_ms': p95_budget * LATENCY_FACTOR,
+        }
+        result['passed'] = (
+            result['queries'] <= result['budget_queries']
+            and result['p50_ms'] <= result['budget_p50_ms']
+            and result['p95_ms'] <= result['budget_p95_ms'])
+        self.results.append(result)
+
+        self.assertLessEqual(queries, queries_budget, f'{method} {name}')
+        self.assertLessEqual(result['p50_ms'], result['budget_p50_ms'],
+                             f'{method} {name} p50')
+        self.assertLessEqual(result['p95_ms'], result['budget_p95_ms'],
+                             f'{method} {name} p95')
+
+    @classmethod
+    def write_report(cls):
+        report = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'volumes': VOLUMES,
+            'iterations': ITERATIONS,
+            'latency_factor': LATENCY_FACTOR,
+            'results': sorted(cls.results,
+                              key=lambda r: (r['route'], r['method'])),
+        }
+        with open(REPORT, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def new_quiz(self):
+        quiz = Quizzes.objects.create(title='Удаляемый', author=self.author,
+                                      category=self.quiz.category)
+        for _ in range(10):
+            self.new_question(quiz)
+        return quiz
+
+    def new_question(self, quiz=None):
+        question = Questions.objects.create(quiz=quiz or self.quiz,
+                                            title='Новый', author=self.author)
+        Answers.objects.bulk_create(
+            Answers(question=question, text=f'Ответ {j}',
+                    author=self.author) for j in range(VOLUMES['answers']))
+        return question
+
+    def test_budgets_cover_all_routes(self):
+        routes = {pattern.name for pattern in urlpatterns}
+        self.assertEqual(routes, {name for name, _ in BUDGETS})
+
+    def test_root(self):
+        self.measure('root', 'GET', lambda _: self.client.get('/'))
+
+    def test_auth(self):
+        counter = iter(range(ITERATIONS + 1))
+        self.measure(
+            'register', 'POST', lambda i: self.client.post('/register/', {
+                'username': f'user{i}', 'email': f'user{i}@example.com',
+                'password': 'Sup3r-secret!', 'password2': 'Sup3r-secret!',
+                'first_name': 'Имя', 'last_name': 'Фамилия'}),
+            prepare=lambda: next(counter), status=201)
+        self.measure(
+            'token_obtain_pair', 'POST', lambda _: self.client.post(
+                '/login/', {'username': 'perf', 'password': PASSWORD}))
+        self.measure(
+            'token_refresh', 'POST', lambda _: self.client.post(
+                '/refresh/', {'refresh': str(self.token)}))
+
+    def test_quizzes(self):
+        self.measure('categories', 'GET',
+                     lambda _: self.client.get('/categories/'))
+        self.measure('quizzes', 'GET',
+                     lambda _: self.client.get('/quizzes/'))
+        self.measure('quiz', 'GET',
+                     lambda _: self.client.get(f'/quiz/{self.quiz.pk}/'))
+        counter = iter(range(ITERATIONS + 1))
+        self.measure('quiz', 'PATCH', lambda i: self.client.patch(
+            f'/quiz/{self.quiz.pk}/', {'title': f'Квиз 0 ({i})',
+                                       'category': self.quiz.category_id}),
+            prepare=lambda: next(counter), user=self.author)
+        self.measure(
+            'quiz', 'DELETE',
+            lambda quiz: self.client.delete(f'/quiz/{quiz.pk}/'),
+            prepare=self.new_quiz, user=self.author, status=204)
+
+    def test_quiz_snapshot_and_export(self):
+        self.measure('quiz-snapshot', 'GET', lambda _: self.client.get(
+            f'/quiz/{self.quiz.pk}/snapshot/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.measure('export', 'GET', lambda _: self.client.get(
+            f'/export/jsonl/?quiz={self.quiz.pk}'))
+
+    def test_questions(self):
+        self.measure('questions', 'GET', lambda _: self.client.get(
+            f'/questions/?quiz={self.quiz.pk}&page={self.page}'))
+        self.measure('questions', 'POST', lambda _: self.client.post(
+            '/questions/', {'quiz': self.quiz.pk, 'title': 'Новый'}),
+            user=self.author, status=201)
+        self.measure('questions-import', 'POST', lambda _: self.client.post(
+            '/questions/import/', {'quiz': self.quiz.pk, 'questions': [
+                {'title': f'Импорт {i}', 'answers': [
+                    {'text': 'Да', 'is_right': True},
+                    {'text': 'Нет', 'is_right': False}]}
+                for i in range(100)]}, format='json'),
+            user=self.author, status=201)
+
+    def test_question(self):
+        self.measure('question', 'GET', lambda _: self.client.get(
+            f'/question/{self.question.pk}/'))
+        self.measure('question', 'PATCH', lambda _: self.client.patch(
+            f'/question/{self.question.pk}/', {'title': 'Изменён'}),
+            user=self.author)
+        self.measure(
+            'question', 'DELETE',
+            lambda question: self.client.delete(f'/question/{question.pk}/'),
+            prepare=self.new_question, user=self.author, status=204)
+
+    def test_random(self):
+        self.measure('random', 'GET', lambda _: self.client.get(
+            f'/random/{self.quiz.pk}/'))
+        self.measure('random-session', 'GET', lambda _: self.client.get(
+            f'/random/{self.quiz.pk}/session/?seed=1&cursor=10&size=10'))
+
+    def test_search(self):
+        self.measure('search', 'GET', lambda _: self.client.get(
+            '/search/?q=история'))
+
+    def test_answers(self):
+        self.measure('add-answer', 'POST', lambda _: self.client.post(
+            '/answer/', {'question': self.question.pk, 'text': 'Новый',
+                         'is_right': False}),
+            user=self.author, status=201)
+        self.measure('answer', 'GET', lambda _: self.client.get(
+            f'/answer/{self.answer.pk}/'))
+        self.measure('answer', 'PATCH', lambda _: self.client.patch(
+            f'/answer/{self.answer.pk}/', {'text': 'Изменён'}),
+            user=self.author)
+        self.measure(
+            'answer', 'DELETE',
+            lambda answer: self.client.delete(f'/answer/{answer.pk}/'),
+            prepare=lambda: Answers.objects.create(
+                question=self.question, text='Удаляемый', author=self.author),
+            user=self.author, status=204)
+
+    def test_async(self):
+        self.measure('async-quizzes', 'GET',
+                     lambda _: self.client.get('/async/quizzes/'))
+        self.measure('async-quiz', 'GET', lambda _: self.client.get(
+            f'/async/quiz/{self.quiz.pk}/'))
+        self.measure('async-questions', 'GET', lambda _: self.client.get(
+            f'/async/questions/?quiz={self.quiz.pk}&page={self.page}'))
+        self.measure('async-random', 'GET', lambda _: self.client.get(
+            f'/async/random/{self.quiz.pk}/'))
+
+    @override_settings(INSTRUMENTATION={'ENABLED': True})
+    def test_metrics(self):
+        self.measure('metrics', 'GET', lambda _: self.client.get('/metrics/'))
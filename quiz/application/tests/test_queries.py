@@ -0,0 +1,191 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from ..authentication import token_cache
+from ..backends import connection_stats
+from ..models import Answers, Questions, Quizzes
+from ..serializers import ClaimsTokenObtainPairSerializer
+from .base import QuizTestCase
+
+
+class QueryCountTestCase(QuizTestCase):
+    """
+    Проверяет, что количество запросов к базе у эндпоинта
+    не зависит от количества строк: каждый запрос выполняется
+    на маленьком и большом квизе, кэши перед запросом очищаются
+    """
+    sizes = (1, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create_user('other', password='other')
+        cls.fixtures = [cls.seed(size) for size in cls.sizes]
+
+    @classmethod
+    def seed(cls, size):
+        """
+        Квиз с size вопросами, у каждого из которых size ответов
+        """
+        quiz = Quizzes.objects.create(title=f'Квиз {size}',
+                                      category=cls.category,
+                                      author=cls.author)
+        questions = Questions.objects.bulk_create(
+            Questions(quiz=quiz, title=f'Вопрос {i}', author=cls.author)
+            for i in range(size))
+        Answers.objects.bulk_create(
+            Answers(question=question, text=f'Ответ {i}',
+                    is_right=i == 0, author=cls.author)
+            for question in questions for i in range(size))
+        question = questions[0]
+        return {'quiz': quiz.pk, 'question': question.pk,
+                'answer': question.answers.first().pk}
+
+    def assertQueriesPerRequest(self, expected, request, user=None,
+                                status=200):
+        """
+        request(fixture) выполняет запрос к API для каждого
+        размера квиза, ожидается ровно expected запросов к базе
+        """
+        self.client.force_authenticate(user=user)
+        for size, fixture in zip(self.sizes, self.fixtures):
+            self.setUp()
+            with CaptureQueriesContext(connection) as queries:
+                response = request(fixture)
+            self.assertEqual(response.status_code, status, response.content)
+            self.assertEqual(
+                len(queries), expected,
+                f'{size} строк: ' + '\n'.join(
+                    query['sql'] for query in queries.captured_queries))
+
+
+class ReadQueryCountTests(QueryCountTestCase):
+
+    def test_quiz_list(self):
+        self.assertQueriesPerRequest(
+            2, lambda fixture: self.client.get('/quizzes/'))
+
+    def test_quiz_detail(self):
+        self.assertQueriesPerRequest(
+            1, lambda fixture: self.client.get(f'/quiz/{fixture["quiz"]}/'))
+
+    def test_questions(self):
+        self.assertQueriesPerRequest(
+            4, lambda fixture: self.client.get(
+                f'/questions/?quiz={fixture["quiz"]}'))
+
+    def test_question_detail(self):
+        self.assertQueriesPerRequest(
+            2, lambda fixture: self.client.get(
+                f'/question/{fixture["question"]}/'))
+
+    def test_random_question(self):
+        self.assertQueriesPerRequest(
+            3, lambda fixture: self.client.get(
+                f'/random/{fixture["quiz"]}/'))
+
+    def test_answer_detail(self):
+        self.assertQueriesPerRequest(
+            1, lambda fixture: self.client.get(
+                f'/answer/{fixture["answer"]}/'))
+
+
+class WriteQueryCountTests(QueryCountTestCase):
+
+    def test_create_question(self):
+        self.assertQueriesPerRequest(
+            3, lambda fixture: self.client.post(
+                '/questions/', {'quiz': fixture['quiz'], 'title': 'Новый'}),
+            user=self.author, status=201)
+
+    def test_update_question(self):
+        self.assertQueriesPerRequest(
+            3, lambda fixture: self.client.patch(
+                f'/question/{fixture["question"]}/', {'title': 'Изменён'}),
+            user=self.author)
+
+    def test_update_question_by_other_user(self):
+        self.assertQueriesPerRequest(
+            1, lambda fixture: self.client.patch(
+                f'/question/{fixture["question"]}/', {'title': 'Изменён'}),
+            user=self.other, status=403)
+
+    def test_create_answer(self):
+        self.assertQueriesPerRequest(
+            2, lambda fixture: self.client.post(
+                '/answer/', {'question': fixture['question'],
+                             'text': 'Новый', 'is_right': False}),
+            user=self.author, status=201)
+
+    def test_update_answer(self):
+        self.assertQueriesPerRequest(
+            2, lambda fixture: self.client.patch(
+                f'/answer/{fixture["answer"]}/', {'text': 'Изменён'}),
+            user=self.author)
+
+    def test_update_answer_by_other_user(self):
+        self.assertQueriesPerRequest(
+            1, lambda fixture: self.client.patch(
+                f'/answer/{fixture["answer"]}/', {'text': 'Изменён'}),
+            user=self.other, status=403)
+
+
+class JWTQueryCountTests(QueryCountTestCase):
+    """
+    StatelessJWTAuthentication: на чтение пользователь не загружается,
+    на изменение загружается одним запросом
+    """
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        token = ClaimsTokenObtainPairSerializer.get_token(self.author)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def test_quiz_detail(self):
+        self.assertQueriesPerRequest(
+            1, lambda fixture: self.client.get(f'/quiz/{fixture["quiz"]}/'))
+
+    def test_update_question(self):
+        self.assertQueriesPerRequest(
+            4, lambda fixture: self.client.patch(
+                f'/question/{fixture["question"]}/', {'title': 'Изменён'}))
+
+    def test_token_cache(self):
+        for _ in range(3):
+            self.client.get('/categories/')
+        self.assertEqual(token_cache.stats(), {'misses': 1, 'hits': 2})
+
+
+@override_settings(INSTRUMENTATION={'ENABLED': True})
+class ConnectionMetricsTests(APITestCase):
+    """
+    Переиспользование соединения и проверки CONN_HEALTH_CHECKS
+    в метриках (тестовый клиент не закрывает соединение после запроса)
+    """
+
+    def setUp(self):
+        connection_stats.reset()
+
+    def test_reused_connection(self):
+        for _ in range(2):
+            self.client.get('/quizzes/')
+        stats = connection_stats.stats()['default']
+        self.assertEqual((stats['new'], stats['reused']), (0, 2))
+        self.assertIn(
+            'quiz_db_connections_total{alias="default",result="reused"} 2',
+            self.client.get('/metrics/').content.decode())
+
+    def test_health_check(self):
+        # как после close_old_connections в конце предыдущего запроса
+        connection.health_check_enabled = True
+        connection.health_check_done = False
+        self.client.get('/quizzes/')
+        stats = connection_stats.stats()['default']
+        self.assertEqual(
+            (stats['health_checks'], stats['health_check_failures']), (1, 0))
+        self.assertEqual(stats['reused'], 1)
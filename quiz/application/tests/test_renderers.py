@@ -0,0 +1,180 @@
+import datetime
+import io
+import json
+import uuid
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from .. import renderers
+from ..models import Answers, Questions
+from ..parsers import FastJSONParser
+from ..renderers import (FastJSONRenderer, MessagePackRenderer,
+                         from_columns, msgpack, to_columns)
+from .base import QuizTestCase
+
+DATA = {
+    'text': 'Вопрос "в кавычках" \u2028 \u2029 <tag> \\ /',
+    'lazy': _('Тип'),
+    'decimal': Decimal('1.5'),
+    'datetime': datetime.datetime(2023, 1, 2, 3, 4, 5, 678901,
+                                  tzinfo=datetime.timezone.utc),
+    'date': datetime.date(2023, 1, 2),
+    'time': datetime.time(3, 4, 5),
+    'uuid': uuid.UUID(int=1),
+    'numbers': [0, -1, 2 ** 53, 0.25, True, False, None],
+    'nested': [{'id': 1, 'answers': []}, (1, 2)],
+    1: 'числовой ключ',
+}
+
+
+class FastJSONTests(QuizTestCase):
+    """FastJSONRenderer и FastJSONParser совпадают со стандартными"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number in range(3):
+            question = Questions.objects.create(
+                quiz=cls.quiz, title=f'Вопрос {number}', author=cls.author)
+            Answers.objects.create(question=question, text='Ответ',
+                                   author=cls.author)
+
+    def assertSameBytes(self, data, **context):
+        self.assertEqual(FastJSONRenderer().render(data, **context),
+                         JSONRenderer().render(data, **context))
+
+    @skipIf(renderers.orjson is None, 'orjson не установлен')
+    def test_orjson_used(self):
+        with mock.patch.object(renderers.orjson, 'dumps',
+                               wraps=renderers.orjson.dumps) as dumps:
+            self.assertSameBytes(DATA)
+        dumps.assert_called_once()
+
+    def test_render_parity(self):
+        self.assertSameBytes(DATA)
+        self.assertSameBytes([])
+        self.assertSameBytes(None)
+        # отступы обрабатывает стандартный json
+        self.assertSameBytes(DATA, accepted_media_type='application/json; '
+                                                       'indent=4')
+
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertSameBytes(DATA)
+            stream = io.BytesIO(JSONRenderer().render(DATA))
+            self.assertEqual(FastJSONParser().parse(stream)['text'],
+                             DATA['text'])
+
+    def test_response(self):
+        response = self.client.get('/questions/', {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content,
+                         JSONRenderer().render(response.data))
+
+    def test_parse_parity(self):
+        body = JSONRenderer().render(DATA)
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)),
+                         JSONParser().parse(io.BytesIO(body)))
+        for body in (b'{"a": ', b'NaN', b'\xff'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
+
+    def test_parse_other_encoding(self):
+        body = '{"title": "Вопрос"}'.encode('cp1251')
+        self.assertEqual(FastJSONParser().parse(
+            io.BytesIO(body), parser_context={'encoding': 'cp1251'}),
+            {'title': 'Вопрос'})
+
+    def test_request(self):
+        self.client.force_authenticate(User.objects.get())
+        response = self.client.post('/questions/', b'{"title": ',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.data['detail'])
+
+
+@skipIf(msgpack is None, 'msgpack не установлен')
+class MessagePackTests(QuizTestCase):
+    """MessagePack: те же данные, что и в JSON, answers по столбцам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.question = Questions.objects.create(
+            quiz=cls.quiz, title='Вопрос', author=cls.author)
+        for text, is_right in (('Да', True), ('Нет', False)):
+            Answers.objects.create(question=cls.question, text=text,
+                                   is_right=is_right, author=cls.author)
+        Questions.objects.create(quiz=cls.quiz, title='Без ответов',
+                                 author=cls.author)
+
+    def assertSameData(self, url):
+        packed = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(packed.status_code, 200)
+        self.assertEqual(packed['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(packed.content, raw=False)
+        self.assertEqual(from_columns(data, ('answers',)),
+                         self.client.get(url, {'format': 'json'}).json())
+        return data
+
+    def test_columns(self):
+        rows = [{'id': 1, 'text': 'Да'}, {'id': 2, 'text': 'Нет'}]
+        data = {'results': [{'answers': rows}, {'answers': []}],
+                'title': 'Квиз'}
+        columns = to_columns(data, ('answers',))
+        self.assertEqual(columns['results'][0]['answers'],
+                         {'id': [1, 2], 'text': ['Да', 'Нет']})
+        self.assertEqual(from_columns(columns, ('answers',)), data)
+        # без списков answers данные не копируются
+        self.assertIs(to_columns(data['results'][1], ('answers',)),
+                      data['results'][1])
+
+    def test_responses(self):
+        data = self.assertSameData('/questions/')
+        self.assertEqual(data['results'][0]['answers'],
+                         {'id': [answer.pk for answer in
+                                 self.question.answers.order_by('id')],
+                          'text': ['Да', 'Нет'], 'is_right': [True, False]})
+        self.assertEqual(data['results'][1]['answers'], [])
+        self.assertSameData(f'/question/{self.question.pk}/')
+        self.assertSameData(f'/quiz/{self.quiz.pk}/')
+        self.assertEqual(self.client.get(
+            '/quizzes/', {'format': 'msgpack'})['Content-Type'],
+            'application/msgpack')
+
+    def test_encoding(self):
+        # типы вне MessagePack кодируются так же, как в JSON
+        data = {key: value for key, value in DATA.items()
+                if isinstance(key, str)}
+        self.assertEqual(
+            msgpack.unpackb(MessagePackRenderer().render(data), raw=False),
+            json.loads(JSONRenderer().render(data)))
+
+    def test_smaller_than_json(self):
+        packed = self.client.get('/questions/',
+                                 HTTP_ACCEPT='application/msgpack')
+        plain = self.client.get('/questions/', {'format': 'json'})
+        self.assertLess(len(packed.content), len(plain.content))
+
+    def test_parse(self):
+        self.client.force_authenticate(self.author)
+        columns = {'text': ['Да', 'Нет'], 'is_right': [True, False]}
+        rows = [{'text': 'Да', 'is_right': True},
+                {'text': 'Нет', 'is_right': False}]
+        for answers in (columns, rows):
+            response = self.client.post(
+                '/questions/import/', msgpack.packb({
+                    'quiz': self.quiz.pk,
+                    'questions': [{'title': 'Новый', 'answers': answers}]}),
+                content_type='application/msgpack')
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(response.data['answers'], 2)
+        response = self.client.post('/questions/import/', b'\xc1',
+                                    content_type='application/msgpack')
+        self.assertEqual(response.status_code, 400)
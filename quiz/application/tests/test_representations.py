@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+
+from ..models import Answers, Questions, Quizzes
+from ..representations import (question_rows, quiz_rows,
+                               represent_questions, represent_quizzes)
+from ..serializers import QuestionSerializer, QuizSerializer
+from .base import QuizTestCase
+
+
+class FastReadPathTests(QuizTestCase):
+    """Быстрое чтение совпадает с сериализаторами по байтам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create_user('other', password='other')
+        other_quiz = Quizzes.objects.create(
+            title='Другой "квиз"', author=cls.author, category=cls.category)
+        cls.questions = [
+            Questions.objects.create(quiz=cls.quiz, title='Вопрос ',
+                                     kind=1, difficulty=3,
+                                     author=cls.author),
+            Questions.objects.create(quiz=other_quiz, title='Без ответов',
+                                     is_active=False, author=cls.other),
+            Questions.objects.create(quiz=cls.quiz, title='Ещё вопрос',
+                                     difficulty=2, author=cls.other),
+        ]
+        for question in cls.questions[::2]:
+            for text, is_right in (('Да', True), ('Нет', False)):
+                Answers.objects.create(question=question, text=text,
+                                       is_right=is_right, author=cls.author)
+
+    def queryset(self):
+        return Questions.objects.prefetch_related('answers').select_related(
+            'quiz', 'author').order_by('id')
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def expected(self, queryset):
+        return self.render(QuestionSerializer(queryset, many=True).data)
+
+    def test_rows(self):
+        queryset = self.queryset()
+        self.assertEqual(
+            self.render(represent_questions(question_rows(queryset))),
+            self.expected(queryset))
+        self.assertEqual(represent_questions(question_rows(
+            queryset.none())), [])
+
+    def test_list(self):
+        response = self.client.get('/questions/', {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.render(response.data['results']),
+                         self.expected(self.queryset()))
+
+    def test_detail(self):
+        for question in self.questions:
+            response = self.client.get(f'/question/{question.pk}/',
+                                       {'format': 'json'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                self.render([response.data]),
+                self.expected(self.queryset().filter(pk=question.pk)))
+        self.assertEqual(self.client.get('/question/0/').status_code, 404)
+
+    def test_quizzes(self):
+        queryset = Quizzes.objects.select_related('category', 'author')
+        expected = self.render(QuizSerializer(queryset, many=True).data)
+        self.assertEqual(self.render(represent_quizzes(quiz_rows(queryset))),
+                         expected)
+        response = self.client.get('/quizzes/', {'format': 'json'})
+        self.assertEqual(self.render(response.data['results']), expected)
+        response = self.client.get(f'/quiz/{self.quiz.pk}/',
+                                   {'format': 'json'})
+        self.assertEqual(self.render([response.data]), self.render(
+            QuizSerializer([self.quiz], many=True).data))
@@ -0,0 +1,130 @@
+from ..models import Questions, Quizzes
+from ..sampling import QuestionSampler, question_sampler
+from .base import QuizTestCase
+
+
+class SamplingTestCase(QuizTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_quiz = Quizzes.objects.create(
+            title='Другой квиз', author=cls.author, category=cls.category)
+        cls.questions = [cls.create_question(f'Вопрос {i}')
+                         for i in range(5)]
+
+    @classmethod
+    def create_question(cls, title, quiz=None, is_active=True):
+        return Questions.objects.create(quiz=quiz or cls.quiz, title=title,
+                                        is_active=is_active,
+                                        author=cls.author)
+
+class QuestionSamplerTests(SamplingTestCase):
+    """Индекс id вопросов поддерживается сигналами модели Questions"""
+
+    def active_ids(self, quiz):
+        return set(Questions.objects.filter(
+            quiz=quiz, is_active=True).values_list('id', flat=True))
+
+    def test_pick(self):
+        ids = self.active_ids(self.quiz)
+        picked = {question_sampler.pick(self.quiz.pk) for _ in range(50)}
+        self.assertLessEqual(picked, ids)
+        self.assertIsNone(question_sampler.pick(0))
+
+    def test_index_follows_changes(self):
+        question_sampler.ids(self.quiz.pk)
+        question_sampler.ids(self.other_quiz.pk)
+        added = self.create_question('Новый')
+        self.create_question('Неактивный', is_active=False)
+        deactivated, moved, deleted = self.questions[:3]
+        deactivated.is_active = False
+        deactivated.save()
+        moved.quiz = self.other_quiz
+        moved.save()
+        deleted.delete()
+
+        self.assertIn(added.pk, question_sampler.ids(self.quiz.pk))
+        self.assertCountEqual(question_sampler.ids(self.quiz.pk),
+                              self.active_ids(self.quiz))
+        self.assertCountEqual(question_sampler.ids(self.other_quiz.pk),
+                              [moved.pk])
+
+    def test_reload_after_ttl(self):
+        # изменения без сигналов (queryset.update, другой процесс)
+        sampler = QuestionSampler(ttl=60)
+        sampler.ids(self.quiz.pk)
+        Questions.objects.filter(pk=self.questions[0].pk).update(
+            is_active=False)
+        self.assertIn(self.questions[0].pk, sampler.ids(self.quiz.pk))
+        sampler._loaded_at[self.quiz.pk] -= 61
+        self.assertNotIn(self.questions[0].pk, sampler.ids(self.quiz.pk))
+
+    def test_random_question(self):
+        response = self.client.get(f'/random/{self.quiz.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertIn(response.data['results'][0]['id'],
+                      self.active_ids(self.quiz))
+
+    def test_random_question_stale_index(self):
+        question_sampler.ids(self.quiz.pk)
+        Questions.objects.filter(quiz=self.quiz).update(is_active=False)
+        response = self.client.get(f'/random/{self.quiz.pk}/')
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(self.client.get('/random/abc/').data['count'], 0)
+
+
+class QuestionSessionTests(SamplingTestCase):
+    """Выдача вопросов сессии: без повторов, порядок задан seed"""
+
+    def fetch(self, cursor, seed=7, size=2):
+        response = self.client.get(
+            f'/random/{self.quiz.pk}/session/',
+            {'seed': seed, 'cursor': cursor, 'size': size})
+        self.assertEqual(response.status_code, 200, response.data)
+        return ([question['id'] for question in response.data['results']],
+                response.data['cursor'])
+
+    def walk(self, cursor=0, **params):
+        served = []
+        while cursor is not None:
+            ids, cursor = self.fetch(cursor, **params)
+            served += ids
+        return served
+
+    def test_pages_without_duplicates(self):
+        served = self.walk()
+        self.assertEqual(len(served), len(set(served)))
+        self.assertCountEqual(served, [q.pk for q in self.questions])
+        self.assertEqual(self.walk(size=3), served)
+        self.assertNotEqual(self.walk(seed=8), served)
+
+    def test_order_independent_of_index(self):
+        # у каждого воркера свой индекс со своим порядком id
+        first, second = QuestionSampler(), QuestionSampler()
+        first.load(self.quiz.pk)
+        second._store(self.quiz.pk,
+                      [question.pk for question in reversed(self.questions)])
+        self.assertEqual(first.permutation(self.quiz.pk, 7),
+                         second.permutation(self.quiz.pk, 7))
+
+    def test_stable_when_questions_change(self):
+        order = self.walk()
+        first_page, cursor = self.fetch(0)
+        unserved = order[len(first_page):]
+        removed = Questions.objects.get(pk=unserved[-1])
+        removed.delete()
+        added = [self.create_question(f'Новый {i}') for i in range(10)]
+
+        rest = self.walk(cursor)
+        served = first_page + rest
+        self.assertEqual(len(served), len(set(served)))
+        # оставшиеся вопросы идут в прежнем порядке, новые - между ними
+        self.assertEqual([pk for pk in rest if pk in order],
+                         unserved[:-1])
+        keys = [QuestionSampler.session_key(7, pk) for pk in served]
+        self.assertEqual(keys, sorted(keys))
+        self.assertLessEqual(
+            {q.pk for q in added if QuestionSampler.session_key(7, q.pk)
+             >= cursor}, set(rest))
@@ -0,0 +1,84 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from ..models import Answers, Questions, Quizzes
+from ..search import InvertedIndex, question_index
+from .base import QuizTestCase
+
+
+@override_settings(SEARCH_BACKEND='python')
+class PythonSearchTests(QuizTestCase):
+    """Поиск по обратному индексу в памяти процесса"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create_user('other', password='other')
+        cls.other_quiz = Quizzes.objects.create(
+            title='Другой квиз', author=cls.author, category=cls.category)
+        cls.popular = [cls.create_question('python python python')
+                       for _ in range(3)]
+        cls.other_question = cls.create_question(
+            'python basics', quiz=cls.other_quiz, author=cls.other)
+        cls.both = cls.create_question('python zebra')
+        cls.split = cls.create_question('python snake')
+        Answers.objects.create(question=cls.split, text='zebra',
+                               author=cls.author)
+        cls.in_answer = cls.create_question('animals')
+        Answers.objects.create(question=cls.in_answer, text='zebra python',
+                               author=cls.author)
+
+    @classmethod
+    def create_question(cls, title, quiz=None, author=None,
+                        is_active=True):
+        return Questions.objects.create(
+            quiz=quiz or cls.quiz, title=title, is_active=is_active,
+            author=author or cls.author)
+
+    def setUp(self):
+        super().setUp()
+        question_index.load()
+
+    def search(self, **params):
+        response = self.client.get('/search/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [question['id'] for question in response.data['results']]
+
+    @override_settings(SEARCH_MAX_RESULTS=2)
+    def test_filters_before_limit(self):
+        self.assertEqual(self.search(q='python', quiz=self.other_quiz.pk),
+                         [self.other_question.pk])
+        self.assertEqual(self.search(q='python', author=self.other.pk),
+                         [self.other_question.pk])
+        self.assertEqual(len(self.search(q='python')), 2)
+
+    def test_is_active(self):
+        Questions.objects.filter(pk=self.both.pk).update(is_active=False)
+        question_index.load()
+        self.assertNotIn(self.both.pk, self.search(q='python',
+                                                   is_active='true'))
+        self.assertEqual(self.search(q='zebra python', is_active='false'),
+                         [self.both.pk])
+
+    def test_all_words(self):
+        # как plainto_tsquery: все слова в тексте вопроса
+        # или в тексте одного ответа
+        self.assertCountEqual(self.search(q='python zebra'),
+                              [self.both.pk, self.in_answer.pk])
+        self.assertEqual(self.search(q='python missing'), [])
+
+    def test_signals_update_index(self):
+        question = self.create_question('zebra crossing')
+        self.assertIn(question.pk, self.search(q='crossing'))
+        question.delete()
+        self.assertEqual(self.search(q='crossing'), [])
+
+    def test_reload_after_ttl(self):
+        # изменения без сигналов (queryset.update, другой процесс)
+        index = InvertedIndex(ttl=60)
+        index.load()
+        Questions.objects.filter(pk=self.in_answer.pk).update(
+            title='giraffe')
+        self.assertEqual(index.search('giraffe'), [])
+        index._loaded_at -= 61
+        self.assertEqual(index.search('giraffe'), [self.in_answer.pk])
@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from ..models import Categories
+from ..slow_queries import (SLOW_QUERY_DEFAULTS, SlowQueryLogger,
+                            fingerprint, is_read_only)
+
+
+class SlowQueryLogTests(APITestCase):
+    """Журнал медленных запросов: JSONL, отпечатки, EXPLAIN"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'slow.jsonl')
+        self.options = {**SLOW_QUERY_DEFAULTS, 'ENABLED': True,
+                        'THRESHOLD_MS': 0, 'PATH': self.path}
+
+    def entries(self):
+        with open(self.path, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'x''y' AND b = 12.5\n"
+                        "  AND c IN (%s, %s, %s)"),
+            'SELECT * FROM t WHERE a = ? AND b = ? AND c IN (...)')
+        self.assertEqual(fingerprint('SELECT 1 WHERE id = 1'),
+                         fingerprint('SELECT 2  WHERE id = 300'))
+
+    def test_log(self):
+        with self.assertLogs('application.slow_queries', 'WARNING') as logs, \
+                connection.execute_wrapper(SlowQueryLogger(self.options)):
+            list(Categories.objects.filter(pk__in=[1, 2, 3]))
+            Categories.objects.create(name='Категория')
+        self.assertEqual(len(logs.records), 2)
+        select, insert = self.entries()
+        self.assertEqual(select['database'], 'default')
+        self.assertIn('IN (...)', select['normalized'])
+        # план только для чтения, EXPLAIN сам не логируется
+        self.assertTrue(select['explain'])
+        self.assertIsNone(insert['explain'])
+        self.assertNotEqual(select['fingerprint'], insert['fingerprint'])
+
+    def test_with_query(self):
+        table = Categories._meta.db_table
+        with self.assertLogs('application.slow_queries', 'WARNING'), \
+                connection.execute_wrapper(SlowQueryLogger(self.options)), \
+                connection.cursor() as cursor:
+            cursor.execute(f'WITH names AS (SELECT name FROM {table}) '
+                           'SELECT count(*) FROM names')
+            cursor.execute(f'WITH old AS (SELECT id FROM {table}) '
+                           f'DELETE FROM {table} WHERE id IN old')
+        select, delete = self.entries()
+        self.assertTrue(select['explain'])
+        self.assertIsNone(delete['explain'])
+        self.assertTrue(is_read_only("WITH a AS (SELECT 'DELETE') SELECT 1"))
+        self.assertFalse(is_read_only('UPDATE t SET a = 1'))
+
+    def test_threshold(self):
+        options = {**self.options, 'THRESHOLD_MS': 60_000}
+        with connection.execute_wrapper(SlowQueryLogger(options)):
+            list(Categories.objects.all())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_view(self):
+        with override_settings(SLOW_QUERY_LOG=self.options), \
+                self.assertLogs('application.slow_queries', 'WARNING'), \
+                connection.execute_wrapper(SlowQueryLogger(self.options)):
+            self.client.get('/categories/')
+        self.assertEqual({entry['view'] for entry in self.entries()},
+                         {'application:categories'})
+
+
+class SlowQueriesCommandTests(TestCase):
+    """Сводка manage.py slow_queries по отпечаткам"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'slow.jsonl')
+        entries = [('a', 10, '2023-01-01'), ('a', 30, '2023-01-03'),
+                   ('b', 25, '2023-01-02'), ('c', 1, '2023-01-04')]
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for key, duration, day in entries:
+                file.write(json.dumps({
+                    'time': f'{day}T00:00:00+00:00', 'duration_ms': duration,
+                    'view': 'application:questions', 'fingerprint': key,
+                    'normalized': f'SELECT {key}', 'explain': ['SCAN t'],
+                }) + '\n')
+
+    def report(self, *args):
+        stdout = io.StringIO()
+        call_command('slow_queries', '--path', self.path, '--json', *args,
+                     stdout=stdout)
+        return json.loads(stdout.getvalue())
+
+    def test_top(self):
+        top = self.report('--top', '2')
+        self.assertEqual([(group['fingerprint'], group['count'],
+                           group['total_ms'], group['max_ms'])
+                          for group in top],
+                         [('a', 2, 40, 30), ('b', 1, 25, 25)])
+        self.assertEqual(top[0]['mean_ms'], 20)
+        self.assertEqual([group['fingerprint']
+                          for group in self.report('--sort', 'max')],
+                         ['a', 'b', 'c'])
+
+    def test_since(self):
+        self.assertEqual(
+            [(group['fingerprint'], group['count'])
+             for group in self.report('--since', '2023-01-02T12:00')],
+            [('a', 1), ('c', 1)])
+
+    def test_table_and_clear(self):
+        stdout = io.StringIO()
+        call_command('slow_queries', '--path', self.path, '--explain',
+                     '--clear', stdout=stdout)
+        self.assertIn('1. a: 2 раз', stdout.getvalue())
+        self.assertIn('SCAN t', stdout.getvalue())
+        self.assertEqual(self.report(), [])
+
+    def test_missing_log(self):
+        with self.assertRaises(CommandError):
+            call_command('slow_queries', '--path', self.path + '.missing')
@@ -0,0 +1,87 @@
+import gzip
+import json
+from unittest import mock
+
+from django.test import override_settings
+
+from ..models import Answers, Questions
+from ..snapshots import snapshot_store
+from .base import QuizTestCase
+
+
+class QuizSnapshotTests(QuizTestCase):
+    """Снимок квиза: сжатие по Accept-Encoding, ETag на представление"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.question = Questions.objects.create(
+            quiz=cls.quiz, title='Вопрос', author=cls.author)
+        Answers.objects.create(question=cls.question, text='Ответ',
+                               author=cls.author)
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/quiz/{self.quiz.pk}/snapshot/'
+
+    def get(self, encoding='', **headers):
+        return self.client.get(self.url, HTTP_ACCEPT_ENCODING=encoding,
+                               **headers)
+
+    def test_encodings(self):
+        compressed = self.get('gzip, deflate')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        plain = self.get()
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        data = json.loads(plain.content)
+        self.assertEqual(data['title'], 'Квиз')
+        self.assertEqual(data['questions'][0]['answers'][0]['text'], 'Ответ')
+        # разные байты - разные ETag
+        self.assertNotEqual(compressed['ETag'], plain['ETag'])
+
+    def test_not_modified(self):
+        etag = self.get('gzip')['ETag']
+        self.assertEqual(self.get('gzip', HTTP_IF_NONE_MATCH=etag)
+                         .status_code, 304)
+        # ETag сжатого снимка не подходит к несжатому
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_rebuilt_after_change(self):
+        etag = self.get()['ETag']
+        self.question.title = 'Изменён'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.save()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['questions'][0]
+                         ['title'], 'Изменён')
+
+    @override_settings(SNAPSHOT_TTL=3600)
+    def test_timeout(self):
+        cache = snapshot_store.cache
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.get()
+        self.assertTrue(cache_set.call_args_list)
+        for call in cache_set.call_args_list:
+            self.assertEqual(call.args[2], 3600)
+
+    def test_read_without_writes(self):
+        self.get()
+        cache = snapshot_store.cache
+        # повторное чтение ничего не пишет в кэш и не распаковывает снимок
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set, \
+                mock.patch.object(gzip, 'decompress',
+                                  wraps=gzip.decompress) as decompress:
+            plain = self.get()
+            self.get('gzip')
+        cache_set.assert_not_called()
+        decompress.assert_not_called()
+        self.assertEqual(json.loads(plain.content)['title'], 'Квиз')
+
+    def test_missing_quiz(self):
+        self.assertEqual(self.client.get('/quiz/0/snapshot/').status_code,
+                         404)
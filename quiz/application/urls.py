@@ -2,6 +2,9 @@ from django.urls import path, include
 
 from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
 
+from . import async_views
+from .hashers import offload_hashing
+from .instrumentation import metrics_view
 from .views import *
 
 
@@ -9,17 +12,35 @@ app_name = 'application'
 
 urlpatterns = [
     path('', api_root, name='root'),
-    path('register/', RegisterView.as_view(), name='register'),
-    path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('register/', offload_hashing(RegisterView.as_view()),
+         name='register'),
+    path('login/', offload_hashing(TokenObtainPairView.as_view()),
+         name='token_obtain_pair'),
     path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('categories/', CategoryList.as_view(), name='categories'),
     path('quizzes/', QuizList.as_view(), name='quizzes'),
     path('quiz/<int:pk>/', QuizDetail.as_view(), name='quiz'),
+    path('quiz/<int:pk>/snapshot/', QuizSnapshot.as_view(),
+         name='quiz-snapshot'),
+    path('export/<str:fmt>/', QuizExport.as_view(), name='export'),
     path('questions/', QuizQuestions.as_view(), name='questions'),
+    path('questions/import/', QuestionImport.as_view(),
+         name='questions-import'),
     path('question/<int:pk>/', QuestionDetail.as_view(), name='question'),
     path('random/<quiz_id>/', RandomQuestion.as_view(), name='random'),
+    path('random/<int:quiz_id>/session/', QuestionSession.as_view(),
+         name='random-session'),
+    path('search/', QuestionSearch.as_view(), name='search'),
     path('answer/', AddAnswer.as_view(), name='add-answer'),
     path('answer/<int:pk>/', AnswerDetail.as_view(), name='answer'),
+    path('metrics/', metrics_view, name='metrics'),
+    # асинхронные версии эндпоинтов чтения, см. async_views
+    path('async/quizzes/', async_views.quiz_list, name='async-quizzes'),
+    path('async/quiz/<int:pk>/', async_views.quiz_detail, name='async-quiz'),
+    path('async/questions/', async_views.question_list,
+         name='async-questions'),
+    path('async/random/<quiz_id>/', async_views.random_question,
+         name='async-random'),
 ]
 
 
@@ -1,25 +1,54 @@
+import bisect
+import random
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework import generics
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_vary_headers,
+    quote_etag,
+)
+from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
+from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
 
+from .exporters import EXPORT_FORMATS
 from .filters import CategoryFilter, QuizFilter
+from .importers import import_questions, validate_questions
+from .mixins import (
+    CachedListMixin,
+    CachedRetrieveMixin,
+    ConditionalGetMixin,
+    FastQuizReadMixin,
+    FastReadMixin,
+)
 from .models import (
     Answers,
     Categories,
     Quizzes,
     Questions,
 )
+from .parsers import JSONLinesParser, NDJSONParser, QuestionsCSVParser
 from .permissions import IsAuthorOrReadOnly
+from .sampling import question_sampler
+from .search import get_search_backend
 from .serializers import (
     CategorySerializer,
     QuizSerializer,
+    QuestionImportSerializer,
     QuestionSerializer,
+    QuestionSearchSerializer,
+    QuestionSessionSerializer,
     SingleAnswerSerializer,
     UserSerializer,
 )
+from .snapshots import snapshot_store
 
 User = get_user_model()
 
@@ -55,7 +84,7 @@ class CategoryList(generics.ListCreateAPIView):
     http_method_names = ['post', 'get']
 
 
-class QuizList(generics.ListCreateAPIView):
+class QuizList(FastQuizReadMixin, generics.ListCreateAPIView):
     """
     Просмотр списка всех квизов с возможностью фильтрации
     по именам авторов и категорий. Создание квиза от автора.
@@ -72,11 +101,43 @@ class QuizList(generics.ListCreateAPIView):
                                        'author__username',).all()
 
 
-class QuizDetail(generics.RetrieveUpdateDestroyAPIView):
+class QuizExport(generics.GenericAPIView):
+    """
+    Потоковая выгрузка квизов с вопросами и ответами в JSON Lines
+    или CSV. Квизы можно выбрать параметрами quiz (несколько id),
+    category и author, без параметров выгружаются все квизы
+    """
+    filterset_class = QuizFilter
+    pagination_class = None
+    http_method_names = ['get']
+
+    def get_queryset(self):
+        return Quizzes.objects.all()
+
+    def get(self, request, fmt):
+        if fmt not in EXPORT_FORMATS:
+            raise Http404
+        export, content_type = EXPORT_FORMATS[fmt]
+        quizzes = self.filter_queryset(self.get_queryset())
+        quiz_ids = request.query_params.getlist('quiz')
+        if quiz_ids:
+            quizzes = quizzes.filter(
+                pk__in=[pk for pk in quiz_ids if pk.isdigit()])
+        response = StreamingHttpResponse(
+            export(quizzes, chunk_size=settings.EXPORT_CHUNK_SIZE),
+            content_type=f'{content_type}; charset=utf-8')
+        response['Content-Disposition'] = \
+            f'attachment; filename="quizzes.{fmt}"'
+        return response
+
+
+class QuizDetail(FastQuizReadMixin, CachedRetrieveMixin,
+                 generics.RetrieveUpdateDestroyAPIView):
     """
     Получение, обновление и удаление квиза,
     обновление и удаление доступно только для автора квиза
     """
+    cache_kind = 'quiz'
     queryset = Quizzes.objects.select_related(
         'category', 'author').only('id',
                                    'title',
@@ -87,7 +148,35 @@ class QuizDetail(generics.RetrieveUpdateDestroyAPIView):
     http_method_names = ['patch', 'get', 'delete']
 
 
-class QuizQuestions(generics.ListCreateAPIView):
+class QuizSnapshot(generics.GenericAPIView):
+    """
+    Квиз целиком со всеми вопросами и ответами одним ответом.
+    Отдаётся заранее собранный и сжатый снимок без сериализации
+    на каждый запрос, снимок пересобирается при изменениях квиза
+    """
+    pagination_class = None
+    http_method_names = ['get']
+
+    def get(self, request, pk):
+        snapshot = snapshot_store.get(pk)
+        if snapshot is None:
+            raise Http404
+        encoding = snapshot_store.choose_encoding(
+            snapshot, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        etag = quote_etag(snapshot_store.etag(snapshot, encoding))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(snapshot_store.body(snapshot, encoding),
+                                    content_type='application/json')
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class QuizQuestions(ConditionalGetMixin, CachedListMixin,
+                    FastReadMixin, generics.ListCreateAPIView):
     """
     Создание вопроса для квиза.
     Получение списка вопросов вместе с заголовком квиза,
@@ -95,6 +184,7 @@ class QuizQuestions(generics.ListCreateAPIView):
     Есть также возможность фильтрации вопросов
     по квизам, авторам и активным вопросам
     """
+    cache_kind = 'questions'
     serializer_class = QuestionSerializer
     filterset_fields = ('quiz', 'author', 'is_active')
     http_method_names = ['post', 'get']
@@ -105,14 +195,53 @@ class QuizQuestions(generics.ListCreateAPIView):
                 'quiz', 'author').all()
 
 
-class QuestionDetail(generics.RetrieveUpdateDestroyAPIView):
+class QuestionImport(generics.GenericAPIView):
+    """
+    Массовый импорт вопросов с ответами в квиз автора.
+    Принимает JSON {"quiz": id, "questions": [...]} или список
+    вопросов в JSON Lines / CSV с параметром ?quiz=id.
+    Все вопросы создаются в одной транзакции, при ошибках
+    ничего не создаётся, ошибки возвращаются по строкам
+    """
+    serializer_class = QuestionImportSerializer
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, JSONLinesParser,
+                      NDJSONParser, QuestionsCSVParser]
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        data = request.data
+        if isinstance(data, list):
+            data = {'quiz': request.query_params.get('quiz'),
+                    'questions': data}
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        rows, errors = validate_questions(
+            serializer.validated_data['questions'])
+        if errors:
+            return Response({'errors': errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+        quiz_id = serializer.validated_data['quiz']
+        questions, answers = import_questions(
+            quiz_id, request.user.id, rows,
+            batch_size=settings.BULK_IMPORT_BATCH_SIZE)
+        return Response({'quiz': quiz_id,
+                         'questions': len(questions),
+                         'answers': len(answers)},
+                        status=status.HTTP_201_CREATED)
+
+
+class QuestionDetail(ConditionalGetMixin, FastReadMixin,
+                     CachedRetrieveMixin,
+                     generics.RetrieveUpdateDestroyAPIView):
     """
     Обновление, удаление, чтение конкретного вопроса,
     доступно только для автора самого вопроса (кроме чтения)
     """
+    cache_kind = 'question'
     serializer_class = QuestionSerializer
-    queryset = Questions.objects.prefetch_related(
-        'answers').select_related('quiz').all()
+    # чтение идёт через values() (FastReadMixin), объект
+    # загружается только для изменения, ответы для него не нужны
+    queryset = Questions.objects.select_related('quiz', 'author').all()
     permission_classes = [IsAuthorOrReadOnly]
     http_method_names = ['patch', 'get', 'delete']
 
@@ -124,20 +253,114 @@ class RandomQuestion(generics.ListAPIView):
     http_method_names = ['get']
 
     def get_queryset(self):
-        quiz_id = self.kwargs.get('quiz_id')
-        # только по квизу
-        return Questions.objects.prefetch_related('answers').select_related(
-                'quiz').filter(is_active=True, quiz=quiz_id).order_by('?')[:1]
+        queryset = Questions.objects.prefetch_related(
+            'answers').select_related('quiz', 'author')
+        try:
+            quiz_id = int(self.kwargs.get('quiz_id'))
+        except (TypeError, ValueError):
+            return queryset.none()
+        # id выбирается из индекса в памяти, из базы читается одна строка
+        # по первичному ключу вместо сортировки всех вопросов квиза
+        for _ in range(2):
+            question_id = question_sampler.pick(quiz_id)
+            if question_id is None:
+                break
+            questions = list(queryset.filter(pk=question_id, is_active=True,
+                                             quiz=quiz_id))
+            if questions:
+                return questions
+            # индекс устарел (изменения из другого процесса), перечитываем
+            question_sampler.load(quiz_id)
+        return queryset.none()
+
+
+class QuestionSession(generics.GenericAPIView):
+    """
+    Выдача вопросов квиза без повторов: вопросы идут в порядке
+    сессии, заданном seed, cursor указывает следующий вопрос.
+    В ответе возвращается cursor для следующего запроса
+    (null, когда вопросы закончились)
+    """
+    serializer_class = QuestionSerializer
+    pagination_class = None
+    http_method_names = ['get']
+
+    def get_queryset(self):
+        return Questions.objects.prefetch_related(
+            'answers').select_related('quiz', 'author')
+
+    def get(self, request, quiz_id):
+        params = QuestionSessionSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        seed = params.validated_data.get('seed')
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+        cursor = params.validated_data['cursor']
+        size = params.validated_data['size']
+
+        keys, ids = question_sampler.permutation(quiz_id, seed)
+        # cursor - ключ следующего вопроса, а не номер позиции:
+        # новые и удалённые вопросы не сдвигают уже выданные
+        start = bisect.bisect_left(keys, cursor)
+        chunk = ids[start:start + size]
+        questions = self.get_queryset().filter(pk__in=chunk, is_active=True,
+                                               quiz=quiz_id).in_bulk()
+        # порядок выдачи задаётся перестановкой, а не базой
+        results = [questions[pk] for pk in chunk if pk in questions]
+        end = start + len(chunk)
+        return Response({
+            'seed': seed,
+            'cursor': keys[end] if end < len(keys) else None,
+            'total': len(ids),
+            'results': self.get_serializer(results, many=True).data,
+        })
+
+
+class QuestionSearch(generics.ListAPIView):
+    """
+    Полнотекстовый поиск вопросов по тексту вопроса и ответов,
+    результаты отсортированы по релевантности. Можно сузить поиск
+    по квизу, автору и активным вопросам, например чтобы найти
+    повторяющиеся вопросы автора
+    """
+    serializer_class = QuestionSerializer
+    filterset_fields = ('quiz', 'author', 'is_active')
+    http_method_names = ['get']
+
+    def get_queryset(self):
+        return Questions.objects.prefetch_related(
+            'answers').select_related('quiz', 'author')
+
+    def filter_queryset(self, queryset):
+        params = QuestionSearchSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        filterset = DjangoFilterBackend().get_filterset(
+            self.request, queryset, self)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        # значения фильтров нужны поиску в индексе до отбора первых
+        # SEARCH_MAX_RESULTS, а не только фильтрации строк после него
+        values = filterset.form.cleaned_data
+        filters = {'quiz_id': getattr(values.get('quiz'), 'pk', None),
+                   'author_id': getattr(values.get('author'), 'pk', None),
+                   'is_active': values.get('is_active')}
+        return get_search_backend(queryset.db).search(
+            filterset.qs, params.validated_data['q'], filters=filters,
+            limit=settings.SEARCH_MAX_RESULTS,
+        )
 
 
-class AnswerDetail(generics.RetrieveUpdateDestroyAPIView):
+class AnswerDetail(ConditionalGetMixin, CachedRetrieveMixin,
+                   generics.RetrieveUpdateDestroyAPIView):
     """
     Чтение, обновление и удаление ответа на вопрос,
     доступно только для автора
     """
+    cache_kind = 'answer'
+    cache_quiz_field = 'question.quiz_id'
     serializer_class = SingleAnswerSerializer
     queryset = Answers.objects.select_related(
-        'question').only('question__title', 'id',
+        'question', 'author').only('question__title', 'question__quiz_id', 'id',
                          'text', 'is_right',
                          'author__username').all()
     permission_classes = [IsAuthorOrReadOnly]
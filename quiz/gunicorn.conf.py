@@ -0,0 +1,65 @@
+# Конфигурация gunicorn для ASGI (quiz/asgi.py):
+#   gunicorn -c gunicorn.conf.py quiz.asgi:application
+# Воркеры uvicorn выполняют асинхронные представления (async/)
+# в цикле событий, синхронные DRF-представления - в потоке asgiref.
+# WSGI: GUNICORN_WORKER_CLASS=gthread ... quiz.wsgi:application
+#
+# Плавный перезапуск: kill -HUP <pid мастера> заменяет воркеры
+# без потери запросов. При preload_app код загружен в мастере,
+# поэтому для новой версии кода: kill -USR2 (новый мастер),
+# затем kill -QUIT старому мастеру
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0.0.0.0:8000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS',
+                         default='uvicorn.workers.UvicornWorker')
+# по числу доступных процессу ядер (с учётом ограничений cpuset)
+workers = int(os.getenv('GUNICORN_WORKERS',
+                        default=len(os.sched_getaffinity(0))))
+threads = int(os.getenv('GUNICORN_THREADS', default=1))
+
+# приложение импортируется один раз в мастере до fork: воркеры
+# стартуют быстрее и делят память с мастером (copy-on-write)
+preload_app = os.getenv('GUNICORN_PRELOAD', default='1') == '1'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', default=30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', default=5))
+# воркер перезапускается после max_requests запросов (± jitter,
+# чтобы воркеры не перезапускались одновременно)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', default=10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER',
+                                    default=1000))
+
+# сердцебиение воркеров в памяти, а не на диске контейнера
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG', default='-') or None
+loglevel = os.getenv('GUNICORN_LOGLEVEL', default='info')
+
+
+def on_starting(server):
+    # кэш ответов, версии квизов для ETag и кэш количества строк
+    # должны быть общими для воркеров: с LocMemCache у каждого
+    # воркера свой кэш, и изменение, обработанное одним воркером,
+    # не инвалидирует записи остальных
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz.settings')
+    from django.conf import settings
+    backends = {settings.CACHES[alias]['BACKEND']
+                for alias in ('default', settings.PAYLOAD_CACHE_ALIAS)}
+    if server.cfg.workers > 1 and any('locmem' in backend.lower()
+                                      for backend in backends):
+        raise RuntimeError(
+            f'{server.cfg.workers} воркеров с LocMemCache: кэш ответов '
+            f'и ETag будут свои в каждом воркере. Задайте общий кэш '
+            f'(CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, '
+            f'CACHE_LOCATION=redis://redis:6379/0) или GUNICORN_WORKERS=1')
+
+
+def pre_fork(server, worker):
+    # соединение с базой, открытое в мастере при загрузке приложения,
+    # не должно достаться воркерам через fork
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 import os
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,13 +25,22 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.1/howto/deployment/checklist/
 
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = os.getenv('SECRET_KEY', default='django-secret-key')
-
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# в контейнере DEBUG=0 (см. Dockerfile)
+DEBUG = os.getenv('DEBUG', default='1') == '1'
+
+# SECURITY WARNING: keep the secret key used in production secret!
+# ключ по умолчанию - только для разработки, им же подписываются JWT
+SECRET_KEY = os.getenv('SECRET_KEY')
+if not SECRET_KEY:
+    if not DEBUG:
+        raise ImproperlyConfigured('SECRET_KEY не задан (DEBUG=0)')
+    SECRET_KEY = 'django-secret-key'
 
-ALLOWED_HOSTS = []
+# через запятую, например quiz.example.com,localhost
+ALLOWED_HOSTS = [host.strip() for host in
+                 os.getenv('ALLOWED_HOSTS', default='').split(',')
+                 if host.strip()]
 
 
 # Application definition
@@ -49,6 +60,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # включается INSTRUMENTATION_ENABLED=1, см. INSTRUMENTATION
+    'application.instrumentation.ProfilingMiddleware',
+    # включается SLOW_QUERY_LOG_ENABLED=1, см. SLOW_QUERY_LOG
+    'application.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,18 +96,102 @@ WSGI_APPLICATION = 'quiz.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
+# Бэкенды application.backends.* - стандартные бэкенды Django с метриками
+# открытия соединений (metrics/). Соединение переиспользуется запросами
+# DB_CONN_MAX_AGE секунд (0 - закрывается после каждого запроса, так
+# в контейнере под ASGI, none - без ограничения), перед первым запросом
+# к базе в каждом запросе к API проверяется (DB_CONN_HEALTH_CHECKS).
+# Для пула соединений через pgbouncer в режиме transaction нужен
+# DB_DISABLE_SERVER_SIDE_CURSORS=1, см. docker-compose.yaml
+
+DB_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', default='60')
 
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.sqlite3'),
+        'ENGINE': os.getenv('DB_ENGINE',
+                            default='application.backends.sqlite3'),
         'NAME': os.getenv('DB_NAME', default=BASE_DIR / 'db.sqlite3'),
         'USER': os.getenv('DB_USER', default='postgres'),
         'PASSWORD': os.getenv('DB_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
         'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': (None if DB_CONN_MAX_AGE.lower() == 'none'
+                         else int(DB_CONN_MAX_AGE)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS',
+                                        default='1') == '1',
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', default='0') == '1',
+    }
+}
+
+# отдельная база для замеров, которые меняют схему (bench_indexes)
+if os.getenv('DB_SCRATCH_NAME'):
+    DATABASES['scratch'] = {**DATABASES['default'],
+                            'NAME': os.getenv('DB_SCRATCH_NAME')}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# По умолчанию кэш в памяти процесса (LRU, MAX_ENTRIES), в продакшене
+# нужен общий для всех воркеров бэкенд: docker-compose задаёт
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# и CACHE_LOCATION=redis://redis:6379/0 (maxmemory-policy allkeys-lru).
+# С LocMemCache gunicorn.conf.py не запускает больше одного воркера
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND',
+                             default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='quiz'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', default=300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=10000)),
+        },
     }
 }
 
+# Алиас кэша для сериализованных квизов, вопросов и ответов
+PAYLOAD_CACHE_ALIAS = 'default'
+
+
+# Хеширование паролей (application.hashers): PASSWORD_HASHER - scrypt,
+# argon2 (нужен argon2-cffi, иначе scrypt) или pbkdf2. Хеши остальных
+# алгоритмов проверяются и пересчитываются при следующем входе
+PASSWORD_HASHING = {
+    'ALGORITHM': os.getenv('PASSWORD_HASHER', default='scrypt'),
+    'SCRYPT_WORK_FACTOR': int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR',
+                                        default=2 ** 14)),
+    'SCRYPT_BLOCK_SIZE': int(os.getenv('PASSWORD_SCRYPT_BLOCK_SIZE',
+                                       default=8)),
+    'SCRYPT_PARALLELISM': int(os.getenv('PASSWORD_SCRYPT_PARALLELISM',
+                                        default=1)),
+    'ARGON2_TIME_COST': int(os.getenv('PASSWORD_ARGON2_TIME_COST',
+                                      default=2)),
+    'ARGON2_MEMORY_COST': int(os.getenv('PASSWORD_ARGON2_MEMORY_COST',
+                                        default=65536)),
+    'ARGON2_PARALLELISM': int(os.getenv('PASSWORD_ARGON2_PARALLELISM',
+                                        default=1)),
+    # под ASGI вход и регистрация выполняются в отдельном пуле потоков,
+    # одновременно не больше THREADS хешей (0 - по числу доступных ядер)
+    'OFFLOAD': os.getenv('PASSWORD_HASHING_OFFLOAD', default='1') == '1',
+    'THREADS': int(os.getenv('PASSWORD_HASHING_THREADS', default=0)),
+}
+
+_password_hashers = {
+    'scrypt': 'application.hashers.TunedScryptPasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+if find_spec('argon2') is not None:
+    _password_hashers['argon2'] = \
+        'application.hashers.TunedArgon2PasswordHasher'
+if PASSWORD_HASHING['ALGORITHM'] not in _password_hashers:
+    PASSWORD_HASHING['ALGORITHM'] = 'scrypt'
+PASSWORD_HASHERS = [
+    _password_hashers.pop(PASSWORD_HASHING['ALGORITHM']),
+    *_password_hashers.values(),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -129,6 +228,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.1/howto/static-files/
 
 STATIC_URL = 'static/'
+# manage.py collectstatic собирает статику сюда (выполняется в Dockerfile)
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# whitenoise (если установлен) отдаёт статику без отдельного nginx,
+# при DEBUG=0 - сжатой и с хешем в имени для долгого кэширования
+if find_spec('whitenoise') is not None:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+        'whitenoise.middleware.WhiteNoiseMiddleware')
+    if not DEBUG:
+        STATICFILES_STORAGE = \
+            'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
@@ -139,7 +250,7 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'application.authentication.StatelessJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -152,9 +263,36 @@ REST_FRAMEWORK = {
 
     'DEFAULT_PAGINATION_CLASS': 'application.pagination.StandardPagination',
 
+    # orjson, если установлен, иначе стандартный json
+    'DEFAULT_RENDERER_CLASSES': [
+        'application.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
+    'DEFAULT_PARSER_CLASSES': [
+        'application.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# MessagePack (Accept: application/msgpack), если установлен msgpack
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(
+        1, 'application.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(
+        1, 'application.parsers.MessagePackParser')
+
+# Подсчёт количества строк в постраничных ответах
+# (application.pagination.CountStrategyPaginator)
+PAGINATION_COUNT = {
+    'STRATEGY': os.getenv('PAGINATION_COUNT_STRATEGY', default='estimate'),
+    'THRESHOLD': int(os.getenv('PAGINATION_COUNT_THRESHOLD', default=10000)),
+    'TTL': int(os.getenv('PAGINATION_COUNT_TTL', default=30)),
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=180),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -177,6 +315,9 @@ SIMPLE_JWT = {
     'USER_AUTHENTICATION_RULE': 'rest_framework_simplejwt.authentication.default_user_authentication_rule',
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    # username и is_staff в токене для StatelessJWTAuthentication
+    'TOKEN_OBTAIN_SERIALIZER':
+        'application.serializers.ClaimsTokenObtainPairSerializer',
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
 
@@ -187,9 +328,76 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# application.authentication.StatelessJWTAuthentication: на чтение
+# пользователь берётся из токена без запроса к базе, проверенные
+# токены кэшируются в памяти процесса на TOKEN_CACHE_TTL секунд
+JWT_AUTH = {
+    'STATELESS_READS': os.getenv('JWT_STATELESS_READS', default='1') == '1',
+    'TOKEN_CACHE_TTL': int(os.getenv('JWT_TOKEN_CACHE_TTL', default=60)),
+    'TOKEN_CACHE_SIZE': int(os.getenv('JWT_TOKEN_CACHE_SIZE',
+                                      default=10000)),
+}
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Quiz API',
     'VERSION': '1.0.0',
     'SERVE_PUBLIC': False,
     'SERVE_INCLUDE_SCHEMA': False,
-}
\ No newline at end of file
+}
+
+# Полнотекстовый поиск вопросов: auto (PostgreSQL full-text search на
+# PostgreSQL, обратный индекс в памяти процесса на остальных базах),
+# postgres или python
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', default='auto')
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', default=1000))
+# время жизни (сек.) обратного индекса в памяти процесса, по истечении
+# индекс перечитывается из базы (изменения из других процессов)
+SEARCH_INDEX_TTL = int(os.getenv('SEARCH_INDEX_TTL', default=300))
+
+# Массовый импорт вопросов: максимум вопросов за запрос
+# и размер пачки bulk_create
+BULK_IMPORT_MAX_QUESTIONS = int(os.getenv('BULK_IMPORT_MAX_QUESTIONS',
+                                          default=5000))
+BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE',
+                                       default=500))
+
+# Размер пачки строк, читаемых из базы при выгрузке квизов
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', default=2000))
+
+# Пересборка снимков квизов (quiz/<pk>/snapshot/) в фоновом потоке
+# после изменений, без неё снимок собирается при первом запросе
+SNAPSHOT_BACKGROUND = os.getenv('SNAPSHOT_BACKGROUND', default='1') == '1'
+# время жизни (сек.) снимка в кэше, снимок хранится под версией квиза
+SNAPSHOT_TTL = int(os.getenv('SNAPSHOT_TTL', default=86400))
+# число распакованных снимков в памяти процесса для клиентов без сжатия
+SNAPSHOT_IDENTITY_CACHE_SIZE = int(os.getenv('SNAPSHOT_IDENTITY_CACHE_SIZE',
+                                             default=32))
+
+# Время жизни (сек.) индекса активных вопросов квиза в памяти процесса,
+# по истечении индекс перечитывается из базы
+QUESTION_SAMPLER_TTL = int(os.getenv('QUESTION_SAMPLER_TTL', default=300))
+
+# Метрики запросов по представлениям (metrics/, формат Prometheus)
+# и профилирование медленных запросов (cProfile или pyinstrument)
+INSTRUMENTATION = {
+    'ENABLED': os.getenv('INSTRUMENTATION_ENABLED', default='0') == '1',
+    'PROFILE_SAMPLE_RATE': float(os.getenv('PROFILE_SAMPLE_RATE',
+                                           default=0)),
+    'PROFILE_THRESHOLD_MS': int(os.getenv('PROFILE_THRESHOLD_MS',
+                                          default=500)),
+    'PROFILER': os.getenv('PROFILER', default='cprofile'),
+    'PROFILE_DIR': os.getenv('PROFILE_DIR', default=BASE_DIR / 'profiles'),
+    'METRICS_TOKEN': os.getenv('METRICS_TOKEN', default=''),
+}
+
+# Журнал медленных запросов к базе (JSONL) с планом EXPLAIN,
+# сводка по отпечаткам SQL: manage.py slow_queries
+SLOW_QUERY_LOG = {
+    'ENABLED': os.getenv('SLOW_QUERY_LOG_ENABLED', default='0') == '1',
+    'THRESHOLD_MS': float(os.getenv('SLOW_QUERY_THRESHOLD_MS', default=100)),
+    'EXPLAIN': os.getenv('SLOW_QUERY_EXPLAIN', default='1') == '1',
+    # ANALYZE выполняет запрос ещё раз
+    'ANALYZE': os.getenv('SLOW_QUERY_ANALYZE', default='0') == '1',
+    'PATH': os.getenv('SLOW_QUERY_LOG_PATH',
+                      default=BASE_DIR / 'slow_queries.jsonl'),
+}